@@ -0,0 +1,7 @@
+"""
+Offline benchmarks for the store API.
+
+Run them from the project directory, e.g. ``python -m benchmarks.bench_checkout``.
+Each benchmark builds a throwaway test database, so the development
+database is never touched.
+"""
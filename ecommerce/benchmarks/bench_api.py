@@ -0,0 +1,309 @@
+"""
+Load test for every route in store/urls.py, over HTTP against a local
+threaded WSGI server and a seeded throwaway database.
+
+    python -m benchmarks.bench_api --concurrency 16 --requests 500 --output run.json
+    python -m benchmarks.bench_api --compare run.json --tolerance 0.25
+
+For each route and method it reports p50/p95/p99 latency, requests per
+second, errors and SQL queries per request (read from the Server-Timing
+header set by store.middleware.PerformanceMiddleware). The report is JSON.
+With --compare, routes whose p95 grew by more than --tolerance, or whose
+queries per request went up, against an earlier report are listed and the
+exit status is 1.
+"""
+import argparse
+import itertools
+import json
+import platform
+import re
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from benchmarks import common
+
+QUERIES = re.compile(r'desc="(\d+) queries"')
+ADJECTIVES = ['Blue', 'Red', 'Large', 'Small', 'Organic', 'Classic', 'Wireless', 'Vintage']
+NOUNS = ['Mug', 'Shirt', 'Lamp', 'Chair', 'Headphones', 'Notebook', 'Backpack', 'Bottle']
+PASSWORD = 'load-test'
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def seed(users, orders_per_user, items_per_order, products):
+    """
+    Bulk-create the dataset; returns per-user ids for building URLs and the
+    id of a staff user for the staff-only routes.
+    """
+    from django.contrib.auth.hashers import make_password
+    from store.analytics import rebuild_sales_rollups
+    from store.models import CartItem, Order, Product, User
+
+    catalog = Product.objects.bulk_create(
+        Product(sku=f"SKU-{i:06d}", name=f"{ADJECTIVES[i % len(ADJECTIVES)]} {NOUNS[i % len(NOUNS)]} {i}",
+                price='9.99', stock=100)
+        for i in range(products)
+    )
+
+    # One hash shared by every user keeps seeding cheap
+    password = make_password(PASSWORD)
+    created = User.objects.bulk_create(
+        User(name=f"Load User {i}", email=f"load{i}@example.com", address=f"{i} Bench St", phone="5550000",
+             password=password)
+        for i in range(users)
+    )
+    staff = User.objects.create(name="Load Staff", email="staff@example.com", password=password, is_staff=True)
+    orders = Order.objects.bulk_create(
+        Order(user=user, status='Pending' if n == 0 else 'Processed')
+        for user in created for n in range(orders_per_user)
+    )
+    items = CartItem.objects.bulk_create(
+        CartItem(order=order, product=product, product_name=product.name, quantity=i + 1, price=product.price)
+        for n, order in enumerate(orders) for i in range(items_per_order)
+        for product in [catalog[(n * items_per_order + i) % len(catalog)]]
+    )
+
+    rebuild_sales_rollups()
+
+    dataset = {user.id: {'id': str(user.id), 'email': user.email, 'orders': [], 'pending': None, 'items': []} for user in created}
+    for order in orders:
+        entry = dataset[order.user_id]
+        entry['orders'].append(str(order.id))
+        if order.status == 'Pending':
+            entry['pending'] = str(order.id)
+    owners = {order.id: order.user_id for order in orders}
+    for item in items:
+        dataset[owners[item.order_id]]['items'].append(str(item.id))
+    return list(dataset.values()), str(staff.id)
+
+
+def scenarios(dataset, staff_id):
+    """
+    One entry per route and method: (url name, method, request factory,
+    request limit). Each factory call returns (path, user id, body). Staff
+    routes are requested as ``staff_id``. A
+    name may carry a ?variant suffix when one route is exercised twice.
+    Checkout can succeed once per pending order, so it is capped at one
+    request per user.
+    """
+    def cycling(make):
+        users = itertools.cycle(dataset)
+        lock = threading.Lock()
+
+        def next_request():
+            with lock:
+                user = next(users)
+            return make(user)
+        return next_request
+
+    new_users = itertools.count()
+
+    def user_body():
+        n = next(new_users)
+        return {"name": f"New User {n}", "email": f"new{n}@example.com", "password": PASSWORD}
+
+    searches = itertools.cycle([f"{adjective.lower()}+{noun[:3].lower()}" for adjective in ADJECTIVES for noun in NOUNS])
+    item_body = {"product_name": "Load Item", "quantity": 1, "price": "4.99"}
+
+    return [
+        ('user-list-create', 'GET', cycling(lambda u: ('/api/users/?page_size=100', None, None)), None),
+        ('user-list-create', 'POST', cycling(lambda u: ('/api/users/', None, user_body())), None),
+        ('user-detail', 'GET', cycling(lambda u: (f"/api/users/{u['id']}/", None, None)), None),
+        ('login', 'POST', cycling(lambda u: ('/api/login/', None, {"email": u['email'], "password": PASSWORD})), None),
+        ('logout', 'POST', cycling(lambda u: ('/api/logout/', u['id'], None)), None),
+        ('order-list-create', 'GET', cycling(lambda u: ('/api/orders/', u['id'], None)), None),
+        ('order-detail', 'GET', cycling(lambda u: (f"/api/orders/{u['orders'][-1]}/", u['id'], None)), None),
+        ('cart-item-list', 'GET', cycling(lambda u: ('/api/cart-items/', u['id'], None)), None),
+        ('cart-item-list', 'POST', cycling(lambda u: ('/api/cart-items/', u['id'], item_body)), None),
+        ('cart-item-detail', 'GET', cycling(lambda u: (f"/api/cart-items/{u['items'][0]}/", u['id'], None)), None),
+        ('product-list', 'GET', cycling(lambda u: ('/api/products/?page_size=100', None, None)), None),
+        ('product-list?q', 'GET', cycling(lambda u: (f"/api/products/?q={next(searches)}", None, None)), None),
+        ('sales-analytics', 'GET', cycling(lambda u: ('/api/analytics/sales/?group=product', staff_id, None)), None),
+        ('checkout', 'PUT', cycling(lambda u: (f"/api/orders/{u['pending']}/checkout", u['id'], None)), len(dataset)),
+    ]
+
+
+def send(base_url, method, path, user_id, body):
+    data = json.dumps(body).encode() if body is not None else None
+    request = urllib.request.Request(base_url + path, data=data, method=method)
+    request.add_header('Accept', 'application/json')
+    if data is not None:
+        request.add_header('Content-Type', 'application/json')
+    if user_id is not None:
+        request.add_header('X-User-ID', user_id)
+
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request) as response:
+            response.read()
+            status, server_timing = response.status, response.headers.get('Server-Timing', '')
+    except urllib.error.HTTPError as exc:
+        exc.read()
+        status, server_timing = exc.code, exc.headers.get('Server-Timing', '')
+    elapsed = time.perf_counter() - start
+    match = QUERIES.search(server_timing)
+    return elapsed, status, int(match.group(1)) if match else None
+
+
+def run_scenario(base_url, factory, method, requests, concurrency):
+    def one(_):
+        path, user_id, body = factory()
+        return send(base_url, method, path, user_id, body)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - start
+
+    samples = sorted(elapsed for elapsed, _, _ in results)
+    queries = [count for _, _, count in results if count is not None]
+    errors = sum(1 for _, status, _ in results if status >= 400)
+    return {
+        'requests': len(results),
+        'errors': errors,
+        'statuses': dict(sorted(Counter(str(status) for _, status, _ in results).items())),
+        'rps': round(len(results) / wall, 1),
+        'mean_ms': round(sum(samples) / len(samples) * 1000, 3),
+        'p50_ms': round(common.percentile(samples, 50) * 1000, 3),
+        'p95_ms': round(common.percentile(samples, 95) * 1000, 3),
+        'p99_ms': round(common.percentile(samples, 99) * 1000, 3),
+        'queries_per_request': round(sum(queries) / len(queries), 2) if queries else None,
+    }
+
+
+def check_coverage(routes):
+    """Fail loudly when a route in store/urls.py has no scenario."""
+    from store.urls import urlpatterns
+
+    missing = {pattern.name for pattern in urlpatterns} - {name.split('?')[0] for name, _, _, _ in routes}
+    if missing:
+        raise SystemExit(f"No load scenario for: {', '.join(sorted(missing))}")
+
+
+def regressions(report, baseline, tolerance):
+    """Routes whose p95 grew past ``tolerance`` or that now run more queries."""
+    found = []
+    for key, current in report['routes'].items():
+        previous = baseline['routes'].get(key)
+        if previous is None:
+            continue
+        before, after = previous['p95_ms'], current['p95_ms']
+        if after > before * (1 + tolerance):
+            found.append(f"{key} p95_ms: {before} -> {after}")
+        # Query counts are deterministic, so any real increase counts
+        before, after = previous['queries_per_request'], current['queries_per_request']
+        if before is not None and after is not None and after - before >= 0.5:
+            found.append(f"{key} queries_per_request: {before} -> {after}")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--orders-per-user', type=int, default=10)
+    parser.add_argument('--items-per-order', type=int, default=5)
+    parser.add_argument('--products', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=500, help='requests per route and method')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--warmup', type=int, default=20, help='unmeasured requests per route first')
+    parser.add_argument('--route', action='append', help='only run these URL names')
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    parser.add_argument('--compare', help='earlier JSON report to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    common.setup()
+
+    import django
+    from django.conf import settings
+    from django.core.wsgi import get_wsgi_application
+    from django.db import connection
+
+    # All load comes from one address and relatively few users: keep the
+    # throttle on the request path, but with limits the run cannot reach
+    settings.STORE_THROTTLE = {
+        **settings.STORE_THROTTLE,
+        'RATES': {route: '1000000/min' for route in settings.STORE_THROTTLE['RATES']},
+    }
+
+    dataset, staff_id = seed(args.users, args.orders_per_user, args.items_per_order, args.products)
+    routes = scenarios(dataset, staff_id)
+    check_coverage(routes)
+    vendor = connection.vendor
+    connection.close()
+
+    server = make_server('127.0.0.1', 0, get_wsgi_application(),
+                         server_class=ThreadingWSGIServer, handler_class=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_port}'
+
+    results = {}
+    try:
+        for name, method, factory, limit in routes:
+            if args.route and name.split('?')[0] not in args.route:
+                continue
+            requests = min(args.requests, limit) if limit else args.requests
+            warmup = 0 if limit else args.warmup
+            if warmup:
+                run_scenario(base_url, factory, method, warmup, args.concurrency)
+            results[f'{method} {name}'] = result = run_scenario(base_url, factory, method, requests, args.concurrency)
+            print(
+                f"{method:<5}{name:<20} rps={result['rps']:9.1f} p50={result['p50_ms']:8.2f}ms "
+                f"p95={result['p95_ms']:8.2f}ms p99={result['p99_ms']:8.2f}ms "
+                f"queries={result['queries_per_request']} errors={result['errors']}",
+                file=sys.stderr,
+            )
+    finally:
+        server.shutdown()
+        server.server_close()
+        common.teardown()
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': vendor,
+            'users': args.users,
+            'orders_per_user': args.orders_per_user,
+            'items_per_order': args.items_per_order,
+            'products': args.products,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+        },
+        'routes': results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as fh:
+            fh.write(text + '\n')
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as fh:
+            found = regressions(report, json.load(fh), args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if found:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Read throughput of the sync (WSGI) and async (ASGI) store views.
+
+    python -m benchmarks.bench_async --requests 2000 --concurrency 64
+
+Each stack runs in its own subprocess, because STORE_ASYNC_ROUTES is read
+when the URLconf is imported.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import common
+
+ASYNC_ROUTES = 'order-list-create,order-detail,cart-item-list,cart-item-detail,user-detail'
+
+
+def seed(orders):
+    from store.models import CartItem, Order, User
+
+    user = User.objects.create(name="Bench", email="bench@example.com")
+    created = Order.objects.bulk_create(Order(user=user, status='Processed') for _ in range(orders))
+    CartItem.objects.bulk_create(
+        CartItem(order=order, product_name=f"Product {i}", quantity=1, price='9.99')
+        for order in created for i in range(3)
+    )
+    return str(user.id)
+
+
+def run_wsgi(user_id, requests, concurrency):
+    from django.db import connection
+    from django.test import Client
+
+    def fetch(_):
+        try:
+            response, elapsed = common.timed(Client().get, '/api/orders/', HTTP_X_USER_ID=user_id)
+            assert response.status_code == 200, response.status_code
+            return elapsed
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        return list(pool.map(fetch, range(requests)))
+
+
+def run_asgi(user_id, requests, concurrency):
+    from django.test import AsyncClient
+
+    async def main():
+        client = AsyncClient()
+        gate = asyncio.Semaphore(concurrency)
+
+        async def fetch():
+            async with gate:
+                start = time.perf_counter()
+                response = await client.get('/api/orders/', headers={'X-User-ID': user_id})
+                assert response.status_code == 200, response.status_code
+                return time.perf_counter() - start
+
+        return await asyncio.gather(*(fetch() for _ in range(requests)))
+
+    return asyncio.run(main())
+
+
+def child(args):
+    common.setup()
+    user_id = seed(args.orders)
+    runner = run_asgi if args.mode == 'asgi' else run_wsgi
+    start = time.perf_counter()
+    samples = runner(user_id, args.requests, args.concurrency)
+    wall = time.perf_counter() - start
+    common.teardown()
+    samples.sort()
+    print(json.dumps({
+        'mode': args.mode,
+        'rps': len(samples) / wall,
+        'p50_ms': samples[len(samples) // 2] * 1000,
+        'p99_ms': samples[int(len(samples) * 0.99) - 1] * 1000,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--orders', type=int, default=20)
+    parser.add_argument('--mode', choices=['wsgi', 'asgi'])
+    args = parser.parse_args()
+
+    if args.mode:
+        return child(args)
+
+    for mode in ('wsgi', 'asgi'):
+        env = dict(os.environ, STORE_ASYNC_ROUTES=ASYNC_ROUTES if mode == 'asgi' else '')
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_async', '--mode', mode,
+             '--requests', str(args.requests), '--concurrency', str(args.concurrency), '--orders', str(args.orders)],
+            env=env, check=True, capture_output=True, text=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{mode:<5} rps={result['rps']:9.1f} p50={result['p50_ms']:8.2f}ms p99={result['p99_ms']:8.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Per-request authentication cost: the X-User-ID header against signed
+bearer tokens, each with its cache cold and warm.
+
+    python -m benchmarks.bench_auth --users 1000 --rounds 5
+
+Runs CustomUserIDAuthentication.authenticate() once per user per round
+and reports latency and SQL queries per call. Cold rounds clear the user
+cache (header) or the token version cache (token) first.
+"""
+import argparse
+
+from benchmarks import common
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    common.setup()
+
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+    from store.authentication import CustomUserIDAuthentication
+    from store.cache import user_cache
+    from store.models import User
+    from store.tokens import issue_token, token_versions
+
+    users = User.objects.bulk_create(
+        User(name=f"Auth User {i}", email=f"auth{i}@example.com", address=f"{i} Bench St", phone="5550000")
+        for i in range(args.users)
+    )
+    factory = APIRequestFactory()
+    requests = {
+        'X-User-ID': [Request(factory.get('/', HTTP_X_USER_ID=str(user.pk))) for user in users],
+        'Bearer token': [Request(factory.get('/', HTTP_AUTHORIZATION=f"Bearer {issue_token(user)}")) for user in users],
+    }
+    caches = {'X-User-ID': user_cache, 'Bearer token': token_versions}
+    authentication = CustomUserIDAuthentication()
+
+    for scheme, batch in requests.items():
+        for state in ('cold', 'warm'):
+            samples = []
+            queries = 0
+            for _ in range(args.rounds):
+                if state == 'cold':
+                    caches[scheme].clear()
+                with CaptureQueriesContext(connection) as captured:
+                    for request in batch:
+                        _, elapsed = common.timed(authentication.authenticate, request)
+                        samples.append(elapsed)
+                queries += len(captured)
+            common.summarize(f'{scheme} ({state} cache)', samples)
+            print(f"{'':<40} queries/request={queries / len(samples):.2f}")
+
+    common.teardown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Checkout throughput and contention.
+
+    python -m benchmarks.bench_checkout --orders 2000 --concurrency 8
+"""
+import argparse
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import common
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--orders', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+
+    common.setup()
+
+    from django.db import connection
+    from rest_framework.test import APIClient
+    from store.models import Order, User
+
+    users = User.objects.bulk_create(
+        User(name=f"Bench {i}", email=f"bench{i}@example.com") for i in range(args.orders)
+    )
+    orders = Order.objects.bulk_create(Order(user=user, status='Pending') for user in users)
+
+    def checkout(order):
+        client = APIClient()
+        try:
+            response, elapsed = common.timed(
+                client.put, f'/api/orders/{order.id}/checkout', HTTP_X_USER_ID=str(order.user_id)
+            )
+            return response.status_code, elapsed
+        finally:
+            connection.close()
+
+    # Throughput: every worker checks out a different order
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        results = list(pool.map(checkout, orders))
+    wall = time.perf_counter() - start
+    common.summarize('checkout (distinct orders)', [elapsed for _, elapsed in results])
+    print(f"{'wall-clock throughput':<40} {len(results) / wall:.1f} checkouts/s, statuses={dict(Counter(code for code, _ in results))}")
+
+    # Contention: every worker races for the same freshly pending order
+    Order.objects.filter(pk=orders[0].pk).update(status='Pending')
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        results = list(pool.map(checkout, [orders[0]] * args.concurrency))
+    print(f"{'contended checkout statuses':<40} {dict(Counter(code for code, _ in results))}")
+
+    common.teardown()
+
+
+if __name__ == '__main__':
+    main()
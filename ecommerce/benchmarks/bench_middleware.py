@@ -0,0 +1,51 @@
+"""
+Per-request overhead of store.middleware.PerformanceMiddleware.
+
+    python -m benchmarks.bench_middleware --requests 3000
+"""
+import argparse
+
+from benchmarks import common
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=3000)
+    args = parser.parse_args()
+
+    common.setup()
+
+    from django.conf import settings
+    from django.test import Client, override_settings
+    from store.models import Order, User
+
+    user = User.objects.create(name="Bench", email="bench@example.com")
+    Order.objects.bulk_create(Order(user=user, status='Processed') for _ in range(10))
+    headers = {'HTTP_X_USER_ID': str(user.id)}
+
+    def client_for(middleware):
+        with override_settings(MIDDLEWARE=middleware):
+            client = Client()
+            client.get('/api/orders/', **headers)  # builds the middleware chain
+        return client
+
+    without = [m for m in settings.MIDDLEWARE if m != 'store.middleware.PerformanceMiddleware']
+    plain = client_for(without)
+    timed = client_for(['store.middleware.PerformanceMiddleware'] + without)
+
+    # Interleave the two stacks so drift and noise hit both equally
+    baseline, instrumented = [], []
+    for _ in range(args.requests):
+        baseline.append(common.timed(plain.get, '/api/orders/', **headers)[1])
+        instrumented.append(common.timed(timed.get, '/api/orders/', **headers)[1])
+
+    common.summarize('GET /api/orders/ without middleware', baseline)
+    common.summarize('GET /api/orders/ with middleware', instrumented)
+    overhead = (sum(instrumented) - sum(baseline)) / args.requests
+    print(f"{'overhead per request':<40} {overhead * 1e6:.1f}us ({overhead / (sum(baseline) / args.requests):.1%})")
+
+    common.teardown()
+
+
+if __name__ == '__main__':
+    main()
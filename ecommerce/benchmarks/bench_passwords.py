@@ -0,0 +1,87 @@
+"""
+Signup and login latency under concurrency with hashed passwords.
+
+    python -m benchmarks.bench_passwords --requests 200 --concurrency 8 --iterations 600000
+
+Times POST /api/users/ (one hash per request), POST /api/login/ against
+hashes made with the current work factor, and POST /api/login/ against
+hashes made with --old-iterations, where each login also schedules a
+rehash on the password pool. --iterations sets STORE_PASSWORDS
+['ITERATIONS'] for the run; by default the settings are used.
+"""
+import argparse
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import common
+
+PASSWORD = "bench-password"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--iterations', type=int)
+    parser.add_argument('--old-iterations', type=int, default=100000)
+    args = parser.parse_args()
+
+    common.setup()
+
+    from django.conf import settings
+    from django.contrib.auth.hashers import make_password
+    from django.db import connection
+    from rest_framework.test import APIClient
+    from store.models import User
+    from store.passwords import StorePBKDF2PasswordHasher, executor
+
+    if args.iterations:
+        settings.STORE_PASSWORDS = {**settings.STORE_PASSWORDS, 'ITERATIONS': args.iterations}
+    iterations = StorePBKDF2PasswordHasher().iterations
+
+    # One hash shared by every seeded user keeps seeding cheap
+    current = make_password(PASSWORD)
+    old = StorePBKDF2PasswordHasher().encode(PASSWORD, StorePBKDF2PasswordHasher().salt(), args.old_iterations)
+    User.objects.bulk_create(
+        User(name=f"Bench {i}", email=f"current{i}@example.com", password=current) for i in range(args.requests)
+    )
+    User.objects.bulk_create(
+        User(name=f"Bench {i}", email=f"old{i}@example.com", password=old) for i in range(args.requests)
+    )
+
+    def post(path, body):
+        client = APIClient()
+        try:
+            response, elapsed = common.timed(client.post, path, body, format='json')
+            return response.status_code, elapsed
+        finally:
+            connection.close()
+
+    scenarios = [
+        ('signup', lambda i: post('/api/users/', {"name": "New", "email": f"new{i}@example.com", "password": PASSWORD})),
+        ('login', lambda i: post('/api/login/', {"email": f"current{i}@example.com", "password": PASSWORD})),
+        (f'login (rehash from {args.old_iterations})',
+         lambda i: post('/api/login/', {"email": f"old{i}@example.com", "password": PASSWORD})),
+    ]
+
+    print(f"PBKDF2 iterations={iterations} concurrency={args.concurrency}")
+    for label, call in scenarios:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(args.concurrency) as pool:
+            results = list(pool.map(call, range(args.requests)))
+        wall = time.perf_counter() - start
+        common.summarize(label, [elapsed for _, elapsed in results])
+        print(f"{'':<40} {len(results) / wall:.1f} requests/s, statuses={dict(Counter(code for code, _ in results))}")
+
+    # Let the background rehashes finish before the database goes away
+    start = time.perf_counter()
+    executor().shutdown(wait=True)
+    upgraded = User.objects.filter(email__startswith='old', password__startswith=f'pbkdf2_sha256${iterations}$').count()
+    print(f"{'background rehashes':<40} {upgraded}/{args.requests} upgraded, drained in {time.perf_counter() - start:.2f}s")
+
+    common.teardown()
+
+
+if __name__ == '__main__':
+    main()
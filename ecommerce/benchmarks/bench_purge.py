@@ -0,0 +1,75 @@
+"""
+Deleting a heavy user's orders: QuerySet.delete() through the collector
+against store.purge.purge_orders().
+
+    python -m benchmarks.bench_purge --orders 100 --items-per-order 200 --runs 3
+
+Each run seeds identical data for two users and deletes one with each
+path, reporting wall time and peak Python memory (tracemalloc).
+"""
+import argparse
+import tracemalloc
+
+from benchmarks import common
+
+
+def seed(email, orders, items_per_order):
+    from store.models import CartItem, Order, User
+
+    user = User.objects.create(name="Bench", email=email)
+    created = Order.objects.bulk_create(Order(user=user, status='Processed') for _ in range(orders))
+    for order in created:
+        CartItem.objects.bulk_create(
+            (CartItem(order=order, product_name=f"Product {i}", quantity=1, price='9.99')
+             for i in range(items_per_order)),
+            batch_size=500,
+        )
+    return user
+
+
+def measure(func, *args):
+    tracemalloc.start()
+    try:
+        result, elapsed = common.timed(func, *args)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=100)
+    parser.add_argument('--items-per-order', type=int, default=200)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    common.setup()
+
+    from store.models import Order
+    from store.purge import purge_orders
+
+    def collector_delete(user):
+        return Order.objects.filter(user=user).delete()
+
+    paths = [('QuerySet.delete()', collector_delete), ('purge_orders()', purge_orders)]
+    timings = {label: [] for label, _ in paths}
+    peaks = {label: 0 for label, _ in paths}
+    for run in range(args.runs):
+        for label, func in paths:
+            user = seed(f"{label}-{run}@example.com", args.orders, args.items_per_order)
+            (total, _), elapsed, peak = measure(func, user)
+            assert total == args.orders * (args.items_per_order + 1), total
+            timings[label].append(elapsed)
+            peaks[label] = max(peaks[label], peak)
+
+    print(f"{args.orders} orders x {args.items_per_order} items = {args.orders * args.items_per_order} cart items")
+    for label, _ in paths:
+        common.summarize(label, timings[label])
+        print(f"{'':<40} peak memory={peaks[label] / 1024 / 1024:.1f}MiB")
+
+    common.teardown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Rows per second through the ModelSerializer path and the compiled fast path.
+
+    python -m benchmarks.bench_serialization --rows 5000
+"""
+import argparse
+
+from benchmarks import common
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    common.setup()
+
+    from rest_framework.renderers import JSONRenderer
+    from store.fastpath import CompiledSerializer, FastJSONRenderer
+    from store.models import CartItem, Order, User
+    from store.serializers import CartItemSerializer, OrderSerializer, UserSerializer
+
+    users = User.objects.bulk_create(
+        User(name=f"User {i}", email=f"user{i}@example.com", address="1 Bench St") for i in range(args.rows)
+    )
+    orders = Order.objects.bulk_create(Order(user=user, status='Processed') for user in users)
+    CartItem.objects.bulk_create(
+        CartItem(order=order, product_name=f"Product {i}", quantity=2, price='19.99')
+        for i, order in enumerate(orders)
+    )
+
+    cases = [
+        ('UserSerializer', UserSerializer, User.objects.order_by('id')),
+        ('OrderSerializer', OrderSerializer, Order.objects.order_by('-created_at').with_totals()),
+        ('CartItemSerializer', CartItemSerializer, CartItem.objects.all()),
+    ]
+    for label, serializer_class, queryset in cases:
+        compiled = CompiledSerializer(serializer_class)
+        before = [
+            common.timed(lambda: JSONRenderer().render(serializer_class(queryset.all(), many=True).data))[1]
+            for _ in range(args.repeat)
+        ]
+        after = [
+            common.timed(lambda: FastJSONRenderer().render(compiled.rows(queryset.all())))[1]
+            for _ in range(args.repeat)
+        ]
+        slow, fast = min(before), min(after)
+        print(f"{label:<20} serializer={args.rows / slow:10.0f} rows/s  "
+              f"compiled={args.rows / fast:10.0f} rows/s  speedup={slow / fast:5.1f}x")
+
+    common.teardown()
+
+
+if __name__ == '__main__':
+    main()
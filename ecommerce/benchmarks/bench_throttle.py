@@ -0,0 +1,102 @@
+"""
+Per-request cost of rate limiting at high request rates.
+
+    python -m benchmarks.bench_throttle --calls 200000 --users 10000 --concurrency 8
+
+Calls BucketThrottle.allow_request() for POST /api/cart-items/ directly,
+with the local and the cache-backed bucket stores, and compares DRF's
+UserRateThrottle, which keeps a list of request times per user. Each is
+run with every call on one user (a hot key, over its limit for most
+calls) and spread over --users users, on one thread and on
+--concurrency threads.
+"""
+import argparse
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import common
+
+
+def run(check, requests, calls, concurrency):
+    """Wall time of ``calls`` checks over ``requests`` split across threads."""
+    per_thread = calls // concurrency
+
+    def worker(offset):
+        allowed = 0
+        batch = itertools.islice(itertools.cycle(requests[offset:] + requests[:offset]), per_thread)
+        for request in batch:
+            allowed += check(request)
+        return allowed
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        allowed = sum(pool.map(worker, range(concurrency)))
+    return time.perf_counter() - start, allowed, per_thread * concurrency
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=200000)
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--rate', default='600/min')
+    args = parser.parse_args()
+
+    common.setup()
+
+    from django.conf import settings
+    from django.core.cache import cache
+    from django.urls import resolve
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+    from rest_framework.throttling import UserRateThrottle
+    from store import throttling
+    from store.models import User
+
+    users = [User(name=f"Throttle {i}", email=f"throttle{i}@example.com") for i in range(args.users)]
+    factory = APIRequestFactory()
+    match = resolve('/api/cart-items/')
+
+    def request_for(user):
+        http_request = factory.post('/api/cart-items/')
+        http_request.resolver_match = match
+        request = Request(http_request)
+        request.user = user
+        return request
+
+    hot = [request_for(users[0])]
+    spread = [request_for(user) for user in users]
+
+    class DRFUserRateThrottle(UserRateThrottle):
+        rate = args.rate
+
+    backends = {
+        'local buckets': {'BACKEND': 'store.throttling.LocalBucketBackend', 'OPTIONS': {}},
+        'cache buckets (locmem)': {'BACKEND': 'store.throttling.CacheBucketBackend', 'OPTIONS': {'cache': 'default'}},
+    }
+    checks = []
+    for label, backend in backends.items():
+        def configure(backend=backend):
+            settings.STORE_THROTTLE = {**backend, 'ENABLED': True, 'RATES': {'cart-item-list:POST': args.rate}}
+            throttling.reset_throttle('STORE_THROTTLE')
+        checks.append((label, configure, lambda request: throttling.BucketThrottle().allow_request(request, None)))
+    checks.append(('DRF UserRateThrottle', lambda: None,
+                   lambda request: DRFUserRateThrottle().allow_request(request, None)))
+
+    print(f"rate={args.rate} calls={args.calls} users={args.users}")
+    for label, configure, check in checks:
+        for keys, requests in (('hot key', hot), (f'{args.users} users', spread)):
+            for threads in sorted({1, args.concurrency}):
+                configure()
+                cache.clear()
+                elapsed, allowed, calls = run(check, requests, args.calls, threads)
+                print(f"{label + ', ' + keys:<44} threads={threads:<3} "
+                      f"calls/s={calls / elapsed:10.0f} per call={elapsed / calls * 1e6:7.2f}us "
+                      f"allowed={allowed / calls:6.1%}")
+
+    common.teardown()
+
+
+if __name__ == '__main__':
+    main()
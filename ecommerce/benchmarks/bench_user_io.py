@@ -0,0 +1,98 @@
+"""
+Bulk user import and export throughput in rows per second.
+
+    python -m benchmarks.bench_user_io --rows 100000 --batch-size 1000
+
+Generates a CSV and an NDJSON file of ``--rows`` users, then times:
+importing the CSV into an empty table, importing the NDJSON over it with
+--on-conflict update (every row an upsert), and exporting the table to
+each format, with the peak Python memory of a separate traced run. For
+scale, ``--baseline-rows`` users are also created one at a time through
+UserSerializer, as POST /api/users does.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import tempfile
+import tracemalloc
+
+from benchmarks import common
+
+
+def generate(directory, rows):
+    paths = {'csv': os.path.join(directory, 'users.csv'), 'ndjson': os.path.join(directory, 'users.ndjson')}
+    with open(paths['csv'], 'w', newline='') as csv_file, open(paths['ndjson'], 'w') as ndjson_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(['name', 'email', 'address', 'phone'])
+        for i in range(rows):
+            row = [f"Partner {i}", f"partner{i}@example.com", f"{i} Bulk Street", f"555-{i % 10000:04d}"]
+            writer.writerow(row)
+            ndjson_file.write(json.dumps(dict(zip(['name', 'email', 'address', 'phone'], row))) + '\n')
+    return paths
+
+
+def report(label, rows, elapsed, peak=None):
+    line = f"{label:<40} rows={rows:<9} time={elapsed:8.2f}s rows/s={rows / elapsed:10.0f}"
+    if peak is not None:
+        line += f" peak memory={peak / 1024 / 1024:.1f}MiB"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--chunk-size', type=int, default=2000)
+    parser.add_argument('--baseline-rows', type=int, default=2000)
+    args = parser.parse_args()
+
+    common.setup()
+
+    from django.core.management import call_command
+    from store.models import User
+    from store.serializers import UserSerializer
+
+    def run(*command):
+        call_command(*command, stdout=io.StringIO(), stderr=io.StringIO())
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = generate(directory, args.rows)
+
+        _, elapsed = common.timed(run, 'import_users', paths['csv'], '--batch-size', str(args.batch_size))
+        assert User.objects.count() == args.rows
+        report('import_users csv (insert)', args.rows, elapsed)
+
+        _, elapsed = common.timed(
+            run, 'import_users', paths['ndjson'], '--batch-size', str(args.batch_size), '--on-conflict', 'update',
+        )
+        report('import_users ndjson (upsert)', args.rows, elapsed)
+
+        for fmt in ('csv', 'ndjson'):
+            command = ('export_users', os.path.join(directory, f'export.{fmt}'), '--chunk-size', str(args.chunk_size))
+            _, elapsed = common.timed(run, *command)
+            # Traced separately: tracemalloc slows the export down several times
+            tracemalloc.start()
+            try:
+                run(*command)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            report(f'export_users {fmt}', args.rows, elapsed, peak)
+
+    def one_at_a_time():
+        for i in range(args.baseline_rows):
+            serializer = UserSerializer(data={'name': f"Single {i}", 'email': f"single{i}@example.com"})
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+
+    if args.baseline_rows:
+        _, elapsed = common.timed(one_at_a_time)
+        report('UserSerializer.save() per row', args.baseline_rows, elapsed)
+
+    common.teardown()
+
+
+if __name__ == '__main__':
+    main()
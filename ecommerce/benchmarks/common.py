@@ -0,0 +1,56 @@
+import logging
+import math
+import os
+import statistics
+import time
+
+import django
+
+
+def setup():
+    """Configure Django and create a throwaway test database."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ecommerce.settings')
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    # 4xx responses are expected under contention; keep them out of the report
+    logging.getLogger('django.request').setLevel(logging.ERROR)
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+
+
+def teardown():
+    from django.db import connection
+
+    connection.creation.destroy_test_db(connection.settings_dict['NAME'], verbosity=0)
+
+
+def timed(func, *args, **kwargs):
+    """Call ``func`` and return ``(result, elapsed_seconds)``."""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def summarize(label, samples, count=None):
+    """Print a one-line summary of per-call latencies in seconds."""
+    samples = sorted(samples)
+    count = count or len(samples)
+    total = sum(samples)
+    print(
+        f"{label:<40} n={count:<7} "
+        f"mean={statistics.mean(samples) * 1000:8.3f}ms "
+        f"p50={samples[len(samples) // 2] * 1000:8.3f}ms "
+        f"p99={samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000:8.3f}ms "
+        f"ops/s={count / total if total else float('inf'):10.1f}"
+    )
+
+
+def percentile(samples, q):
+    """Nearest-rank percentile of already sorted ``samples``; ``q`` is 0-100."""
+    if not samples:
+        return None
+    rank = max(1, math.ceil(q / 100 * len(samples)))
+    return samples[rank - 1]
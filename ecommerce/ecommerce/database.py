@@ -0,0 +1,87 @@
+"""
+Database settings for the ecommerce project, chosen by environment variables.
+
+DB_ENGINE selects a profile:
+
+* ``sqlite`` (default): the development database in ``BASE_DIR``, with
+  SQLite's driver default busy timeout unless ``DB_BUSY_TIMEOUT_MS`` is set.
+* ``sqlite-tuned``: SQLite for single-node deployments. It uses WAL,
+  ``synchronous=NORMAL``, a busy timeout and IMMEDIATE write transactions.
+* ``postgresql``: PostgreSQL with health checks. It uses Django's native
+  connection pool (needs ``psycopg[pool]``) unless ``DB_POOL=0``, in which
+  case connections are kept open for ``DB_CONN_MAX_AGE`` seconds instead.
+"""
+from django.core.exceptions import ImproperlyConfigured
+
+
+def _flag(value):
+    return str(value).strip().lower() not in ('', '0', 'false', 'no', 'off')
+
+
+def sqlite_config(env, base_dir, tuned=False):
+    config = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': env.get('DB_NAME', base_dir / 'db.sqlite3'),
+        # A file-backed test database makes concurrent tests wait on SQLite's
+        # busy timeout instead of failing on shared-cache table locks.
+        'TEST': {
+            'NAME': base_dir / 'test_db.sqlite3',
+        },
+    }
+    if tuned:
+        busy_timeout = int(env.get('DB_BUSY_TIMEOUT_MS', 5000))
+        config.update({
+            'CONN_MAX_AGE': int(env.get('DB_CONN_MAX_AGE', 600)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    f'PRAGMA busy_timeout={busy_timeout};'
+                ),
+                # Take the write lock at BEGIN so concurrent writers queue on
+                # the busy timeout instead of failing to upgrade a read lock.
+                'transaction_mode': 'IMMEDIATE',
+            },
+        })
+    elif 'DB_BUSY_TIMEOUT_MS' in env:
+        config['OPTIONS'] = {'timeout': int(env['DB_BUSY_TIMEOUT_MS']) / 1000}
+    return config
+
+
+def postgresql_config(env):
+    config = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': env.get('DB_NAME', 'ecommerce'),
+        'USER': env.get('DB_USER', ''),
+        'PASSWORD': env.get('DB_PASSWORD', ''),
+        'HOST': env.get('DB_HOST', ''),
+        'PORT': env.get('DB_PORT', ''),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {},
+    }
+    if _flag(env.get('DB_POOL', '1')):
+        config['OPTIONS']['pool'] = {
+            'min_size': int(env.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(env.get('DB_POOL_MAX_SIZE', 10)),
+            'timeout': int(env.get('DB_POOL_TIMEOUT', 10)),
+        }
+        # Django refuses to combine its pool with persistent connections
+        config['CONN_MAX_AGE'] = 0
+    else:
+        config['CONN_MAX_AGE'] = int(env.get('DB_CONN_MAX_AGE', 600))
+    return config
+
+
+def database_config(env, base_dir):
+    """Return the ``DATABASES['default']`` dict for the profile in ``env``."""
+    engine = env.get('DB_ENGINE', 'sqlite')
+    if engine == 'sqlite':
+        return sqlite_config(env, base_dir)
+    if engine == 'sqlite-tuned':
+        return sqlite_config(env, base_dir, tuned=True)
+    if engine == 'postgresql':
+        return postgresql_config(env)
+    raise ImproperlyConfigured(
+        f"DB_ENGINE is set to {engine!r}; use 'sqlite', 'sqlite-tuned' or 'postgresql'."
+    )
@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from .database import database_config
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -54,10 +57,23 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
         'rest_framework.permissions.AllowAny'
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'store.fastpath.TimedJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'store.throttling.BucketThrottle',
+    ],
+    # Anonymous requests are throttled by client address. With NUM_PROXIES
+    # unset DRF trusts the client's own X-Forwarded-For; set this to the
+    # number of proxies in front of the app when deployed behind some.
+    'NUM_PROXIES': 0,
 }
 
 
 MIDDLEWARE = [
+    'store.middleware.PerformanceMiddleware',
+    'store.middleware.RateLimitMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -90,14 +106,97 @@ WSGI_APPLICATION = 'ecommerce.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
+# Profiles are selected with DB_ENGINE; see ecommerce/database.py
 
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_config(os.environ, BASE_DIR),
+}
+
+# Cache used by CustomUserIDAuthentication to resolve X-User-ID headers.
+# Set SHARED_CACHE to a CACHES alias to add a cross-process tier.
+STORE_USER_CACHE = {
+    'MAX_ENTRIES': 4096,
+    'TTL': 30,
+    'SHARED_CACHE': None,
+    'SHARED_TTL': 300,
+}
+
+# Per-user cart snapshots served by the cart-item list. LOCK_TIMEOUT bounds
+# how long a worker waits for another process to build a shared snapshot.
+STORE_CART_CACHE = {
+    'MAX_ENTRIES': 4096,
+    'TTL': 60,
+    'SHARED_CACHE': None,
+    'SHARED_TTL': 300,
+    'LOCK_TIMEOUT': 5,
+}
+
+# Background jobs run by `manage.py run_jobs`. Failed jobs are retried after
+# RETRY_BASE * 2**(attempt - 1) seconds (capped at RETRY_MAX, with jitter);
+# a job running longer than LEASE seconds is assumed abandoned.
+STORE_JOBS = {
+    'POLL_INTERVAL': 1.0,
+    'BATCH_SIZE': 20,
+    'MAX_ATTEMPTS': 5,
+    'RETRY_BASE': 5,
+    'RETRY_MAX': 3600,
+    'LEASE': 300,
+}
+
+# Idempotency-Key support on order/cart-item creation and checkout. Stored
+# responses are replayed for TTL seconds; a duplicate of a request still
+# running waits up to WAIT seconds for it, and a claim older than
+# LOCK_TIMEOUT with no response is treated as abandoned.
+STORE_IDEMPOTENCY = {
+    'TTL': 86400,
+    'WAIT': 5,
+    'LOCK_TIMEOUT': 60,
+}
+
+# Password hashing (store/passwords.py). ITERATIONS is the PBKDF2 work
+# factor for new hashes, None for Django's default; a stored hash made with
+# a different count is rehashed on the user's next login. Bulk hashing and
+# those rehashes run on a pool of WORKERS threads.
+STORE_PASSWORDS = {
+    'ITERATIONS': None,
+    'WORKERS': 4,
 }
 
+# Signed bearer tokens from POST /api/login/ (store/tokens.py), valid for
+# MAX_AGE seconds. Each request checks the token's version against the
+# user's, cached for VERSION_TTL seconds per process (and SHARED_TTL in
+# SHARED_CACHE, if set), which bounds how long a revoked token still works
+# elsewhere. Set ALLOW_USER_ID_HEADER to False to stop accepting X-User-ID.
+STORE_TOKENS = {
+    'MAX_AGE': 86400,
+    'ALLOW_USER_ID_HEADER': True,
+    'VERSION_TTL': 30,
+    'SHARED_CACHE': None,
+    'SHARED_TTL': 300,
+}
+
+# Token-bucket rate limits (store/throttling.py) per user, or per client
+# address on anonymous routes, for each '<url name>:<METHOD>' in RATES. A
+# rate of '120/min' allows bursts of 120 and refills two tokens a second.
+# The default backend counts per process; use
+# 'store.throttling.CacheBucketBackend' with OPTIONS {'cache': <CACHES
+# alias>} to share the buckets between processes.
+STORE_THROTTLE = {
+    'ENABLED': True,
+    'BACKEND': 'store.throttling.LocalBucketBackend',
+    'OPTIONS': {'max_buckets': 100000},
+    'RATES': {
+        'login:POST': '30/min',
+        'order-list-create:POST': '60/min',
+        'cart-item-list:POST': '120/min',
+        'checkout:PUT': '20/min',
+    },
+}
+
+# URL names in store/urls.py to serve with the async views in
+# store/async_views.py, e.g. STORE_ASYNC_ROUTES=order-list-create,order-detail
+STORE_ASYNC_ROUTES = [name for name in os.environ.get('STORE_ASYNC_ROUTES', '').split(',') if name]
+
 SWAGGER_SETTINGS = {
     'USE_SESSION_AUTH': False,
     'SECURITY_DEFINITIONS': {
@@ -106,10 +205,28 @@ SWAGGER_SETTINGS = {
             'in': 'header',
             'name': 'X-User-ID',
         },
+        'Bearer': {
+            'type': 'apiKey',
+            'in': 'header',
+            'name': 'Authorization',
+        },
     },
 }
 
 
+# Password hashing
+# https://docs.djangoproject.com/en/5.1/topics/auth/passwords/
+# The first entry hashes new passwords; the rest can still verify old ones.
+
+PASSWORD_HASHERS = [
+    'store.passwords.StorePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -0,0 +1,14 @@
+"""
+Settings for the test suite (see pytest.ini): the project settings with a
+short SQLite busy timeout, so a test that races threads against its own
+open transaction fails fast instead of waiting out the default 5 seconds.
+"""
+import os
+
+from .database import database_config
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR
+
+DATABASES = {
+    'default': database_config({'DB_BUSY_TIMEOUT_MS': '100', **os.environ}, BASE_DIR),
+}
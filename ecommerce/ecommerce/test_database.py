@@ -0,0 +1,72 @@
+from pathlib import Path
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.db.utils import ConnectionHandler
+from ecommerce.database import database_config
+
+BASE_DIR = Path('/srv/ecommerce')
+
+
+def test_default_profile_is_development_sqlite():
+    config = database_config({}, BASE_DIR)
+    assert config['ENGINE'] == 'django.db.backends.sqlite3'
+    assert config['NAME'] == BASE_DIR / 'db.sqlite3'
+    assert 'OPTIONS' not in config
+
+
+def test_default_profile_takes_a_busy_timeout():
+    config = database_config({'DB_BUSY_TIMEOUT_MS': '250'}, BASE_DIR)
+    assert config['OPTIONS'] == {'timeout': 0.25}
+
+
+def test_tuned_sqlite_profile_applies_pragmas(tmp_path, django_db_blocker):
+    config = database_config({
+        'DB_ENGINE': 'sqlite-tuned',
+        'DB_NAME': str(tmp_path / 'tuned.sqlite3'),
+        'DB_BUSY_TIMEOUT_MS': '2500',
+    }, tmp_path)
+    assert config['CONN_MAX_AGE'] == 600
+    assert config['CONN_HEALTH_CHECKS'] is True
+
+    connection = ConnectionHandler({'default': config})['default']
+    try:
+        with django_db_blocker.unblock(), connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            assert cursor.fetchone()[0] == 'wal'
+            cursor.execute('PRAGMA synchronous')
+            assert cursor.fetchone()[0] == 1  # NORMAL
+            cursor.execute('PRAGMA busy_timeout')
+            assert cursor.fetchone()[0] == 2500
+        assert connection.transaction_mode == 'IMMEDIATE'
+    finally:
+        connection.close()
+
+
+def test_postgresql_profile_uses_native_pool():
+    config = database_config({
+        'DB_ENGINE': 'postgresql',
+        'DB_NAME': 'shop',
+        'DB_USER': 'shop',
+        'DB_HOST': 'db.internal',
+        'DB_POOL_MAX_SIZE': '20',
+    }, BASE_DIR)
+    assert config['ENGINE'] == 'django.db.backends.postgresql'
+    assert config['HOST'] == 'db.internal'
+    assert config['OPTIONS']['pool'] == {'min_size': 2, 'max_size': 20, 'timeout': 10}
+    assert config['CONN_MAX_AGE'] == 0
+    assert config['CONN_HEALTH_CHECKS'] is True
+
+
+def test_postgresql_profile_without_pool_keeps_connections():
+    config = database_config({
+        'DB_ENGINE': 'postgresql',
+        'DB_POOL': 'off',
+        'DB_CONN_MAX_AGE': '120',
+    }, BASE_DIR)
+    assert 'pool' not in config['OPTIONS']
+    assert config['CONN_MAX_AGE'] == 120
+
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ImproperlyConfigured):
+        database_config({'DB_ENGINE': 'oracle'}, BASE_DIR)
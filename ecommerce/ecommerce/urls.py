@@ -21,6 +21,7 @@ from rest_framework import permissions
 from rest_framework.authentication import BasicAuthentication
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
+from store.views import metrics
 
 schema_view = get_schema_view(
     openapi.Info(
@@ -43,5 +44,6 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('store.urls')),  
     path('', home),
+    path('metrics', metrics, name='metrics'),
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='swagger-ui'),  
 ]
@@ -1,8 +1,18 @@
 from django.contrib import admin
-from store.models import User, Order, CartItem
+from store.models import User, Order, CartItem, Job, IdempotencyRecord, Product, DailyProductSales
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
     list_display = ('name', 'email', 'phone')
+    # Stored hashed; set through the API or import_users, not edited here
+    readonly_fields = ('password',)
 admin.site.register(Order)
 admin.site.register(CartItem)
+admin.site.register(Job)
+admin.site.register(IdempotencyRecord)
+admin.site.register(DailyProductSales)
+
+@admin.register(Product)
+class ProductAdmin(admin.ModelAdmin):
+    list_display = ('sku', 'name', 'price', 'stock')
+    search_fields = ('sku', 'name')
@@ -0,0 +1,217 @@
+import hashlib
+from decimal import Decimal
+from itertools import islice
+
+from django.db import IntegrityError, transaction
+from django.db.models import DecimalField, F, Max, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import CartItem, DailyProductSales, Order
+
+
+REBUILD_CHUNK_SIZE = 2000
+CENT = Decimal('0.01')
+
+LINE_REVENUE = Sum(F('quantity') * F('price'), output_field=DecimalField(max_digits=14, decimal_places=2))
+
+
+def product_key(product_id, product_name):
+    if product_id is not None:
+        return f'p:{product_id.hex}'
+    return 'n:' + hashlib.sha1(product_name.encode()).hexdigest()
+
+
+def sales_lines(items, *group_by, chunk_size=REBUILD_CHUNK_SIZE):
+    """
+    Units and revenue of ``items`` grouped by ``group_by`` plus product:
+    by catalog product where there is one, otherwise by product name.
+    Rows are streamed from the database ``chunk_size`` at a time.
+    """
+    with_product = (
+        items.filter(product__isnull=False).values(*group_by, 'product_id')
+        .annotate(name=Max('product_name'), units=Sum('quantity'), revenue=LINE_REVENUE).order_by()
+    )
+    without_product = (
+        items.filter(product__isnull=True).values(*group_by, 'product_name')
+        .annotate(units=Sum('quantity'), revenue=LINE_REVENUE).order_by()
+    )
+    for row in with_product.iterator(chunk_size=chunk_size):
+        row['product_name'] = row.pop('name')
+        yield row
+    for row in without_product.iterator(chunk_size=chunk_size):
+        yield {**row, 'product_id': None}
+
+
+def _add(day, line):
+    key = product_key(line['product_id'], line['product_name'])
+    increments = {'units': F('units') + line['units'], 'revenue': F('revenue') + line['revenue']}
+    if DailyProductSales.objects.filter(day=day, product_key=key).update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            DailyProductSales.objects.create(
+                day=day, product_key=key, product_id=line['product_id'], product_name=line['product_name'],
+                units=line['units'], revenue=line['revenue'],
+            )
+    except IntegrityError:
+        # Another worker created the row first
+        DailyProductSales.objects.filter(day=day, product_key=key).update(**increments)
+
+
+def _add_order(order):
+    day = timezone.localdate(order.processed_at or order.updated_at)
+    for line in sales_lines(CartItem.objects.filter(order_id=order.pk)):
+        _add(day, line)
+
+
+def record_order_sales(order_id):
+    """
+    Add a processed order's items to the daily rollups. Safe to call more
+    than once: the order is claimed with a conditional UPDATE in the same
+    transaction as the increments. The claim also fixes ``processed_at``,
+    so unrecord_order_sales() finds the same day. Returns whether anything
+    was recorded.
+    """
+    with transaction.atomic():
+        claimed = Order.objects.filter(pk=order_id, status='Processed', sales_recorded=False).update(
+            sales_recorded=True, processed_at=Coalesce('processed_at', 'updated_at'),
+        )
+        if not claimed:
+            return False
+        _add_order(Order.objects.only('processed_at', 'updated_at').get(pk=order_id))
+    return True
+
+
+def unrecord_order_sales(order_id):
+    """
+    Take a recorded order's items back out of the daily rollups, e.g.
+    before the order leaves Processed or is deleted; the counterpart of
+    record_order_sales(), claimed the same way. Returns whether anything
+    was taken out.
+    """
+    with transaction.atomic():
+        claimed = Order.objects.filter(pk=order_id, sales_recorded=True).update(sales_recorded=False)
+        if not claimed:
+            return False
+        order = Order.objects.only('processed_at', 'updated_at').get(pk=order_id)
+        day = timezone.localdate(order.processed_at or order.updated_at)
+        keys = []
+        for line in sales_lines(CartItem.objects.filter(order_id=order_id)):
+            key = product_key(line['product_id'], line['product_name'])
+            DailyProductSales.objects.filter(day=day, product_key=key).update(
+                units=F('units') - line['units'], revenue=F('revenue') - line['revenue'],
+            )
+            keys.append(key)
+        # Rows nothing else contributes to, as a rebuild would leave them
+        DailyProductSales.objects.filter(day=day, product_key__in=keys, units=0, revenue=0).delete()
+    return True
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _insert_lines(lines, chunk_size):
+    rows = 0
+    for chunk in _chunks(lines, chunk_size):
+        DailyProductSales.objects.bulk_create(
+            DailyProductSales(
+                day=line['day'], product_key=product_key(line['product_id'], line['product_name']),
+                product_id=line['product_id'], product_name=line['product_name'],
+                units=line['units'], revenue=line['revenue'],
+            )
+            for line in chunk
+        )
+        rows += len(chunk)
+    return rows
+
+
+def rebuild_sales_rollups(chunk_size=REBUILD_CHUNK_SIZE):
+    """
+    Recompute every rollup from the raw orders and cart items.
+
+    The database does the grouping; the grouped rows are streamed in chunks
+    of ``chunk_size`` and bulk-inserted, so memory use is bounded by the
+    chunk, not by the number of cart items. Orders processed after the
+    rebuild started are left to record_order_sales(), except ones it has
+    already recorded, which are added back. Returns the number of rows.
+    """
+    cutoff = timezone.now()
+    processed_at = Coalesce('processed_at', 'updated_at')
+    included = Order.objects.alias(effective=processed_at).filter(status='Processed', effective__lte=cutoff)
+    items = CartItem.objects.alias(
+        effective=Coalesce('order__processed_at', 'order__updated_at'),
+    ).filter(order__status='Processed', effective__lte=cutoff).annotate(
+        day=TruncDate('effective', tzinfo=timezone.get_current_timezone()),
+    )
+
+    with transaction.atomic():
+        DailyProductSales.objects.all().delete()
+        rows = _insert_lines(sales_lines(items, 'day', chunk_size=chunk_size), chunk_size)
+        included.update(sales_recorded=True, processed_at=processed_at)
+        late = Order.objects.alias(effective=processed_at).filter(
+            status='Processed', sales_recorded=True, effective__gt=cutoff,
+        ).select_for_update()
+        for order in late.only('processed_at', 'updated_at'):
+            _add_order(order)
+    return rows
+
+
+def rebuild_sales_days(days, chunk_size=REBUILD_CHUNK_SIZE):
+    """
+    Recompute the rollups of ``days`` from the items of the orders recorded
+    on them, e.g. after store.purge deleted items in bulk. Unlike
+    unrecord_order_sales(), the statements it runs do not depend on how many
+    orders changed. Returns the number of rows.
+    """
+    days = set(days)
+    if not days:
+        return 0
+    items = CartItem.objects.filter(order__sales_recorded=True).annotate(
+        day=TruncDate(Coalesce('order__processed_at', 'order__updated_at'), tzinfo=timezone.get_current_timezone()),
+    ).filter(day__in=days)
+    with transaction.atomic():
+        DailyProductSales.objects.filter(day__in=days).delete()
+        return _insert_lines(sales_lines(items, 'day', chunk_size=chunk_size), chunk_size)
+
+
+def sales_rollups(start=None, end=None, group='day'):
+    """
+    The rollup rows between ``start`` and ``end`` (inclusive dates),
+    totalled per day, per product, or per day and product.
+    """
+    rollups = DailyProductSales.objects.all()
+    if start is not None:
+        rollups = rollups.filter(day__gte=start)
+    if end is not None:
+        rollups = rollups.filter(day__lte=end)
+
+    if group == 'day':
+        return rollups.values('day').annotate(units=Sum('units'), revenue=Sum('revenue')).order_by('day')
+    if group == 'product':
+        return (
+            rollups.values('product_key', 'product_id')
+            .annotate(name=Max('product_name'), total_units=Sum('units'), total_revenue=Sum('revenue'))
+            .order_by('-total_revenue', 'name')
+        )
+    if group == 'day,product':
+        return rollups.order_by('day', '-revenue').values('day', 'product_id', 'product_name', 'units', 'revenue')
+    raise ValueError(f"Unknown grouping {group!r}")
+
+
+def sales_report(start=None, end=None, group='day'):
+    """Rows of ``sales_rollups()``, shaped for the analytics endpoint."""
+    rows = sales_rollups(start, end, group)
+    # SQLite returns sums of decimals unscaled, e.g. 20 for 20.00
+    if group == 'day':
+        return [{**row, 'revenue': row['revenue'].quantize(CENT)} for row in rows]
+    if group == 'product':
+        return [
+            {'product': row['product_id'], 'product_name': row['name'],
+             'units': row['total_units'], 'revenue': row['total_revenue'].quantize(CENT)}
+            for row in rows
+        ]
+    return [{'day': row.pop('day'), 'product': row.pop('product_id'), **row} for row in rows]
@@ -0,0 +1,118 @@
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from store.models import User, Order, CartItem
+from store.serializers import UserSerializer, OrderSerializer, OrderWithItemsSerializer, CartItemSerializer
+from store.views import UserDetailView, OrderListCreateView, OrderDetailView, CartItemListView, CartItemDetailView, cart_snapshot
+from .authentication import CustomUserIDAuthentication
+from .cart_cache import cart_cache
+from .conditional import Validators, aorder_list_version
+from .fastpath import TimedJSONRenderer
+
+
+class AsyncReadView(View):
+    """
+    Serves GET with Django's async ORM, so a read does not tie up a worker
+    thread under ASGI. Every other method is handed to ``sync_view``, the
+    DRF view for the same URL, so a route can switch over without losing
+    its write methods.
+    """
+    sync_view = None
+    authenticate = True
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.sync_view is not None:
+            cls._sync_handler = staticmethod(sync_to_async(cls.sync_view.as_view()))
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Like APIView, leave CSRF to the delegated DRF view
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method != 'GET':
+            return await self._sync_handler(request, *args, **kwargs)
+
+        if self.authenticate:
+            try:
+                request.user, _ = await CustomUserIDAuthentication().aauthenticate(request)
+            except AuthenticationFailed as exc:
+                return self.render({"detail": exc.detail}, status=status.HTTP_403_FORBIDDEN)
+        return await self.get(request, *args, **kwargs)
+
+    def render(self, data, status=status.HTTP_200_OK):
+        return HttpResponse(TimedJSONRenderer().render(data), status=status, content_type='application/json')
+
+
+class AsyncUserDetailView(AsyncReadView):
+    sync_view = UserDetailView
+    authenticate = False
+
+    async def get(self, request, user_id):
+        try:
+            user = await User.objects.aget(id=user_id)
+        except User.DoesNotExist:
+            return self.render({"error": "User not found"}, status=status.HTTP_404_NOT_FOUND)
+        return self.render(UserSerializer(user).data)
+
+
+class AsyncOrderListView(AsyncReadView):
+    sync_view = OrderListCreateView
+
+    async def get(self, request):
+        # Conditional GET as in OrderListCreateView
+        validators = Validators(request, await aorder_list_version(request.user))
+        not_modified = validators.not_modified(request)
+        if not_modified is not None:
+            return not_modified
+
+        orders = Order.objects.filter(user=request.user).order_by('-created_at').with_totals()
+        if 'cart_items' in request.GET.get('expand', '').split(','):
+            orders = orders.prefetch_related('cart_items')
+            serializer_class = OrderWithItemsSerializer
+        else:
+            serializer_class = OrderSerializer
+        orders = [order async for order in orders]
+        return validators.apply(self.render(serializer_class(orders, many=True).data))
+
+
+class AsyncOrderDetailView(AsyncReadView):
+    sync_view = OrderDetailView
+
+    async def get(self, request, order_id):
+        try:
+            order = await Order.objects.with_totals().aget(id=order_id, user=request.user)
+        except Order.DoesNotExist:
+            return self.render({"error": "Order not found."}, status=status.HTTP_404_NOT_FOUND)
+        return self.render(OrderSerializer(order).data)
+
+
+class AsyncCartItemListView(AsyncReadView):
+    sync_view = CartItemListView
+
+    async def get(self, request):
+        # The same snapshot cache and conditional GET as CartItemListView
+        user = request.user
+        snapshot = await sync_to_async(cart_cache.get)(user.pk, lambda: cart_snapshot(user))
+        if not snapshot['rows']:
+            return self.render({"error": "No cart items found."}, status=status.HTTP_404_NOT_FOUND)
+        validators = Validators(request, snapshot['version'])
+        not_modified = validators.not_modified(request)
+        if not_modified is not None:
+            return not_modified
+        return validators.apply(self.render(snapshot['rows']))
+
+
+class AsyncCartItemDetailView(AsyncReadView):
+    sync_view = CartItemDetailView
+
+    async def get(self, request, cart_item_id=None):
+        try:
+            cart_item = await CartItem.objects.aget(id=cart_item_id, order__user=request.user)
+        except CartItem.DoesNotExist:
+            return self.render({"error": "Cart item not found."}, status=status.HTTP_404_NOT_FOUND)
+        return self.render(CartItemSerializer(cart_item).data)
@@ -1,20 +1,57 @@
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
-from .models import User
+from .cache import user_cache
+from .tokens import auser_for_token, token_settings, user_for_token
 
 class CustomUserIDAuthentication(BaseAuthentication):
-    def authenticate(self, request):
+    def get_token(self, request):
+        # A signed token from "Authorization: Bearer <token>", if one was sent
+        scheme, _, token = request.META.get('HTTP_AUTHORIZATION', '').partition(' ')
+        if scheme.lower() != 'bearer':
+            return None
+        if not token.strip():
+            raise AuthenticationFailed('Bearer token missing')
+        return token.strip()
+
+    def get_user_id(self, request):
         # Get user ID from the request headers
         user_id = request.META.get('HTTP_X_USER_ID')
-        
+
         if not user_id:
             raise AuthenticationFailed('User ID header missing')
+        if not token_settings()['ALLOW_USER_ID_HEADER']:
+            raise AuthenticationFailed('Bearer token required')
+        return user_id
+
+    def authenticate(self, request):
+        # A bearer token is checked against the user's cached token version
+        # only; the user's other fields are loaded if a view reads them.
+        token = self.get_token(request)
+        if token is not None:
+            user = user_for_token(token)
+            if user is None:
+                raise AuthenticationFailed('Invalid or expired token')
+            return (user, token)
+
+        # Resolve the user by UUID through the user cache, which only hits the
+        # database on a miss
+        user = user_cache.get_user(self.get_user_id(request))
+        if user is None:
+            raise AuthenticationFailed('No such user')
+
+        return (user, None)
 
-        try:
-            # Find the user by UUID (using the user ID passed in the header)
-            user = User.objects.get(id=user_id)
+    async def aauthenticate(self, request):
+        # Used by the async views, which run outside DRF's request cycle
+        token = self.get_token(request)
+        if token is not None:
+            user = await auser_for_token(token)
+            if user is None:
+                raise AuthenticationFailed('Invalid or expired token')
+            return (user, token)
 
-        except User.DoesNotExist:
+        user = await user_cache.aget_user(self.get_user_id(request))
+        if user is None:
             raise AuthenticationFailed('No such user')
 
         return (user, None)
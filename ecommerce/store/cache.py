@@ -0,0 +1,266 @@
+import copy
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import User
+
+
+USER_CACHE_DEFAULTS = {
+    'MAX_ENTRIES': 4096,
+    'TTL': 30,
+    'SHARED_CACHE': None,
+    'SHARED_TTL': 300,
+}
+
+
+class LRUCache:
+    """Thread-safe in-process cache with LRU eviction and a per-entry TTL."""
+
+    def __init__(self, max_entries=1024, ttl=60, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at <= self.clock():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, self.clock() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TwoTierCache:
+    """
+    Base for the store's caches: an in-process LRU tier and, optionally, a
+    shared tier backed by one of Django's configured caches. Subclasses set
+    ``key_prefix``, where their settings come from, and what is cached.
+
+    Invalidation replaces a per-key generation token in the shared tier.
+    Subclasses that store entries as ``(token, value)`` and only serve them
+    while the token is current see invalidations made by other processes.
+    Within a process, ``_read_guard()`` tells a read whether the key was
+    invalidated while it ran, so a stale result is not stored.
+    """
+
+    key_prefix = None
+    settings_name = None
+    defaults = {}
+
+    def __init__(self, max_entries=4096, ttl=30, shared_cache=None, shared_ttl=300):
+        self.local = LRUCache(max_entries=max_entries, ttl=ttl)
+        self.shared_cache = shared_cache
+        self.shared_ttl = shared_ttl
+        self._lock = threading.Lock()
+        self._reads = {}
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    @classmethod
+    def options(cls):
+        options = {**cls.defaults, **getattr(settings, cls.settings_name, {})}
+        return {name: options[name] for name in cls.defaults}
+
+    @classmethod
+    def from_settings(cls):
+        return cls(**{name.lower(): value for name, value in cls.options().items()})
+
+    @property
+    def shared(self):
+        if isinstance(self.shared_cache, str):
+            return caches[self.shared_cache]
+        return self.shared_cache
+
+    @property
+    def generation_ttl(self):
+        # Outlives any entry stored under the token it replaced
+        return self.shared_ttl * 2
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _cache_key(self, key):
+        return self.key_prefix + str(key)
+
+    def _generation_key(self, key):
+        return self._cache_key(key) + ':gen'
+
+    @contextmanager
+    def _read_guard(self, key):
+        """
+        Wraps a read of ``key`` from the database. The yielded callable
+        returns whether ``key`` has not been invalidated since it began.
+        """
+        with self._lock:
+            reads = self._reads.setdefault(key, [0, 0])  # [in flight, invalidations]
+            reads[0] += 1
+            invalidations = reads[1]
+        try:
+            yield lambda: reads[1] == invalidations
+        finally:
+            with self._lock:
+                reads[0] -= 1
+                if not reads[0]:
+                    del self._reads[key]
+
+    def _invalidate_local(self, user_id):
+        key = uuid.UUID(str(user_id))
+        with self._lock:
+            reads = self._reads.get(key)
+            if reads is not None:
+                reads[1] += 1
+        self.local.delete(key)
+        return key
+
+    def invalidate(self, user_id):
+        key = self._invalidate_local(user_id)
+        shared = self.shared
+        if shared is not None:
+            shared.set(self._generation_key(key), uuid.uuid4().hex, self.generation_ttl)
+            shared.delete(self._cache_key(key))
+
+    def invalidate_on_commit(self, user_id):
+        """
+        Invalidate now, and again once the current transaction commits, so a
+        value read before the commit is not cached past it.
+        """
+        self.invalidate(user_id)
+        transaction.on_commit(partial(self.invalidate, user_id))
+
+    def clear(self):
+        self.local.clear()
+        with self._lock:
+            self.hits = self.shared_hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'size': len(self.local),
+            }
+
+
+class UserCache(TwoTierCache):
+    """
+    Resolves users by id through an in-process LRU tier and, optionally, a
+    shared tier backed by one of Django's configured caches.
+
+    Local entries are only invalidated in the process that saved or deleted
+    the user, so the local TTL bounds how stale other workers can be.
+    """
+
+    key_prefix = 'store:user:'
+    settings_name = 'STORE_USER_CACHE'
+    defaults = USER_CACHE_DEFAULTS
+
+    def _local_get(self, key):
+        user = self.local.get(key)
+        if user is not None:
+            self._count('hits')
+        return user
+
+    def get_user(self, user_id):
+        """Return the ``User`` with the given id, or ``None`` if there is none."""
+        try:
+            key = uuid.UUID(str(user_id))
+        except ValueError:
+            return None
+
+        user = self._local_get(key)
+        if user is not None:
+            return copy.copy(user)
+
+        shared = self.shared
+        if shared is not None:
+            user = shared.get(self._cache_key(key))
+            if user is not None:
+                self._count('shared_hits')
+                self.local.set(key, user)
+                return copy.copy(user)
+
+        self._count('misses')
+        try:
+            user = User.objects.get(id=key)
+        except User.DoesNotExist:
+            return None
+
+        self.local.set(key, user)
+        if shared is not None:
+            shared.set(self._cache_key(key), user, self.shared_ttl)
+        return copy.copy(user)
+
+    async def aget_user(self, user_id):
+        """Async counterpart of ``get_user`` for ASGI views."""
+        try:
+            key = uuid.UUID(str(user_id))
+        except ValueError:
+            return None
+
+        user = self._local_get(key)
+        if user is not None:
+            return copy.copy(user)
+
+        shared = self.shared
+        if shared is not None:
+            user = await shared.aget(self._cache_key(key))
+            if user is not None:
+                self._count('shared_hits')
+                self.local.set(key, user)
+                return copy.copy(user)
+
+        self._count('misses')
+        try:
+            user = await User.objects.aget(id=key)
+        except User.DoesNotExist:
+            return None
+
+        self.local.set(key, user)
+        if shared is not None:
+            await shared.aset(self._cache_key(key), user, self.shared_ttl)
+        return copy.copy(user)
+
+    def invalidate(self, user_id):
+        # Entries carry no generation token, so only the entry goes
+        key = self._invalidate_local(user_id)
+        shared = self.shared
+        if shared is not None:
+            shared.delete(self._cache_key(key))
+
+
+user_cache = UserCache.from_settings()
@@ -0,0 +1,149 @@
+import threading
+import time
+import uuid
+
+from .cache import LRUCache, TwoTierCache
+
+
+CART_CACHE_DEFAULTS = {
+    'MAX_ENTRIES': 4096,
+    'TTL': 60,
+    'SHARED_CACHE': None,
+    'SHARED_TTL': 300,
+    'LOCK_TIMEOUT': 5,
+}
+
+
+class CartCache(TwoTierCache):
+    """
+    Serialized cart snapshots keyed by user id, with an in-process LRU tier
+    and an optional shared tier backed by one of Django's configured caches.
+
+    A snapshot is whatever the caller's ``build`` returns; CartItemListView
+    stores the rendered rows together with the version its ETag is made of.
+    Concurrent misses for one user build once: threads in a process wait on
+    a per-user lock, and processes sharing a cache wait on an ``add()`` lock
+    key while the holder builds.
+
+    Snapshots are invalidated from model signals (see store.signals). A
+    build that overlaps an invalidation is returned but not stored. With a
+    shared tier, entries are stored with the user's generation token and a
+    local hit is only served while it is still current, so an invalidation
+    in one process reaches the local tier of every other.
+    """
+
+    key_prefix = 'store:cart:'
+    settings_name = 'STORE_CART_CACHE'
+    defaults = CART_CACHE_DEFAULTS
+    poll_interval = 0.01
+
+    def __init__(self, max_entries=4096, ttl=60, shared_cache=None, shared_ttl=300, lock_timeout=5):
+        super().__init__(max_entries=max_entries, ttl=ttl, shared_cache=shared_cache, shared_ttl=shared_ttl)
+        # order id -> owner id, so item signals rarely need a query
+        self.owners = LRUCache(max_entries=max_entries * 4, ttl=ttl)
+        self.lock_timeout = lock_timeout
+        self._build_locks = {}
+
+    def _build_lock(self, key):
+        with self._lock:
+            lock = self._build_locks.get(key)
+            if lock is None:
+                lock = self._build_locks[key] = [threading.Lock(), 0]
+            lock[1] += 1
+            return lock
+
+    def _release_build_lock(self, key, lock):
+        with self._lock:
+            lock[1] -= 1
+            if not lock[1]:
+                del self._build_locks[key]
+
+    def get(self, user_id, build):
+        """Return the snapshot for ``user_id``, calling ``build()`` on a miss."""
+        key = uuid.UUID(str(user_id))
+        shared = self.shared
+        entry = self.local.get(key)
+        if entry is not None and self._is_current(entry, shared, key):
+            self._count('hits')
+            return entry[1]
+
+        lock = self._build_lock(key)
+        try:
+            with lock[0]:
+                # Another thread may have built it while this one waited
+                entry = self.local.get(key)
+                if entry is not None and self._is_current(entry, shared, key):
+                    self._count('hits')
+                    return entry[1]
+                return self._get_shared_or_build(key, build, shared)
+        finally:
+            self._release_build_lock(key, lock)
+
+    def _is_current(self, entry, shared, key):
+        return shared is None or entry[0] == shared.get(self._generation_key(key))
+
+    def _generation(self, shared, key):
+        """The user's shared generation token, created if there is none."""
+        generation_key = self._generation_key(key)
+        generation = shared.get(generation_key)
+        if generation is None:
+            shared.add(generation_key, uuid.uuid4().hex, self.generation_ttl)
+            generation = shared.get(generation_key)
+        return generation
+
+    def _get_shared_or_build(self, key, build, shared):
+        if shared is None:
+            return self._build(key, build)
+
+        generation = self._generation(shared, key)
+        cache_key = self._cache_key(key)
+        entry = shared.get(cache_key)
+        if entry is not None and entry[0] == generation:
+            self._count('shared_hits')
+            self.local.set(key, entry)
+            return entry[1]
+
+        lock_key = cache_key + ':lock'
+        if not shared.add(lock_key, 1, self.lock_timeout):
+            # Another process is building; wait for its result, but not
+            # past the lock timeout.
+            deadline = time.monotonic() + self.lock_timeout
+            while time.monotonic() < deadline:
+                time.sleep(self.poll_interval)
+                entry = shared.get(cache_key)
+                if entry is not None and entry[0] == generation:
+                    self._count('shared_hits')
+                    self.local.set(key, entry)
+                    return entry[1]
+            return self._build(key, build, generation)
+        try:
+            return self._build(key, build, generation)
+        finally:
+            shared.delete(lock_key)
+
+    def _build(self, key, build, generation=None):
+        # ``generation`` is the shared token read before building; if another
+        # process invalidates meanwhile, what is stored here is never served.
+        self._count('misses')
+        with self._read_guard(key) as current:
+            snapshot = build()
+            if current():
+                entry = (generation, snapshot)
+                self.local.set(key, entry)
+                shared = self.shared
+                if shared is not None:
+                    shared.set(self._cache_key(key), entry, self.shared_ttl)
+        return snapshot
+
+    def remember_owner(self, order_id, user_id):
+        self.owners.set(order_id, user_id)
+
+    def owner_of(self, order_id):
+        return self.owners.get(order_id)
+
+    def clear(self):
+        super().clear()
+        self.owners.clear()
+
+
+cart_cache = CartCache.from_settings()
@@ -0,0 +1,57 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+
+from .models import CartItem, Order
+
+
+ORDER_LIST_VERSION = {
+    'count': Count('id', distinct=True),
+    'updated': Max('updated_at'),
+    'item_count': Count('cart_items'),
+    'item_updated': Max('cart_items__updated_at'),
+}
+
+
+def order_list_version(user):
+    """Row counts and latest update times behind a user's order list, in one query."""
+    return Order.objects.filter(user=user).aggregate(**ORDER_LIST_VERSION)
+
+
+async def aorder_list_version(user):
+    return await Order.objects.filter(user=user).aaggregate(**ORDER_LIST_VERSION)
+
+
+def cart_item_list_version(user):
+    """Row count and latest update time behind a user's cart item list, in one query."""
+    return CartItem.objects.filter(order__user=user).aggregate(
+        count=Count('id'),
+        updated=Max('updated_at'),
+    )
+
+
+class Validators:
+    """
+    The ETag of a collection, built from a version dict. The counts catch
+    deletions, which do not move any updated_at. No Last-Modified is sent:
+    the latest updated_at of the rows left stays put when rows are deleted,
+    so If-Modified-Since could answer 304 for a list that has changed.
+    """
+
+    def __init__(self, request, version):
+        fingerprint = '|'.join([
+            str(request.user.pk),
+            request.get_full_path(),
+            *(f'{key}={value.isoformat() if hasattr(value, "isoformat") else value}'
+              for key, value in sorted(version.items())),
+        ])
+        self.etag = 'W/"%s"' % hashlib.sha1(fingerprint.encode()).hexdigest()
+
+    def not_modified(self, request):
+        """A 304 response if the client's copy is current, otherwise None."""
+        return get_conditional_response(request, etag=self.etag)
+
+    def apply(self, response):
+        response['ETag'] = self.etag
+        return response
@@ -0,0 +1,136 @@
+import functools
+import hashlib
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from drf_yasg import openapi
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyRecord
+
+
+IDEMPOTENCY_DEFAULTS = {
+    'TTL': 86400,
+    'WAIT': 5,
+    'LOCK_TIMEOUT': 60,
+}
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.05
+CLAIM_ATTEMPTS = 3
+
+idempotency_key_header = openapi.Parameter(
+        name="Idempotency-Key",
+        in_=openapi.IN_HEADER,
+        description="Client-chosen unique key; a retry with the same key replays the first response",
+        type=openapi.TYPE_STRING
+)
+
+
+def idempotency_settings():
+    return {**IDEMPOTENCY_DEFAULTS, **getattr(settings, 'STORE_IDEMPOTENCY', {})}
+
+
+def _error(message, code, **headers):
+    return Response({"error": message}, status=code, headers=headers or None)
+
+
+def _replay(record):
+    return Response(record.response, status=record.status_code, headers={'Idempotent-Replayed': 'true'})
+
+
+def _claim(key, fingerprint, options):
+    """
+    Insert the in-progress record for ``key``. Returns ``(True, None)``
+    when this request won the key, ``(False, record)`` with the record that
+    already holds it, or ``(False, None)`` if the key kept being released
+    and taken again between the insert and the read.
+    """
+    for _ in range(CLAIM_ATTEMPTS):
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                IdempotencyRecord.objects.create(
+                    key=key, fingerprint=fingerprint, expires_at=now + timedelta(seconds=options['TTL']),
+                )
+            return True, None
+        except IntegrityError:
+            record = IdempotencyRecord.objects.filter(key=key).first()
+            if record is not None:
+                return False, record
+    return False, None
+
+
+def _is_abandoned(record, options):
+    if record.expires_at <= timezone.now():
+        return True
+    lock_timeout = timedelta(seconds=options['LOCK_TIMEOUT'])
+    return record.status_code is None and record.created_at < timezone.now() - lock_timeout
+
+
+def idempotent(view_method):
+    """
+    Give an APIView write method Idempotency-Key support.
+
+    The first request with a key runs the view and stores its status and
+    data for ``STORE_IDEMPOTENCY['TTL']`` seconds. A repeat with the same
+    key, from the same user to the same method and path, gets the stored
+    response back without running the view. A repeat that arrives while
+    the first is still running waits up to ``WAIT`` seconds for it, so
+    concurrent duplicates collapse into one write. The same key with a
+    different body is rejected with 422. 5xx responses and exceptions are
+    not stored, so the client can retry them.
+    """
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        header = request.headers.get('Idempotency-Key')
+        if header is None:
+            return view_method(self, request, *args, **kwargs)
+        if not header or len(header) > MAX_KEY_LENGTH:
+            return _error(f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters.", status.HTTP_400_BAD_REQUEST)
+
+        options = idempotency_settings()
+        scope = f'{request.user.pk}\n{request.method}\n{request.path}\n{header}'
+        key = hashlib.sha256(scope.encode()).hexdigest()
+        fingerprint = hashlib.sha256(request.body).hexdigest()
+
+        record = IdempotencyRecord.objects.filter(key=key).first()
+        if record is not None and _is_abandoned(record, options):
+            IdempotencyRecord.objects.filter(key=key, created_at=record.created_at).delete()
+            record = None
+        if record is None:
+            claimed, record = _claim(key, fingerprint, options)
+            if not claimed and record is None:
+                return _error("A request with this Idempotency-Key is still in progress.",
+                              status.HTTP_409_CONFLICT, **{'Retry-After': '1'})
+
+        if record is not None:
+            if record.fingerprint != fingerprint:
+                return _error("Idempotency-Key was already used with a different request body.",
+                              status.HTTP_422_UNPROCESSABLE_ENTITY)
+            deadline = time.monotonic() + options['WAIT']
+            while record is not None and record.status_code is None and time.monotonic() < deadline:
+                time.sleep(POLL_INTERVAL)
+                record = IdempotencyRecord.objects.filter(key=key).first()
+            if record is None:
+                # The first request failed and released the key
+                return _error("The original request failed; retry it.", status.HTTP_409_CONFLICT)
+            if record.status_code is None:
+                return _error("A request with this Idempotency-Key is still in progress.",
+                              status.HTTP_409_CONFLICT, **{'Retry-After': '1'})
+            return _replay(record)
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except BaseException:
+            IdempotencyRecord.objects.filter(key=key).delete()
+            raise
+        if response.status_code >= 500:
+            IdempotencyRecord.objects.filter(key=key).delete()
+        else:
+            IdempotencyRecord.objects.filter(key=key).update(status_code=response.status_code, response=response.data)
+        return response
+    return wrapper
@@ -0,0 +1,149 @@
+import logging
+import os
+import random
+import socket
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+
+logger = logging.getLogger(__name__)
+
+JOB_DEFAULTS = {
+    'POLL_INTERVAL': 1.0,
+    'BATCH_SIZE': 20,
+    'MAX_ATTEMPTS': 5,
+    'RETRY_BASE': 5,
+    'RETRY_MAX': 3600,
+    'LEASE': 300,
+}
+
+handlers = {}
+
+
+def job_settings():
+    return {**JOB_DEFAULTS, **getattr(settings, 'STORE_JOBS', {})}
+
+
+def register(name):
+    """Register the decorated function as the handler for jobs called ``name``."""
+    def decorator(func):
+        handlers[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, payload=None, key=None, delay=None, max_attempts=None):
+    """
+    Queue a job in the current transaction, so it is only ever seen by a
+    worker if the surrounding work commits. A job whose ``key`` has been
+    queued before is not added again. One INSERT.
+    """
+    if name not in handlers:
+        raise ValueError(f"No handler registered for job {name!r}")
+    job = Job(
+        name=name,
+        payload=payload or {},
+        idempotency_key=key,
+        max_attempts=max_attempts or job_settings()['MAX_ATTEMPTS'],
+        run_at=timezone.now() + (delay or timedelta()),
+    )
+    Job.objects.bulk_create([job], ignore_conflicts=True)
+    return job
+
+
+def backoff(attempts, base, maximum):
+    """Seconds to wait before retry number ``attempts``: exponential, capped, with jitter."""
+    delay = min(maximum, base * 2 ** (attempts - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class Worker:
+    """
+    Claims due jobs and runs their handlers. Any number of workers can share
+    the table: a job is claimed with a conditional UPDATE, so only one
+    worker wins it, and a job left running past the lease (its worker died)
+    is claimed again. The claim counts the attempt, so a job that keeps
+    killing its worker still runs out of attempts.
+    """
+
+    def __init__(self, worker_id=None, batch_size=None, lease=None, retry_base=None, retry_max=None):
+        options = job_settings()
+        self.worker_id = worker_id or f'{socket.gethostname()}:{os.getpid()}'
+        self.batch_size = batch_size or options['BATCH_SIZE']
+        self.lease = timedelta(seconds=lease or options['LEASE'])
+        self.retry_base = retry_base or options['RETRY_BASE']
+        self.retry_max = retry_max or options['RETRY_MAX']
+
+    def due(self, now):
+        stale = now - self.lease
+        return Job.objects.filter(
+            Q(status='queued', run_at__lte=now) | Q(status='running', locked_at__lt=stale)
+        ).order_by('run_at').values_list('pk', flat=True)[:self.batch_size]
+
+    def claim(self, pk, now):
+        return Job.objects.filter(
+            Q(status='queued') | Q(status='running', locked_at__lt=now - self.lease), pk=pk,
+        ).update(
+            status='running', locked_by=self.worker_id, locked_at=now, updated_at=now, attempts=F('attempts') + 1,
+        )
+
+    def run_once(self, stop=lambda: False):
+        """
+        Run every job due now, up to the batch size, checking ``stop()``
+        before each one. Returns how many ran.
+        """
+        ran = 0
+        now = timezone.now()
+        for pk in list(self.due(now)):
+            if stop():
+                break
+            if self.claim(pk, now):
+                self.run(Job.objects.get(pk=pk))
+                ran += 1
+        return ran
+
+    def run(self, job):
+        # job.attempts already counts this attempt; see claim()
+        if job.attempts > job.max_attempts:
+            # The earlier attempts never finished: their worker died mid-job
+            job.status = 'failed'
+            job.last_error = job.last_error or "Worker stopped before the job finished."
+            job.locked_by = ''
+            job.locked_at = None
+            job.save(update_fields=['status', 'last_error', 'locked_by', 'locked_at', 'updated_at'])
+            logger.error("Job %s (%s) failed: its worker stopped during %s attempts", job.pk, job.name, job.max_attempts)
+            return
+        try:
+            handler = handlers[job.name]
+            handler(job.payload)
+        except Exception as exc:
+            job.last_error = ''.join(traceback.format_exception(exc))[-4000:]
+            if job.attempts >= job.max_attempts:
+                job.status = 'failed'
+                logger.error("Job %s (%s) failed after %s attempts: %s", job.pk, job.name, job.attempts, exc)
+            else:
+                job.status = 'queued'
+                job.run_at = timezone.now() + timedelta(seconds=backoff(job.attempts, self.retry_base, self.retry_max))
+                logger.warning("Job %s (%s) attempt %s failed, retrying at %s: %s",
+                               job.pk, job.name, job.attempts, job.run_at, exc)
+        else:
+            job.status = 'done'
+            job.last_error = ''
+        job.locked_by = ''
+        job.locked_at = None
+        job.save(update_fields=['status', 'attempts', 'run_at', 'last_error', 'locked_by', 'locked_at', 'updated_at'])
+
+    def run_forever(self, poll_interval=None, stop=lambda: False):
+        poll_interval = poll_interval if poll_interval is not None else job_settings()['POLL_INTERVAL']
+        while not stop():
+            close_old_connections()
+            if not self.run_once(stop=stop) and not stop():
+                time.sleep(poll_interval)
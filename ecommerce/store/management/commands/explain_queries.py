@@ -0,0 +1,81 @@
+import re
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from store.analytics import sales_rollups
+from store.models import CartItem, IdempotencyRecord, Order, Product, User
+
+
+# Patterns marking a full table scan in EXPLAIN output, per backend
+FULL_SCAN_PATTERNS = {
+    'sqlite': re.compile(r'\bSCAN (\w+)$'),
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+}
+
+
+def view_querysets(user_id, object_id):
+    """The lookups each store view runs, keyed by ``route method``."""
+    orders = Order.objects.filter(user_id=user_id)
+    cart_items = CartItem.objects.filter(order__user_id=user_id)
+    today = timezone.localdate()
+    querysets = {
+        'user-list-create GET': User.objects.order_by('id')[:101],
+        'user-detail GET': User.objects.filter(id=object_id),
+        'login POST': User.objects.filter(email=f'{object_id}@example.com'),
+        'logout POST': User.objects.filter(pk=user_id),
+        'token version lookup': User.objects.filter(pk=user_id).values_list('token_version', flat=True),
+        'idempotency key lookup': IdempotencyRecord.objects.filter(key=object_id.hex),
+        'purge_idempotency_keys': IdempotencyRecord.objects.filter(expires_at__lte=timezone.now()),
+        'order-list-create GET': orders.order_by('-created_at').with_totals(),
+        'order-list-create GET ?expand=cart_items': CartItem.objects.filter(order__in=[object_id]),
+        'order-list-create DELETE': orders,
+        'order-detail GET': Order.objects.with_totals().filter(id=object_id, user_id=user_id),
+        'order-detail PUT/DELETE': Order.objects.filter(id=object_id, user_id=user_id),
+        'checkout PUT': Order.objects.filter(id=object_id, user_id=user_id, status='Pending'),
+        'pending order lookup': Order.objects.filter(user_id=user_id, status='Pending'),
+        'cart-item-list GET/DELETE': cart_items,
+        'cart-item-detail GET/PUT/DELETE': CartItem.objects.filter(id=object_id, order__user_id=user_id),
+        'product-list GET': Product.objects.order_by('sku')[:101],
+        'product-list GET ?q=': Product.objects.filter(pk__in=[object_id]),
+        'carts containing a product': CartItem.objects.filter(product_id=object_id),
+    }
+    # Without dates the report reads every rollup row, as intended: the
+    # rollups are the small, pre-aggregated form of the sales.
+    for group in ('day', 'product', 'day,product'):
+        querysets[f'sales-analytics GET ?group={group}, one day'] = sales_rollups(today, today, group)
+    return querysets
+
+
+def full_scans(plan, vendor=None):
+    """Return the tables an EXPLAIN plan reads with a full table scan."""
+    pattern = FULL_SCAN_PATTERNS[vendor or connection.vendor]
+    return [match.group(1) for line in plan.splitlines() if (match := pattern.search(line.strip()))]
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN the query behind every store view and fail if any of them scans a whole table."
+
+    def handle(self, *args, **options):
+        if connection.vendor not in FULL_SCAN_PATTERNS:
+            raise CommandError(f"EXPLAIN checks are not implemented for {connection.vendor}.")
+
+        if connection.vendor == 'postgresql':
+            # Small tables make sequential scans look cheapest; only a missing
+            # index should be able to force one.
+            with connection.cursor() as cursor:
+                cursor.execute('SET enable_seqscan = off')
+
+        offenders = []
+        for label, queryset in view_querysets(uuid.uuid4(), uuid.uuid4()).items():
+            plan = queryset.explain()
+            scanned = full_scans(plan)
+            self.stdout.write(f"{label}\n{plan}\n")
+            if scanned:
+                offenders.append(f"{label}: {', '.join(scanned)}")
+
+        if offenders:
+            raise CommandError("Full table scans found:\n" + "\n".join(offenders))
+        self.stdout.write(self.style.SUCCESS("Every view query uses an index."))
@@ -0,0 +1,59 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from store.user_io import FORMATS, IMPORT_BATCH_SIZE, detect_format, import_users, read_rows
+
+
+class Command(BaseCommand):
+    help = "Create users in bulk from a CSV or NDJSON file, streamed in fixed-size batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to read, or - for standard input.")
+        parser.add_argument('--format', choices=FORMATS, help="Defaults to the file extension.")
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE,
+                            help="Rows inserted per transaction.")
+        parser.add_argument('--on-conflict', choices=('ignore', 'update'), default='ignore',
+                            help="Skip users whose email exists, or update their name, address, phone and any given password.")
+        parser.add_argument('--progress-every', type=int, default=100000,
+                            help="Report progress on stderr every this many rows; 0 to disable.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or (None if path == '-' else detect_format(path))
+        if fmt is None:
+            raise CommandError("Cannot tell the format from the file name; pass --format.")
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        start = time.monotonic()
+        every = options['progress_every']
+        reported = [0]
+
+        def progress(counts):
+            if every and counts['rows'] - reported[0] >= every:
+                reported[0] = counts['rows']
+                rate = counts['rows'] / (time.monotonic() - start)
+                self.stderr.write(f"{counts['rows']} rows read, {counts['created']} created ({rate:.0f} rows/s)")
+
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8-sig')
+        try:
+            counts, errors = import_users(
+                read_rows(stream, fmt), on_conflict=options['on_conflict'],
+                batch_size=options['batch_size'], progress=progress,
+            )
+        except (OSError, ValueError) as exc:
+            raise CommandError(exc)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        for number, message in errors:
+            self.stderr.write(f"Line {number}: {message}")
+        elapsed = time.monotonic() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Read {counts['rows']} row(s) in {elapsed:.1f}s: {counts['created']} created, "
+            f"{counts['updated']} updated, {counts['skipped']} skipped, "
+            f"{counts['duplicate']} duplicate, {counts['invalid']} invalid."
+        ))
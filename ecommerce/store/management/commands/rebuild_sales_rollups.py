@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from store.analytics import REBUILD_CHUNK_SIZE, rebuild_sales_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute the daily product sales rollups from the orders and cart items."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=REBUILD_CHUNK_SIZE,
+                            help="Grouped rows fetched and inserted per batch.")
+
+    def handle(self, *args, **options):
+        rows = rebuild_sales_rollups(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} daily product sales row(s)."))
@@ -0,0 +1,39 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from store.jobs import Worker
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (see store.jobs) until stopped, or once with --once."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Run the jobs due now, then exit.")
+        parser.add_argument('--poll-interval', type=float, help="Seconds to sleep when no job is due.")
+        parser.add_argument('--batch-size', type=int, help="Jobs claimed per poll.")
+        parser.add_argument('--worker-id', help="Name recorded on claimed jobs; defaults to host:pid.")
+
+    def handle(self, *args, **options):
+        worker = Worker(worker_id=options['worker_id'], batch_size=options['batch_size'])
+        if options['once']:
+            ran = 0
+            while True:
+                batch = worker.run_once()
+                if not batch:
+                    break
+                ran += batch
+            self.stdout.write(f"Ran {ran} job(s).")
+            return
+
+        stopping = []
+
+        def stop(signum, frame):
+            stopping.append(signum)
+
+        # Finish the job in hand on SIGTERM/SIGINT rather than dying mid-job
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        self.stdout.write(f"Worker {worker.worker_id} started.")
+        worker.run_forever(poll_interval=options['poll_interval'], stop=lambda: bool(stopping))
+        self.stdout.write(f"Worker {worker.worker_id} stopped.")
@@ -0,0 +1,94 @@
+import threading
+from bisect import bisect_left
+
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is a bisect and an increment under a lock."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+
+class MetricsRegistry:
+    """In-process histograms, keyed by metric name and label values."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name, buckets, help_text=''):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = (buckets, help_text, {})
+            return name
+
+    def observe(self, name, labels, value):
+        buckets, _, series = self._metrics[name]
+        histogram = series.get(labels)
+        if histogram is None:
+            with self._lock:
+                histogram = series.setdefault(labels, Histogram(buckets))
+        histogram.observe(value)
+
+    def get(self, name, labels):
+        return self._metrics[name][2].get(labels)
+
+    def clear(self):
+        with self._lock:
+            for _, _, series in self._metrics.values():
+                series.clear()
+
+    def render(self):
+        """Prometheus text exposition of every histogram."""
+        lines = []
+        with self._lock:
+            metrics = [(name, buckets, help_text, list(series.items()))
+                       for name, (buckets, help_text, series) in self._metrics.items()]
+        for name, buckets, help_text, series in metrics:
+            if help_text:
+                lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} histogram')
+            for labels, histogram in sorted(series):
+                counts, total, count = histogram.snapshot()
+                label_text = ','.join(f'{key}="{value}"' for key, value in labels)
+                prefix = f'{label_text},' if label_text else ''
+                cumulative = 0
+                for bound, bucket_count in zip(buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {count}')
+                lines.append(f'{name}_sum{{{label_text}}} {total}')
+                lines.append(f'{name}_count{{{label_text}}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+REQUEST_DURATION = registry.histogram(
+    'store_request_duration_seconds', LATENCY_BUCKETS, 'Time spent in the view, including SQL and rendering.')
+SQL_QUERIES = registry.histogram(
+    'store_request_sql_queries', QUERY_COUNT_BUCKETS, 'SQL statements executed per request.')
+SQL_DURATION = registry.histogram(
+    'store_request_sql_duration_seconds', LATENCY_BUCKETS, 'Time spent executing SQL per request.')
+SERIALIZE_DURATION = registry.histogram(
+    'store_request_serialize_duration_seconds', LATENCY_BUCKETS,
+    'Time spent turning results into response data and rendering it.')
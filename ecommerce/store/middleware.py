@@ -0,0 +1,158 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .metrics import registry, REQUEST_DURATION, SQL_QUERIES, SQL_DURATION, SERIALIZE_DURATION
+
+
+# The timings of the request being handled. Context variables follow a
+# request into sync_to_async() threads, where the ORM's connection is not the
+# one the middleware sees, so SQL is timed by a wrapper on every connection.
+request_timings = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """Per-request counters, called by record_sql for each statement."""
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.serialize_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += perf_counter() - start
+            self.sql_count += 1
+
+
+def record_sql(execute, sql, params, many, context):
+    timings = request_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    return timings(execute, sql, params, many, context)
+
+
+@contextmanager
+def timed_serialization():
+    """Count the enclosed block as the current request's serialization time."""
+    timings = request_timings.get()
+    if timings is None:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        timings.serialize_time += perf_counter() - start
+
+
+@receiver(connection_created)
+def install_sql_timing(sender, connection, **kwargs):
+    if record_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_sql)
+
+
+class PerformanceMiddleware:
+    """
+    Times every request and records, for each store view class and HTTP
+    method, the total time, SQL statement count, SQL time and serialization
+    time: building the response data and rendering it.
+    The numbers go into the histograms in store.metrics and into a
+    Server-Timing header on the response. Serialization is whatever runs
+    under timed_serialization(): the store's serializers and JSON renderers.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        timings = RequestTimings()
+        start = perf_counter()
+        token = request_timings.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_timings.reset(token)
+        return self.finish(request, response, timings, perf_counter() - start)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        start = perf_counter()
+        token = request_timings.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            request_timings.reset(token)
+        return self.finish(request, response, timings, perf_counter() - start)
+
+    def finish(self, request, response, timings, total):
+        view = self.view_name(request)
+        if view is not None:
+            labels = (('view', view), ('method', request.method))
+            registry.observe(REQUEST_DURATION, labels, total)
+            registry.observe(SQL_QUERIES, labels, timings.sql_count)
+            registry.observe(SQL_DURATION, labels, timings.sql_time)
+            registry.observe(SERIALIZE_DURATION, labels, timings.serialize_time)
+
+        response['Server-Timing'] = (
+            f'app;dur={total * 1000:.3f}, '
+            f'db;dur={timings.sql_time * 1000:.3f};desc="{timings.sql_count} queries", '
+            f'serialize;dur={timings.serialize_time * 1000:.3f}'
+        )
+        return response
+
+    @staticmethod
+    def view_name(request):
+        # Read from the resolved URL rather than a process_view() hook, which
+        # under ASGI would cost a thread switch per request.
+        match = getattr(request, 'resolver_match', None)
+        view_class = getattr(match.func, 'view_class', None) if match is not None else None
+        if view_class is not None and view_class.__module__.startswith('store.'):
+            return view_class.__name__
+        return None
+
+
+class RateLimitMiddleware:
+    """
+    Adds RateLimit-* headers (and Retry-After when refused) to responses
+    from views throttled by store.throttling.BucketThrottle.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.add_headers(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.add_headers(request, await self.get_response(request))
+
+    def add_headers(self, request, response):
+        decision = getattr(request, 'rate_limit', None)
+        if decision is not None:
+            for header, value in decision.headers().items():
+                response[header] = value
+        return response
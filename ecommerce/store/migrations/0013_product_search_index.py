@@ -0,0 +1,59 @@
+from django.db import migrations
+from django.db.utils import OperationalError
+
+
+# A standalone FTS5 table kept in step with store_product by triggers, so
+# bulk inserts and QuerySet.update() are indexed too. It is not an
+# external-content table because store_product has no stable integer rowid.
+FTS_SQL = [
+    "CREATE VIRTUAL TABLE store_product_fts USING fts5("
+    "product_id UNINDEXED, sku, name, tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER store_product_fts_ai AFTER INSERT ON store_product BEGIN "
+    "INSERT INTO store_product_fts(product_id, sku, name) VALUES (new.id, new.sku, new.name); END",
+    "CREATE TRIGGER store_product_fts_au AFTER UPDATE OF id, sku, name ON store_product BEGIN "
+    "UPDATE store_product_fts SET product_id = new.id, sku = new.sku, name = new.name "
+    "WHERE product_id = old.id; END",
+    "CREATE TRIGGER store_product_fts_ad AFTER DELETE ON store_product BEGIN "
+    "DELETE FROM store_product_fts WHERE product_id = old.id; END",
+    "INSERT INTO store_product_fts(product_id, sku, name) SELECT id, sku, name FROM store_product",
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS store_product_fts_ai",
+    "DROP TRIGGER IF EXISTS store_product_fts_au",
+    "DROP TRIGGER IF EXISTS store_product_fts_ad",
+    "DROP TABLE IF EXISTS store_product_fts",
+]
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        try:
+            cursor.execute("CREATE VIRTUAL TABLE temp.store_fts5_probe USING fts5(x)")
+            cursor.execute("DROP TABLE temp.store_fts5_probe")
+        except OperationalError:
+            # SQLite built without FTS5; store.search falls back to LIKE
+            return
+        for statement in FTS_SQL:
+            cursor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for statement in DROP_SQL:
+            cursor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0012_product'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,54 @@
+import hashlib
+
+from django.db import migrations
+from django.db.models import Max, OuterRef, Subquery
+
+
+BATCH_SIZE = 500
+
+
+def legacy_sku(name):
+    return 'LEGACY-' + hashlib.sha1(name.encode()).hexdigest()[:12].upper()
+
+
+def backfill_products(apps, schema_editor):
+    """
+    Create one product per distinct CartItem.product_name and link the
+    items to it, BATCH_SIZE names at a time. A product takes the highest
+    price its name was sold at and starts with no stock.
+    """
+    Product = apps.get_model('store', 'Product')
+    CartItem = apps.get_model('store', 'CartItem')
+    names = (
+        CartItem.objects.filter(product__isnull=True)
+        .values('product_name').annotate(price=Max('price')).order_by('product_name')
+    )
+    last = None
+    while True:
+        page = names if last is None else names.filter(product_name__gt=last)
+        batch = list(page[:BATCH_SIZE])
+        if not batch:
+            return
+        Product.objects.bulk_create(
+            [Product(sku=legacy_sku(row['product_name']), name=row['product_name'], price=row['price'])
+             for row in batch],
+            ignore_conflicts=True,
+        )
+        batch_names = [row['product_name'] for row in batch]
+        CartItem.objects.filter(product__isnull=True, product_name__in=batch_names).update(
+            product=Subquery(
+                Product.objects.filter(name=OuterRef('product_name'), sku__startswith='LEGACY-').values('pk')[:1]
+            )
+        )
+        last = batch_names[-1]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0013_product_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_products, migrations.RunPython.noop),
+    ]
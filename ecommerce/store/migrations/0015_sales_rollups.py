@@ -0,0 +1,41 @@
+# Generated by Django 5.1.3 on 2026-10-18 17:44
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0014_backfill_products'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='processed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='sales_recorded',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='DailyProductSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('product_key', models.CharField(max_length=64)),
+                ('product_name', models.CharField(max_length=255)),
+                ('units', models.PositiveBigIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=14)),
+                ('product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='daily_sales', to='store.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product_key', 'day'], name='sales_product_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'product_key'), name='unique_daily_product_sales')],
+            },
+        ),
+    ]
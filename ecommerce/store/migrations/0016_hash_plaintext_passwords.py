@@ -0,0 +1,50 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.db import migrations
+
+
+BATCH_SIZE = 500
+WORKERS = 4
+
+
+def is_hashed(password):
+    try:
+        identify_hasher(password)
+    except ValueError:
+        return False
+    return True
+
+
+def hash_plaintext_passwords(apps, schema_editor):
+    """
+    Replace passwords stored as plain text with hashes, BATCH_SIZE users
+    at a time, hashing each batch on a thread pool. Empty passwords become
+    NULL.
+    """
+    User = apps.get_model('store', 'User')
+    users = User.objects.exclude(password__isnull=True).order_by('pk').only('pk', 'password')
+    last = None
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        while True:
+            page = users if last is None else users.filter(pk__gt=last)
+            batch = list(page[:BATCH_SIZE])
+            if not batch:
+                return
+            plaintext = [user for user in batch if not is_hashed(user.password)]
+            hashes = pool.map(lambda raw: make_password(raw) if raw else None, [u.password for u in plaintext])
+            for user, hashed in zip(plaintext, hashes):
+                user.password = hashed
+            User.objects.bulk_update(plaintext, ['password'])
+            last = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0015_sales_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(hash_plaintext_passwords, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.3 on 2026-10-18 19:35
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0018_user_is_staff'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='cartitem',
+            name='cartitem_order_id_idx',
+        ),
+    ]
@@ -1,6 +1,11 @@
 import uuid
-from django.db import models
-from django.db.models import Q
+from decimal import Decimal
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, models, router, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
 
 class User(models.Model):
@@ -10,19 +15,55 @@ class User(models.Model):
     address = models.CharField(max_length=255, null=True, blank=True)
     phone = models.CharField(max_length=20, null=True, blank=True)
     password = models.CharField(max_length=128, null=True, blank=True)
+    # Bumped to revoke every bearer token issued so far; see store.tokens
+    token_version = models.PositiveIntegerField(default=0)
+    # May read store-wide data such as the sales analytics
+    is_staff = models.BooleanField(default=False)
     
-    @property
-    def is_authenticated(self):
-        # You can customize this as needed, but generally returns True if the user exists.
-        return True
+    # You can customize this as needed, but generally True if the user exists.
+    is_authenticated = True
 
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
 
+    def set_password(self, raw_password):
+        # Stores a hash made with settings.PASSWORD_HASHERS; see store.passwords
+        self.password = make_password(raw_password) if raw_password else None
+
+    def check_password(self, raw_password):
+        return bool(self.password) and check_password(raw_password, self.password)
+
     def __str__(self):
         return self.name
 
 
+class PendingOrderExists(IntegrityError, ValueError):
+    """
+    Raised when a save would give a user a second pending order. It is an
+    IntegrityError so get_or_create() can recover from the race, and a
+    ValueError so callers can report it as bad input.
+    """
+
+
+class OrderQuerySet(models.QuerySet):
+    def pending_for(self, user):
+        return self.get_or_create(user=user, status='Pending')[0]
+
+    def with_totals(self):
+        # Totals are correlated subqueries on the cart item order index, in
+        # the same query as the orders. Unlike a GROUP BY over a join, that
+        # leaves an index free to serve the query's ORDER BY.
+        items = CartItem.objects.filter(order=OuterRef('pk')).order_by().values('order')
+        return self.annotate(
+            item_count=Coalesce(Subquery(items.annotate(count=Count('pk')).values('count')), Value(0)),
+            total_amount=Coalesce(
+                Subquery(items.annotate(total=Sum(F('quantity') * F('price'))).values('total')),
+                Value(Decimal('0')),
+                output_field=models.DecimalField(max_digits=12, decimal_places=2),
+            ),
+        )
+
+
 class Order(models.Model):
     STATUS_CHOICES = [
         ('Pending', 'Pending'),
@@ -34,6 +75,14 @@ class Order(models.Model):
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='Pending')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    # Set once this order's items are counted in DailyProductSales
+    sales_recorded = models.BooleanField(default=False)
+
+    objects = OrderQuerySet.as_manager()
+
+    # The status as loaded, so signals can tell a transition (see store.signals)
+    _loaded_status = None
 
     class Meta:
         constraints = [
@@ -43,22 +92,148 @@ class Order(models.Model):
                 name='unique_pending_order_per_user'
             )
         ]
+        indexes = [
+            models.Index(fields=['user', 'status'], name='order_user_status_idx'),
+            models.Index(fields=['user', 'created_at'], name='order_user_created_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
 
     def save(self, *args, **kwargs):
-        if self.status == 'Pending' and Order.objects.filter(user=self.user, status='Pending').exists():
-            raise ValueError("A user can only have one pending order.")
-        super().save(*args, **kwargs)
+        if self.status == 'Processed' and (self.processed_at is None or self._loaded_status not in (None, 'Processed')):
+            # Stamped as CheckoutView does, so the sales rollups have a day
+            self.processed_at = timezone.now()
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'processed_at'}
+        if self.status != 'Pending':
+            return super().save(*args, **kwargs)
+
+        # unique_pending_order_per_user does the checking; the savepoint keeps
+        # an enclosing transaction usable when the constraint fires.
+        using = kwargs.get('using') or router.db_for_write(Order, instance=self)
+        try:
+            with transaction.atomic(using=using):
+                super().save(*args, **kwargs)
+        except IntegrityError as exc:
+            message = str(exc)
+            if 'unique_pending_order_per_user' in message or f'{self._meta.db_table}.user_id' in message:
+                raise PendingOrderExists("A user can only have one pending order.") from exc
+            raise
 
     def __str__(self):
         return f"Order {self.id} - {self.status}"
 
 
+class Product(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    sku = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=255, db_index=True)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    stock = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.sku})"
+
+
 class CartItem(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     order = models.ForeignKey(Order, related_name='cart_items', on_delete=models.CASCADE, null=True, blank=True)
+    # product_name and price are kept as the values at the time of adding,
+    # so later catalog edits do not rewrite existing carts.
+    product = models.ForeignKey(Product, related_name='cart_items', on_delete=models.SET_NULL, null=True, blank=True)
     product_name = models.CharField(max_length=255)
     quantity = models.PositiveIntegerField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The order as loaded, so a save that moves the item can also
+        # invalidate the cart it left (see store.signals)
+        instance._loaded_order_id = instance.__dict__.get('order_id')
+        return instance
 
     def __str__(self):
         return f"{self.product_name} (x{self.quantity})"
+
+
+class DailyProductSales(models.Model):
+    """
+    Units sold and revenue per product per day, maintained by store.analytics
+    as orders are processed. ``product_key`` identifies the product even
+    for cart items with no catalog product, which are grouped by name.
+    """
+    day = models.DateField()
+    product_key = models.CharField(max_length=64)
+    product = models.ForeignKey(Product, related_name='daily_sales', on_delete=models.SET_NULL, null=True, blank=True)
+    product_name = models.CharField(max_length=255)
+    units = models.PositiveBigIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0'))
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'product_key'], name='unique_daily_product_sales'),
+        ]
+        indexes = [
+            models.Index(fields=['product_key', 'day'], name='sales_product_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.product_name}: {self.units} for {self.revenue}"
+
+
+class Job(models.Model):
+    """
+    A unit of background work, run by ``manage.py run_jobs``. See store.jobs.
+    An idempotency key, when set, keeps the same work from being queued twice.
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    idempotency_key = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"Job {self.pk} {self.name} - {self.status}"
+
+
+class IdempotencyRecord(models.Model):
+    """
+    The stored outcome of a request sent with an Idempotency-Key header; see
+    store.idempotency. ``key`` hashes the user, method, path and header
+    value. ``status_code`` stays null while the first request is running.
+    """
+    key = models.CharField(max_length=64, primary_key=True)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"Idempotency key {self.key} - {self.status_code or 'in progress'}"
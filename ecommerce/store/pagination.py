@@ -0,0 +1,16 @@
+from rest_framework.pagination import CursorPagination
+
+
+class UserCursorPagination(CursorPagination):
+    """
+    Keyset pagination over the user primary key, so each page is an indexed
+    range scan no matter how deep the client has paged.
+    """
+    ordering = 'id'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+class ProductCursorPagination(UserCursorPagination):
+    ordering = 'sku'
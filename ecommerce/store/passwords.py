@@ -0,0 +1,114 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, get_hasher, identify_hasher, make_password
+from django.core.signals import setting_changed
+from django.db import connection
+from django.dispatch import receiver
+
+from .models import User
+
+
+logger = logging.getLogger(__name__)
+
+PASSWORD_DEFAULTS = {
+    'ITERATIONS': None,
+    'WORKERS': 4,
+}
+
+
+def password_settings():
+    return {**PASSWORD_DEFAULTS, **getattr(settings, 'STORE_PASSWORDS', {})}
+
+
+class StorePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    Django's PBKDF2-SHA256 hasher with the work factor taken from
+    STORE_PASSWORDS['ITERATIONS'] (Django's own default when unset). It
+    keeps the ``pbkdf2_sha256`` algorithm name, so existing hashes verify,
+    and a hash made with any other count is upgraded on the next login.
+    """
+
+    @property
+    def iterations(self):
+        return password_settings()['ITERATIONS'] or PBKDF2PasswordHasher.iterations
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def executor():
+    """The thread pool that bulk hashing and login rehashes run on."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=password_settings()['WORKERS'], thread_name_prefix='store-passwords',
+            )
+        return _executor
+
+
+@receiver(setting_changed)
+def reset_executor(setting, **kwargs):
+    global _executor
+    if setting == 'STORE_PASSWORDS':
+        with _executor_lock:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            _executor = None
+
+
+def hash_password(raw_password):
+    """The stored form of ``raw_password``; None for no password."""
+    return make_password(raw_password) if raw_password else None
+
+
+def hash_passwords(raw_passwords):
+    """
+    ``hash_password()`` over a list, spread across the pool. The PBKDF2
+    loop runs in OpenSSL with the GIL released, so the hashes are computed
+    in parallel and other threads keep running meanwhile.
+    """
+    return list(executor().map(hash_password, raw_passwords))
+
+
+def _rehash(user_id, raw_password, old_hash):
+    try:
+        # Conditional, so a password changed in the meantime is not overwritten
+        User.objects.filter(pk=user_id, password=old_hash).update(password=make_password(raw_password))
+    except Exception:
+        logger.exception("Rehashing the password of user %s failed", user_id)
+    finally:
+        connection.close()
+
+
+def needs_rehash(encoded):
+    hasher = identify_hasher(encoded)
+    return hasher.algorithm != get_hasher().algorithm or hasher.must_update(encoded)
+
+
+def verify_password(user, raw_password):
+    """
+    Whether ``raw_password`` is ``user``'s password. A correct password
+    stored with an outdated hasher or work factor is rehashed on the pool,
+    so the caller does not wait for the second hash.
+    """
+    encoded = user.password
+    if not raw_password or not user.check_password(raw_password):
+        return False
+    if needs_rehash(encoded):
+        executor().submit(_rehash, user.pk, raw_password, encoded)
+    return True
+
+
+def authenticate(email, raw_password):
+    """The user with ``email`` if ``raw_password`` is theirs, else None. One query."""
+    user = User.objects.filter(email=email).first()
+    if user is None:
+        # Hash anyway, so unknown emails take as long as wrong passwords
+        make_password(raw_password)
+        return None
+    return user if verify_password(user, raw_password) else None
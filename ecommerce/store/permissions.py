@@ -0,0 +1,9 @@
+from rest_framework.permissions import BasePermission
+
+
+class IsStaff(BasePermission):
+    """Allows authenticated users with ``User.is_staff`` set."""
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(user and user.is_authenticated and getattr(user, 'is_staff', False))
@@ -0,0 +1,116 @@
+from collections import Counter
+
+from django.db import connections, router, transaction
+
+from django.utils import timezone
+
+from .analytics import rebuild_sales_days
+from .cart_cache import cart_cache
+from .models import Order, CartItem
+
+
+PURGE_CHUNK_SIZE = 500
+
+
+def _purgeable():
+    """
+    Whether the only rows hanging off an order are its cart items, and
+    nothing hangs off a cart item. Otherwise the collector has to run.
+    """
+    order_relations = [rel.related_model for rel in Order._meta.related_objects]
+    return order_relations == [CartItem] and not CartItem._meta.related_objects
+
+
+def delete_rows(model, field_name, values, using=None):
+    """
+    Delete the ``model`` rows whose ``field_name`` is one of ``values``, in
+    one DELETE statement and without Django's deletion collector. Unlike
+    ``QuerySet.delete()``, no pre_delete/post_delete signals are sent and
+    no cascades or SET_NULLs run: the caller deletes dependent rows first
+    and does whatever the signal handlers would have done. Returns the
+    number of rows deleted.
+    """
+    if not values:
+        return 0
+    using = using or router.db_for_write(model)
+    connection = connections[using]
+    field = model._meta.get_field(field_name)
+    table = connection.ops.quote_name(model._meta.db_table)
+    column = connection.ops.quote_name(field.column)
+    params = [field.get_db_prep_value(value, connection) for value in values]
+    placeholders = ', '.join(['%s'] * len(params))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE {column} IN ({placeholders})', params)
+        return cursor.rowcount
+
+
+def _order_chunks(orders, chunk_size):
+    """
+    ``(pk, sales day)`` pairs of ``orders`` in chunks, paging by key rather
+    than offset. The sales day, the rollup day an order's items were
+    recorded under, is None for orders not in the rollups.
+    """
+    orders = orders.order_by('pk').values_list('pk', 'sales_recorded', 'processed_at', 'updated_at')
+    last = None
+    while True:
+        page = orders if last is None else orders.filter(pk__gt=last)
+        rows = list(page[:chunk_size])
+        if not rows:
+            return
+        yield [
+            (pk, timezone.localdate(processed_at or updated_at) if sales_recorded else None)
+            for pk, sales_recorded, processed_at, updated_at in rows
+        ]
+        last = rows[-1][0]
+
+
+def _purge(user, delete_orders, chunk_size):
+    orders = Order.objects.filter(user=user)
+    using = router.db_for_write(Order)
+    counts = Counter()
+    sales_days = set()
+    with transaction.atomic(using=using):
+        for rows in _order_chunks(orders, chunk_size):
+            order_ids = [pk for pk, _ in rows]
+            sales_days.update(day for _, day in rows if day is not None)
+            counts[CartItem._meta.label] += delete_rows(CartItem, 'order', order_ids, using)
+            if delete_orders:
+                counts[Order._meta.label] += delete_rows(Order, 'id', order_ids, using)
+        # delete_rows() sends no post_delete signals
+        rebuild_sales_days(sales_days)
+        cart_cache.invalidate_on_commit(user.pk)
+    return sum(counts.values()), dict(counts)
+
+
+def purge_orders(user, chunk_size=PURGE_CHUNK_SIZE):
+    """
+    Delete all of ``user``'s orders and their cart items. Returns the same
+    ``(total, {model label: count})`` as ``QuerySet.delete()``.
+
+    Orders are deleted ``chunk_size`` at a time with ``delete_rows()``: one
+    DELETE for their cart items, then one for the orders, so only order ids
+    are held in memory. That sends no delete signals, which would cost
+    statements per row; what their handlers do is done here instead. The
+    cart cache is invalidated, and the rollup days of recorded orders are
+    rebuilt once at the end with ``rebuild_sales_days()``. If other models
+    come to reference orders or cart items, this falls back to
+    ``QuerySet.delete()``.
+    """
+    if not _purgeable():
+        return Order.objects.filter(user=user).delete()
+    return _purge(user, delete_orders=True, chunk_size=chunk_size)
+
+
+def purge_cart_items(user, chunk_size=PURGE_CHUNK_SIZE):
+    """
+    Delete all of ``user``'s cart items, keeping the orders; see
+    ``purge_orders``.
+
+    Recorded orders stay recorded, but their revenue leaves the rollups.
+    The rollups hold exactly the recorded orders' items, which is what
+    ``rebuild_sales_rollups()`` recomputes. Keeping purged revenue would
+    make the rollups disagree with any later rebuild.
+    """
+    if not _purgeable():
+        return CartItem.objects.filter(order__user=user).delete()
+    return _purge(user, delete_orders=False, chunk_size=chunk_size)
@@ -0,0 +1,32 @@
+"""
+SQL statement budgets for every route in store/urls.py, checked by
+store/test_query_budgets.py.
+
+Each entry is the most statements one request may run, with the user and
+cart caches cold and transaction control (BEGIN, SAVEPOINT, ...) left
+out. The count must also stay the same as the dataset grows. Raising a
+budget is a reviewable change; explain it in the commit.
+"""
+
+QUERY_BUDGETS = {
+    ('user-list-create', 'GET'): 1,
+    ('user-list-create', 'POST'): 2,
+    ('user-detail', 'GET'): 1,
+    ('login', 'POST'): 1,
+    ('logout', 'POST'): 2,
+    ('order-list-create', 'GET'): 3,
+    ('order-list-create', 'POST'): 4,
+    ('order-list-create', 'DELETE'): 5,
+    ('order-detail', 'GET'): 2,
+    ('order-detail', 'PUT'): 3,
+    ('order-detail', 'DELETE'): 6,
+    ('checkout', 'PUT'): 4,
+    ('cart-item-list', 'GET'): 3,
+    ('cart-item-list', 'POST'): 3,
+    ('cart-item-list', 'DELETE'): 4,
+    ('cart-item-detail', 'GET'): 2,
+    ('cart-item-detail', 'PUT'): 4,
+    ('cart-item-detail', 'DELETE'): 4,
+    ('product-list', 'GET'): 1,
+    ('sales-analytics', 'GET'): 2,
+}
@@ -0,0 +1,94 @@
+import re
+import uuid
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connection
+from django.db.models import Q
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from .models import Product
+
+
+class SearchBackend:
+    """Finds products matching a free-text query. Subclasses say how."""
+
+    def search(self, query, limit):
+        """Ids of up to ``limit`` matching products, best match first."""
+        raise NotImplementedError
+
+
+class LikeSearchBackend(SearchBackend):
+    """
+    Case-insensitive substring match on name and exact match on SKU. It
+    works on any database but scans the product table; use it only where
+    no indexed backend is available.
+    """
+
+    def search(self, query, limit):
+        return list(
+            Product.objects.filter(Q(name__icontains=query) | Q(sku__iexact=query))
+            .order_by('name').values_list('pk', flat=True)[:limit]
+        )
+
+
+class SQLiteFTSBackend(SearchBackend):
+    """
+    Searches the FTS5 index created by migration 0013, ranked by bm25.
+    Every word in the query must match, each as a prefix.
+    """
+    table = 'store_product_fts'
+
+    @staticmethod
+    def match_expression(query):
+        # Quoting each word keeps FTS5 syntax in user input from being
+        # interpreted (column filters, NEAR, boolean operators).
+        return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', query))
+
+    def search(self, query, limit):
+        expression = self.match_expression(query)
+        if not expression:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT product_id FROM {self.table} WHERE {self.table} MATCH %s ORDER BY rank LIMIT %s',
+                [expression, limit],
+            )
+            return [uuid.UUID(product_id) for product_id, in cursor.fetchall()]
+
+    @classmethod
+    def available(cls):
+        return connection.vendor == 'sqlite' and cls.table in connection.introspection.table_names()
+
+
+_backend = None
+
+
+def get_backend():
+    """
+    The backend named by STORE_SEARCH_BACKEND (a dotted path), or else FTS5
+    where the index exists and LIKE everywhere else.
+    """
+    global _backend
+    if _backend is None:
+        path = getattr(settings, 'STORE_SEARCH_BACKEND', None)
+        if path:
+            _backend = import_string(path)()
+        elif SQLiteFTSBackend.available():
+            _backend = SQLiteFTSBackend()
+        else:
+            _backend = LikeSearchBackend()
+    return _backend
+
+
+@receiver(setting_changed)
+def reset_backend(setting, **kwargs):
+    global _backend
+    if setting == 'STORE_SEARCH_BACKEND':
+        _backend = None
+
+
+def search_products(query, limit):
+    """Ids of the products matching ``query``, best match first."""
+    return get_backend().search(query, limit)
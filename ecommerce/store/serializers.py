@@ -1,23 +1,111 @@
+from django.db import transaction
 from rest_framework import serializers
-from store.models import User, Order, CartItem
+from store.models import User, Order, CartItem, Product
+from store.cart_cache import cart_cache
+from store.middleware import timed_serialization
+from store.passwords import hash_password
 
-class UserSerializer(serializers.ModelSerializer):
+class TimedDataMixin:
+    """Counts building ``.data`` as the request's serialization time."""
+
+    @property
+    def data(self):
+        with timed_serialization():
+            return super().data
+
+class TimedListSerializer(TimedDataMixin, serializers.ListSerializer):
+    pass
+
+class UserSerializer(TimedDataMixin, serializers.ModelSerializer):
     class Meta:
         model = User
+        exclude = ['token_version']
+        list_serializer_class = TimedListSerializer
+        read_only_fields = ['is_staff']
+        extra_kwargs = {'password': {'write_only': True, 'trim_whitespace': False}}
+
+    def create(self, validated_data):
+        validated_data['password'] = hash_password(validated_data.get('password'))
+        return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        if 'password' in validated_data:
+            validated_data['password'] = hash_password(validated_data['password'])
+            # A new password revokes the tokens issued under the old one
+            validated_data['token_version'] = instance.token_version + 1
+        return super().update(instance, validated_data)
+
+class LoginSerializer(serializers.Serializer):
+    email = serializers.EmailField()
+    password = serializers.CharField(write_only=True, trim_whitespace=False)
+
+class CartItemListSerializer(TimedListSerializer):
+    def create(self, validated_data):
+        request = self.context.get('request')
+        with transaction.atomic():
+            if request and request.user.is_authenticated:
+                # Resolve the pending order once for the whole batch
+                order = Order.objects.pending_for(request.user)
+                for attrs in validated_data:
+                    attrs['order'] = order
+            cart_items = CartItem.objects.bulk_create(CartItem(**attrs) for attrs in validated_data)
+            # bulk_create() sends no post_save signals
+            for user_id in {item.order.user_id for item in cart_items if item.order_id is not None}:
+                cart_cache.invalidate_on_commit(user_id)
+            return cart_items
+
+
+class ProductSerializer(TimedDataMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Product
         fields = '__all__'
+        list_serializer_class = TimedListSerializer
 
-class CartItemSerializer(serializers.ModelSerializer):
+
+class CartItemSerializer(TimedDataMixin, serializers.ModelSerializer):
     class Meta:
         model = CartItem
         fields = '__all__'
+        list_serializer_class = CartItemListSerializer
+        extra_kwargs = {'product_name': {'required': False}, 'price': {'required': False}}
+
+    def validate(self, attrs):
+        # With a product, name and price are the catalog's current values,
+        # whatever the client sent; without one, both must be given.
+        order = attrs.get('order')
+        if order is not None and order.status == 'Processed':
+            raise serializers.ValidationError({'order': ["Items of a processed order cannot be changed."]})
+        product = attrs.get('product')
+        if product is not None:
+            attrs['product_name'] = product.name
+            attrs['price'] = product.price
+        elif self.instance is not None and self.instance.product_id is not None and 'product' not in attrs:
+            # A catalog item keeps the name and price it was added with
+            attrs.pop('product_name', None)
+            attrs.pop('price', None)
+        elif self.instance is None:
+            missing = {field: [serializers.Field.default_error_messages['required']]
+                       for field in ('product_name', 'price') if field not in attrs}
+            if missing:
+                raise serializers.ValidationError(missing)
+        return attrs
 
     def create(self, validated_data):
         request = self.context.get('request')  # Access the request from the serializer context
         if request and request.user.is_authenticated:
-            validated_data['order'] = Order.objects.get_or_create(user=request.user, status="active")[0]  # Get or create order
+            validated_data['order'] = Order.objects.pending_for(request.user)  # Get or create order
         return super().create(validated_data)
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(TimedDataMixin, serializers.ModelSerializer):
+    # Only present when the order comes from Order.objects.with_totals()
+    item_count = serializers.IntegerField(read_only=True)
+    total_amount = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+
     class Meta:
         model = Order
         fields = '__all__'
+        list_serializer_class = TimedListSerializer
+        read_only_fields = ['processed_at', 'sales_recorded']
+
+class OrderWithItemsSerializer(OrderSerializer):
+    cart_items = CartItemSerializer(many=True, read_only=True)
@@ -0,0 +1,85 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .analytics import unrecord_order_sales
+from .cache import user_cache
+from .cart_cache import cart_cache
+from .models import User, Order, CartItem
+from .tasks import enqueue_sales_rollup
+from .tokens import token_versions
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    # QuerySet.update() bypasses signals; callers doing bulk user updates
+    # must invalidate the cache themselves.
+    user_cache.invalidate(instance.pk)
+    token_versions.invalidate_on_commit(instance.pk)
+
+
+def order_owner(order_id):
+    """The user id owning ``order_id``, from the cart cache when it knows."""
+    user_id = cart_cache.owner_of(order_id)
+    if user_id is None:
+        user_id = Order.objects.filter(pk=order_id).values_list('user_id', flat=True).first()
+        if user_id is not None:
+            cart_cache.remember_owner(order_id, user_id)
+    return user_id
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def invalidate_cart_for_order(sender, instance, **kwargs):
+    # An order can be moved to another user, so drop the previous owner's
+    # cart too.
+    previous = cart_cache.owner_of(instance.pk)
+    if previous is not None and previous != instance.user_id:
+        cart_cache.invalidate_on_commit(previous)
+    cart_cache.remember_owner(instance.pk, instance.user_id)
+    cart_cache.invalidate_on_commit(instance.user_id)
+
+
+@receiver(post_save, sender=Order)
+def update_sales_for_order(sender, instance, **kwargs):
+    # CheckoutView moves orders to Processed with an UPDATE and queues the
+    # rollup itself; this covers saves through the order endpoints and the
+    # ORM. QuerySet.update() bypasses it.
+    previous = instance._loaded_status
+    instance._loaded_status = instance.status
+    if instance.status == previous:
+        return
+    if instance.status == 'Processed':
+        enqueue_sales_rollup(instance.pk)
+    elif previous == 'Processed' and instance.sales_recorded:
+        unrecord_order_sales(instance.pk)
+
+
+@receiver(pre_delete, sender=Order)
+def remove_sales_for_order(sender, instance, **kwargs):
+    # While its items still exist; the rollup job may have recorded the
+    # order since it was loaded, so Processed is enough to check.
+    if instance.status == 'Processed' or instance.sales_recorded:
+        unrecord_order_sales(instance.pk)
+
+
+@receiver(post_save, sender=CartItem)
+@receiver(post_delete, sender=CartItem)
+def invalidate_cart_for_item(sender, instance, **kwargs):
+    # bulk_create() and QuerySet.update() bypass signals; callers must
+    # invalidate the cart themselves.
+    # An item moved to another order also leaves the previous owner's cart
+    previous = getattr(instance, '_loaded_order_id', None)
+    if previous is not None and previous != instance.order_id:
+        previous_user_id = order_owner(previous)
+        if previous_user_id is not None:
+            cart_cache.invalidate_on_commit(previous_user_id)
+    instance._loaded_order_id = instance.order_id
+    if instance.order_id is None:
+        return
+    if CartItem.order.is_cached(instance):
+        user_id = instance.order.user_id
+    else:
+        user_id = order_owner(instance.order_id)
+    if user_id is not None:
+        cart_cache.invalidate_on_commit(user_id)
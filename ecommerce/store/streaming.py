@@ -0,0 +1,21 @@
+from django.http import StreamingHttpResponse
+
+from .fastpath import CompiledSerializer, FastJSONEncoder
+
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+
+
+def ndjson_lines(queryset, serializer_class, chunk_size=2000):
+    # Rows come straight from values().iterator(), so at most chunk_size
+    # rows are held in memory and no model instances are built.
+    compiled = CompiledSerializer(serializer_class)
+    encoder = FastJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    for row in compiled.values(queryset).iterator(chunk_size=chunk_size):
+        yield encoder.encode(compiled.convert(row)) + '\n'
+
+
+def stream_ndjson(queryset, serializer_class, chunk_size=2000):
+    return StreamingHttpResponse(
+        ndjson_lines(queryset, serializer_class, chunk_size),
+        content_type=NDJSON_CONTENT_TYPE,
+    )
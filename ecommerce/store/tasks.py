@@ -0,0 +1,40 @@
+import logging
+
+from .analytics import record_order_sales
+from .jobs import enqueue, register
+from .models import Order
+
+
+logger = logging.getLogger(__name__)
+
+# Jobs queued by every successful checkout, each retried on its own
+CHECKOUT_JOBS = ('checkout.receipt', 'checkout.sales_rollup')
+
+
+def enqueue_checkout_jobs(order_id, user_id):
+    """Queue the post-purchase work for an order; call inside the checkout transaction."""
+    payload = {'order_id': str(order_id), 'user_id': str(user_id)}
+    for name in CHECKOUT_JOBS:
+        enqueue(name, payload, key=f'{name}:{order_id}')
+
+
+def enqueue_sales_rollup(order_id):
+    """
+    Queue the rollup of an order processed other than by checkout. Not
+    deduplicated by key, since an order can leave Processed and come back.
+    """
+    enqueue('checkout.sales_rollup', {'order_id': str(order_id)})
+
+
+@register('checkout.receipt')
+def send_receipt(payload):
+    order = Order.objects.with_totals().get(pk=payload['order_id'])
+    logger.info(
+        "Receipt for order %s (user %s): %s item(s), total %s",
+        order.pk, order.user_id, order.item_count, order.total_amount,
+    )
+
+
+@register('checkout.sales_rollup')
+def roll_up_sales(payload):
+    record_order_sales(payload['order_id'])
@@ -0,0 +1,204 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+from store.analytics import rebuild_sales_rollups, record_order_sales, sales_report
+from store.jobs import Worker
+from store.models import User, Order, CartItem, Product, DailyProductSales
+from store.purge import purge_cart_items, purge_orders
+
+DAY_ONE = datetime(2026, 3, 1, 12, tzinfo=dt_timezone.utc)
+DAY_TWO = datetime(2026, 3, 2, 9, tzinfo=dt_timezone.utc)
+
+
+@pytest.fixture
+def user(db):
+    """Fixture for creating a test user."""
+    return User.objects.create(name="Analyst", email="analyst@example.com")
+
+
+@pytest.fixture
+def mug(db):
+    """Fixture for a catalog product."""
+    return Product.objects.create(sku="MUG-1", name="Mug", price="10.00")
+
+
+def processed_order(user, when, lines, recorded=False):
+    """An order processed at ``when`` holding (product, name, quantity, price) lines."""
+    order = Order.objects.create(user=user, status="Processed")
+    Order.objects.filter(pk=order.pk).update(processed_at=when, sales_recorded=recorded)
+    CartItem.objects.bulk_create(
+        CartItem(order=order, product=product, product_name=name, quantity=quantity, price=price)
+        for product, name, quantity, price in lines
+    )
+    return order
+
+
+def totals():
+    return sorted(DailyProductSales.objects.values_list('day', 'product_name', 'units', 'revenue'))
+
+
+@pytest.mark.django_db
+def test_checkout_job_updates_rollups(user, mug):
+    order = Order.objects.create(user=user, status="Pending")
+    CartItem.objects.create(order=order, product=mug, product_name="Mug", quantity=2, price="10.00")
+    CartItem.objects.create(order=order, product=mug, product_name="Mug", quantity=1, price="9.00")
+    CartItem.objects.create(order=order, product_name="Gift Wrap", quantity=1, price="1.50")
+    client = APIClient()
+    client.force_authenticate(user=user)
+    assert client.put(reverse('checkout', args=[order.id])).status_code == 200
+
+    Worker().run_once()
+    order.refresh_from_db()
+    day = order.processed_at.date()
+    assert totals() == [(day, "Gift Wrap", 1, Decimal("1.50")), (day, "Mug", 3, Decimal("29.00"))]
+
+
+@pytest.mark.django_db
+def test_status_changes_outside_checkout_update_rollups(user, mug):
+    order = Order.objects.create(user=user, status="Pending")
+    item = CartItem.objects.create(order=order, product=mug, product_name="Mug", quantity=2, price="10.00")
+    client = APIClient()
+    client.force_authenticate(user=user)
+    url = reverse('order-detail', args=[order.id])
+
+    assert client.put(url, {"status": "Processed"}, format='json').status_code == 200
+    Worker().run_once()
+    order.refresh_from_db()
+    assert totals() == [(order.processed_at.date(), "Mug", 2, Decimal("20.00"))]
+
+    # A processed order's items are closed to edits
+    item_url = reverse('cart-item-detail', args=[item.id])
+    assert client.put(item_url, {"quantity": 5}, format='json').status_code == 409
+    assert client.delete(item_url).status_code == 409
+    response = client.post(reverse('cart-item-list'), {
+        "order": str(order.id), "product": str(mug.id), "quantity": 1,
+    }, format='json')
+    assert response.status_code == 400
+
+    assert client.put(url, {"status": "Pending"}, format='json').status_code == 200
+    assert totals() == []
+    assert client.put(url, {"status": "Processed"}, format='json').status_code == 200
+    Worker().run_once()
+    assert [row[2] for row in totals()] == [2]
+
+    assert client.delete(url).status_code == 200
+    assert totals() == []
+
+
+@pytest.mark.django_db
+def test_purges_take_recorded_sales_out_of_rollups(user, mug):
+    other = User.objects.create(name="Other", email="other-analyst@example.com")
+    record_order_sales(processed_order(other, DAY_ONE, [(mug, "Mug", 2, "10.00")]).pk)
+    for when in (DAY_ONE, DAY_TWO):
+        record_order_sales(processed_order(user, when, [(mug, "Mug", 1, "10.00"), (None, "Sticker", 1, "0.50")]).pk)
+
+    purge_cart_items(user)
+    assert totals() == [(DAY_ONE.date(), "Mug", 2, Decimal("20.00"))]
+    assert Order.objects.filter(user=user, sales_recorded=True).count() == 2
+    assert rebuild_sales_rollups() == 1
+
+    purge_orders(other)
+    assert totals() == []
+
+
+@pytest.mark.django_db
+def test_record_order_sales_counts_each_order_once(user, mug):
+    order = processed_order(user, DAY_ONE, [(mug, "Mug", 1, "10.00")])
+    other = processed_order(user, DAY_ONE, [(mug, "Mug", 4, "10.00")])
+    assert record_order_sales(order.pk) is True
+    assert record_order_sales(order.pk) is False
+    record_order_sales(other.pk)
+    assert totals() == [(DAY_ONE.date(), "Mug", 5, Decimal("50.00"))]
+
+
+@pytest.mark.django_db
+def test_pending_orders_are_not_recorded(user, mug):
+    order = Order.objects.create(user=user, status="Pending")
+    assert record_order_sales(order.pk) is False
+
+
+@pytest.mark.django_db
+def test_rebuild_matches_incremental_rollups(user, mug):
+    orders = [
+        processed_order(user, DAY_ONE, [(mug, "Mug", 1, "10.00"), (None, "Sticker", 3, "0.50")]),
+        processed_order(user, DAY_TWO, [(mug, "Mug", 2, "10.00")]),
+        processed_order(user, DAY_TWO, [(None, "Sticker", 1, "0.50"), (None, "Pen", 1, "2.00")]),
+    ]
+    for order in orders:
+        record_order_sales(order.pk)
+    incremental = totals()
+
+    assert rebuild_sales_rollups(chunk_size=1) == 5
+    assert totals() == incremental
+    assert not Order.objects.filter(status="Processed", sales_recorded=False).exists()
+
+
+@pytest.mark.django_db
+def test_rebuild_includes_legacy_orders_and_keeps_late_ones(user, mug):
+    legacy = processed_order(user, None, [(mug, "Mug", 1, "10.00")])
+    late = processed_order(user, datetime.now(dt_timezone.utc) + timedelta(days=1), [(mug, "Mug", 5, "10.00")])
+    record_order_sales(late.pk)
+
+    call_command('rebuild_sales_rollups', '--chunk-size', '10')
+
+    legacy.refresh_from_db()
+    late.refresh_from_db()
+    units = dict((day, units) for day, _, units, _ in totals())
+    assert units[legacy.updated_at.date()] == 1
+    assert units[late.processed_at.date()] == 5
+    assert legacy.sales_recorded
+
+
+@pytest.mark.django_db
+def test_sales_report_groupings(user, mug):
+    for order in [
+        processed_order(user, DAY_ONE, [(mug, "Mug", 1, "10.00"), (None, "Pen", 2, "2.00")]),
+        processed_order(user, DAY_TWO, [(mug, "Mug", 3, "10.00")]),
+    ]:
+        record_order_sales(order.pk)
+
+    assert sales_report() == [
+        {'day': DAY_ONE.date(), 'units': 3, 'revenue': Decimal("14.00")},
+        {'day': DAY_TWO.date(), 'units': 3, 'revenue': Decimal("30.00")},
+    ]
+    assert sales_report(group='product') == [
+        {'product': mug.pk, 'product_name': "Mug", 'units': 4, 'revenue': Decimal("40.00")},
+        {'product': None, 'product_name': "Pen", 'units': 2, 'revenue': Decimal("4.00")},
+    ]
+    assert sales_report(start=DAY_TWO.date(), group='day,product') == [
+        {'day': DAY_TWO.date(), 'product': mug.pk, 'product_name': "Mug", 'units': 3, 'revenue': Decimal("30.00")},
+    ]
+
+
+@pytest.mark.django_db
+def test_sales_endpoint(user, mug, django_assert_max_num_queries):
+    record_order_sales(processed_order(user, DAY_ONE, [(mug, "Mug", 2, "10.00")]).pk)
+    client = APIClient()
+    client.force_authenticate(user=user)
+    url = reverse('sales-analytics')
+    assert client.get(url).status_code == 403
+
+    user.is_staff = True
+    client.force_authenticate(user=user)
+
+    with django_assert_max_num_queries(1):
+        response = client.get(url, {'start': '2026-03-01', 'end': '2026-03-01', 'group': 'product'})
+    assert response.status_code == 200
+    assert response.json() == {
+        'group': 'product', 'start': '2026-03-01', 'end': '2026-03-01',
+        'results': [{'product': str(mug.pk), 'product_name': 'Mug', 'units': 2, 'revenue': '20.00'}],
+    }
+    assert client.get(url, {'start': 'yesterday'}).status_code == 400
+    assert client.get(url, {'group': 'week'}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_staff_flag_cannot_be_set_through_the_api():
+    response = APIClient().post(reverse('user-list-create'), {
+        "name": "Climber", "email": "climber@example.com", "is_staff": True,
+    }, format='json')
+    assert response.status_code == 201
+    assert User.objects.get(email="climber@example.com").is_staff is False
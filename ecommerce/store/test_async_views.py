@@ -0,0 +1,115 @@
+import json
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncRequestFactory
+from store.async_views import (
+    AsyncUserDetailView, AsyncOrderListView, AsyncOrderDetailView, AsyncCartItemListView, AsyncCartItemDetailView,
+)
+from store.cache import user_cache
+from store.cart_cache import cart_cache
+from store.models import User, Order, CartItem
+
+
+@pytest.fixture
+def factory():
+    return AsyncRequestFactory()
+
+
+@pytest.fixture
+def user(db):
+    """Fixture for creating a test user."""
+    user_cache.clear()
+    cart_cache.clear()
+    return User.objects.create(name="Async User", email="async@example.com")
+
+
+@pytest.fixture
+def cart_item(user):
+    """Fixture for a cart item in the user's pending order."""
+    order = Order.objects.create(user=user, status="Pending")
+    return CartItem.objects.create(order=order, product_name="Async Product", quantity=3, price="2.50")
+
+
+def call(view_class, request, **kwargs):
+    response = async_to_sync(view_class.as_view())(request, **kwargs)
+    if hasattr(response, 'render'):
+        # Delegated DRF responses are rendered by the request handler
+        response.render()
+    return response.status_code, json.loads(response.content)
+
+
+@pytest.mark.django_db
+def test_async_order_list(factory, user, cart_item):
+    request = factory.get('/api/orders/', {'expand': 'cart_items'}, headers={'X-User-ID': str(user.id)})
+    status_code, data = call(AsyncOrderListView, request)
+    assert status_code == 200
+    assert data[0]['id'] == str(cart_item.order_id)
+    assert data[0]['item_count'] == 1
+    assert data[0]['total_amount'] == "7.50"
+    assert data[0]['cart_items'][0]['id'] == str(cart_item.id)
+
+
+@pytest.mark.django_db
+def test_async_order_detail(factory, user, cart_item):
+    request = factory.get('/', headers={'X-User-ID': str(user.id)})
+    status_code, data = call(AsyncOrderDetailView, request, order_id=cart_item.order_id)
+    assert status_code == 200
+    assert data['status'] == "Pending"
+
+    status_code, _ = call(AsyncOrderDetailView, request, order_id=cart_item.id)
+    assert status_code == 404
+
+
+@pytest.mark.django_db
+def test_async_cart_items(factory, user, cart_item):
+    request = factory.get('/', headers={'X-User-ID': str(user.id)})
+    status_code, data = call(AsyncCartItemListView, request)
+    assert status_code == 200
+    assert [row['id'] for row in data] == [str(cart_item.id)]
+
+    status_code, data = call(AsyncCartItemDetailView, request, cart_item_id=cart_item.id)
+    assert status_code == 200
+    assert data['quantity'] == 3
+
+
+@pytest.mark.django_db
+def test_async_list_views_answer_conditional_requests(factory, user, cart_item, django_assert_num_queries):
+    for view_class in (AsyncOrderListView, AsyncCartItemListView):
+        response = async_to_sync(view_class.as_view())(factory.get('/', headers={'X-User-ID': str(user.id)}))
+        assert response.status_code == 200
+        assert response['ETag']
+
+        request = factory.get('/', headers={'X-User-ID': str(user.id), 'If-None-Match': response['ETag']})
+        assert async_to_sync(view_class.as_view())(request).status_code == 304
+
+    # The cart list is answered from the snapshot the first request stored
+    request = factory.get('/', headers={'X-User-ID': str(user.id)})
+    with django_assert_num_queries(0):
+        status_code, data = call(AsyncCartItemListView, request)
+    assert [row['id'] for row in data] == [str(cart_item.id)]
+
+
+@pytest.mark.django_db
+def test_async_user_detail_needs_no_auth(factory, user):
+    status_code, data = call(AsyncUserDetailView, factory.get('/'), user_id=user.id)
+    assert status_code == 200
+    assert data['email'] == user.email
+
+
+@pytest.mark.django_db
+def test_async_view_rejects_unknown_user(factory, user):
+    request = factory.get('/', headers={'X-User-ID': '00000000-0000-0000-0000-000000000000'})
+    status_code, data = call(AsyncOrderListView, request)
+    assert status_code == 403
+    assert data == {"detail": "No such user"}
+
+
+@pytest.mark.django_db
+def test_async_view_delegates_writes_to_drf_view(factory, user):
+    request = factory.post(
+        '/api/orders/', {"user": str(user.id), "status": "Processed"},
+        content_type='application/json', headers={'X-User-ID': str(user.id)},
+    )
+    status_code, data = call(AsyncOrderListView, request)
+    assert status_code == 201
+    assert Order.objects.filter(id=data['id'], user=user).exists()
@@ -0,0 +1,134 @@
+import uuid
+import pytest
+from django.core.cache import caches
+from django.test import override_settings
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIRequestFactory
+from store.authentication import CustomUserIDAuthentication
+from store.cache import LRUCache, UserCache, user_cache
+from store.cart_cache import CartCache
+from store.tokens import TokenVersionCache
+from store.models import User
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def user(db):
+    """Fixture for creating a test user."""
+    return User.objects.create(name="Cached User", email="cached@example.com")
+
+
+@pytest.fixture(autouse=True)
+def clear_user_cache():
+    """Start every test with an empty, zeroed user cache."""
+    user_cache.clear()
+    yield
+    user_cache.clear()
+
+
+def authenticate(user_id):
+    request = APIRequestFactory().get('/', HTTP_X_USER_ID=str(user_id))
+    return CustomUserIDAuthentication().authenticate(request)
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+
+
+def test_lru_expires_entries_after_ttl():
+    clock = FakeClock()
+    cache = LRUCache(max_entries=2, ttl=10, clock=clock)
+    cache.set('a', 1)
+    clock.now = 9.9
+    assert cache.get('a') == 1
+    clock.now = 10
+    assert cache.get('a') is None
+    assert len(cache) == 0
+
+
+@override_settings(
+    STORE_USER_CACHE={'TTL': 5},
+    STORE_CART_CACHE={'SHARED_TTL': 60, 'LOCK_TIMEOUT': 2},
+    STORE_TOKENS={'VERSION_MAX_ENTRIES': 10},
+)
+def test_two_tier_caches_read_their_settings():
+    assert UserCache.from_settings().local.ttl == 5
+    cart = CartCache.from_settings()
+    assert (cart.shared_ttl, cart.lock_timeout, cart.local.ttl) == (60, 2, 60)
+    assert TokenVersionCache.from_settings().local.max_entries == 10
+
+
+def test_read_guard_sees_invalidations_of_its_key():
+    cache = UserCache()
+    key, other = uuid.uuid4(), uuid.uuid4()
+    with cache._read_guard(key) as current:
+        cache.invalidate(other)
+        assert current()
+        cache.invalidate(key)
+        assert not current()
+    assert cache._reads == {}
+
+
+@pytest.mark.django_db
+def test_authenticate_caches_user(user, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        assert authenticate(user.id)[0] == user
+    with django_assert_num_queries(0):
+        assert authenticate(user.id)[0] == user
+    assert user_cache.stats() == {'hits': 1, 'shared_hits': 0, 'misses': 1, 'size': 1}
+
+
+@pytest.mark.django_db
+def test_authenticate_rejects_unknown_and_malformed_ids():
+    with pytest.raises(AuthenticationFailed):
+        authenticate(uuid.uuid4())
+    with pytest.raises(AuthenticationFailed):
+        authenticate('not-a-uuid')
+
+
+@pytest.mark.django_db
+def test_user_save_invalidates_cache(user, django_assert_num_queries):
+    authenticate(user.id)
+    user.name = "Renamed User"
+    user.save()
+    with django_assert_num_queries(1):
+        assert authenticate(user.id)[0].name == "Renamed User"
+
+
+@pytest.mark.django_db
+def test_user_delete_invalidates_cache(user):
+    user_id = user.id
+    authenticate(user_id)
+    user.delete()
+    with pytest.raises(AuthenticationFailed):
+        authenticate(user_id)
+
+
+@pytest.mark.django_db
+def test_shared_tier_serves_other_processes(user, django_assert_num_queries):
+    shared = caches['default']
+    shared.clear()
+    first = UserCache(shared_cache=shared)
+    second = UserCache(shared_cache=shared)
+
+    first.get_user(user.id)
+    with django_assert_num_queries(0):
+        assert second.get_user(user.id) == user
+    assert second.stats()['shared_hits'] == 1
+
+    first.invalidate(user.id)
+    assert shared.get(UserCache.key_prefix + str(user.id)) is None
@@ -0,0 +1,180 @@
+import threading
+import time
+import uuid
+from unittest import mock
+import pytest
+from django.core.cache import caches
+from django.urls import reverse
+from rest_framework.test import APIClient
+from store.cart_cache import CartCache, cart_cache
+from store.models import User, Order, CartItem
+
+
+@pytest.fixture
+def user(db):
+    """Fixture for creating a test user."""
+    return User.objects.create(name="Cart User", email="cart@example.com")
+
+
+@pytest.fixture
+def client(user):
+    """Returns an API client authenticated as the test user."""
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.fixture
+def cart_item(user):
+    """Fixture for a cart item in the user's pending order."""
+    order = Order.objects.create(user=user, status="Pending")
+    return CartItem.objects.create(order=order, product_name="Cached Product", quantity=1, price="3.50")
+
+
+@pytest.fixture(autouse=True)
+def clear_cart_cache():
+    """Start every test with an empty, zeroed cart cache."""
+    cart_cache.clear()
+    yield
+    cart_cache.clear()
+
+
+def test_concurrent_misses_build_once():
+    cache = CartCache()
+    user_id = uuid.uuid4()
+    builds = []
+
+    def build():
+        builds.append(1)
+        time.sleep(0.05)
+        return {'rows': [1]}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get(user_id, build))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(builds) == 1
+    assert results == [{'rows': [1]}] * 8
+    assert cache.stats() == {'hits': 7, 'shared_hits': 0, 'misses': 1, 'size': 1}
+
+
+def test_build_overlapping_invalidation_is_not_stored():
+    cache = CartCache()
+    user_id = uuid.uuid4()
+
+    def build():
+        cache.invalidate(user_id)
+        return {'rows': ['stale']}
+
+    assert cache.get(user_id, build) == {'rows': ['stale']}
+    assert cache.get(user_id, lambda: {'rows': ['fresh']}) == {'rows': ['fresh']}
+    assert cache.get(user_id, lambda: {'rows': ['unused']}) == {'rows': ['fresh']}
+
+
+def test_shared_tier_serves_and_guards_other_processes():
+    shared = caches['default']
+    shared.clear()
+    first = CartCache(shared_cache=shared)
+    second = CartCache(shared_cache=shared, lock_timeout=1)
+    user_id = uuid.uuid4()
+
+    first.get(user_id, lambda: {'rows': [1]})
+    assert second.get(user_id, lambda: {'rows': [2]}) == {'rows': [1]}
+    assert second.stats()['shared_hits'] == 1
+
+    # An invalidation in one process reaches the other's local tier
+    first.invalidate(user_id)
+    assert second.get(user_id, lambda: {'rows': [2]}) == {'rows': [2]}
+    assert first.get(user_id, lambda: {'rows': [5]}) == {'rows': [2]}
+
+    # A build in progress elsewhere: wait for its result instead of building
+    first.invalidate(user_id)
+    cache_key = CartCache.key_prefix + str(user_id)
+    lock_key = cache_key + ':lock'
+    shared.add(lock_key, 1)
+
+    def finish_build():
+        shared.set(cache_key, (shared.get(cache_key + ':gen'), {'rows': [3]}))
+
+    threading.Timer(0.05, finish_build).start()
+    assert second.get(user_id, lambda: {'rows': [4]}) == {'rows': [3]}
+    shared.delete(lock_key)
+
+
+def test_generation_tokens_expire():
+    shared = caches['default']
+    shared.clear()
+    cache = CartCache(shared_cache=shared, shared_ttl=30)
+    user_id = uuid.uuid4()
+    generation_key = CartCache.key_prefix + str(user_id) + ':gen'
+    with mock.patch.object(shared, 'add', wraps=shared.add) as add, \
+            mock.patch.object(shared, 'set', wraps=shared.set) as set_:
+        cache.get(user_id, lambda: {'rows': [1]})
+        cache.invalidate(user_id)
+    assert add.call_args_list[0] == mock.call(generation_key, mock.ANY, 60)
+    assert set_.call_args_list[-1] == mock.call(generation_key, mock.ANY, 60)
+
+
+@pytest.mark.django_db
+def test_cart_list_served_from_snapshot(client, cart_item, django_assert_num_queries):
+    url = reverse('cart-item-list')
+    first = client.get(url)
+    assert first.status_code == 200
+    with django_assert_num_queries(0):
+        second = client.get(url)
+    assert second.json() == first.json()
+    assert second['ETag'] == first['ETag']
+
+
+@pytest.mark.django_db
+def test_item_changes_invalidate_snapshot(client, user, cart_item):
+    url = reverse('cart-item-list')
+    client.get(url)
+
+    cart_item.quantity = 5
+    cart_item.save()
+    assert client.get(url).json()[0]['quantity'] == 5
+
+    client.post(url, [{"product_name": "Bulk", "quantity": 1, "price": "1.00"}], format='json')
+    assert len(client.get(url).json()) == 2
+
+    CartItem.objects.get(product_name="Bulk").delete()
+    assert len(client.get(url).json()) == 1
+
+    client.delete(url)
+    assert client.get(url).status_code == 404
+
+
+@pytest.mark.django_db
+def test_order_changes_invalidate_snapshot(client, user, cart_item):
+    url = reverse('cart-item-list')
+    client.get(url)
+    cart_item.order.delete()
+    assert client.get(url).status_code == 404
+
+
+@pytest.mark.django_db
+def test_moving_an_order_invalidates_previous_owner(client, user, cart_item):
+    url = reverse('cart-item-list')
+    client.get(url)
+    other = User.objects.create(name="Other", email="other-cart@example.com")
+    order = cart_item.order
+    order.user = other
+    order.save()
+    assert client.get(url).status_code == 404
+
+
+@pytest.mark.django_db
+def test_moving_an_item_invalidates_previous_owner(client, user, cart_item):
+    url = reverse('cart-item-list')
+    assert len(client.get(url).json()) == 1
+    other = User.objects.create(name="Other", email="other-item@example.com")
+    other_order = Order.objects.create(user=other, status="Pending")
+
+    item = CartItem.objects.get(pk=cart_item.pk)
+    item.order = other_order
+    item.save()
+    assert client.get(url).status_code == 404
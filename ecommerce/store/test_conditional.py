@@ -0,0 +1,81 @@
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+from store.models import User, Order, CartItem
+
+
+@pytest.fixture
+def user(db):
+    """Fixture for creating a test user."""
+    return User.objects.create(name="Etag User", email="etag@example.com")
+
+
+@pytest.fixture
+def client(user):
+    """Returns an API client authenticated as the test user."""
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.fixture
+def cart_item(user):
+    """Fixture for a cart item in the user's pending order."""
+    order = Order.objects.create(user=user, status="Pending")
+    return CartItem.objects.create(order=order, product_name="Etag Product", quantity=1, price="5.00")
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("url_name, queries", [('order-list-create', 1), ('cart-item-list', 0)])
+def test_if_none_match_returns_304_without_serializing(client, cart_item, url_name, queries, django_assert_num_queries):
+    url = reverse(url_name)
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response['ETag']
+    assert etag.startswith('W/"')
+
+    # The cart-item list answers from its snapshot cache
+    with django_assert_num_queries(queries):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert response.content == b''
+
+
+@pytest.mark.django_db
+def test_cart_item_edit_changes_validator(client, cart_item):
+    url = reverse('cart-item-list')
+    etag = client.get(url)['ETag']
+
+    cart_item.quantity = 4
+    cart_item.save()
+    for url_name in ('cart-item-list', 'order-list-create'):
+        response = client.get(reverse(url_name), HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_cart_item_delete_changes_order_validator(client, user, cart_item):
+    CartItem.objects.create(order=cart_item.order, product_name="Second", quantity=1, price="1.00")
+    url = reverse('order-list-create')
+    etag = client.get(url)['ETag']
+
+    CartItem.objects.filter(product_name="Second").delete()
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+@pytest.mark.django_db
+def test_expand_has_its_own_validator(client, cart_item):
+    url = reverse('order-list-create')
+    plain = client.get(url)['ETag']
+    expanded = client.get(url, {'expand': 'cart_items'})['ETag']
+    assert plain != expanded
+
+
+@pytest.mark.django_db
+def test_if_modified_since_is_not_trusted_after_deletes(client, cart_item):
+    url = reverse('order-list-create')
+    response = client.get(url)
+    assert 'Last-Modified' not in response
+
+    cart_item.delete()
+    assert client.get(url, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT').status_code == 200
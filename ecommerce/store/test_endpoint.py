@@ -1,5 +1,9 @@
+import json
+import threading
 import pytest
 from rest_framework.test import APIClient
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from store.models import User, Order, CartItem
 
@@ -73,6 +77,41 @@ def test_user_list(authenticated_client):
     assert response.status_code == 200
 
 
+@pytest.mark.django_db
+def test_user_list_cursor_pagination(authenticated_client, user):
+    """Test paging through users with a keyset cursor."""
+    User.objects.bulk_create(
+        User(name=f"User {i}", email=f"user{i}@example.com") for i in range(4)
+    )
+    url = reverse('user-list-create')
+
+    seen = []
+    response = authenticated_client.get(url, {'page_size': 2})
+    while True:
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page['results']) <= 2
+        seen.extend(row['id'] for row in page['results'])
+        if not page['next']:
+            break
+        response = authenticated_client.get(page['next'])
+
+    assert seen == sorted(str(pk) for pk in User.objects.values_list('id', flat=True))
+
+
+@pytest.mark.django_db
+def test_user_list_ndjson_stream(authenticated_client, user):
+    """Test streaming every user as newline-delimited JSON."""
+    url = reverse('user-list-create')
+    response = authenticated_client.get(url, {'stream': 'ndjson'})
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'application/x-ndjson'
+
+    rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+    assert [row['id'] for row in rows] == [str(user.id)]
+    assert rows[0]['email'] == user.email
+
+
 @pytest.mark.django_db
 def test_post_user(authenticated_client):
     """Test creating a new user."""
@@ -92,14 +131,15 @@ def test_post_user(authenticated_client):
     assert response.data['email'] == data['email']
     assert response.data['address'] == data['address']
     assert response.data['phone'] == data['phone']
-    assert response.data['password'] == data['password']
+    assert 'password' not in response.data
 
     created_user = User.objects.get(email=data['email'])
     assert created_user.name == data['name']
     assert created_user.email == data['email']
     assert created_user.address == data['address']
     assert created_user.phone == data['phone']
-    assert created_user.password == data['password']
+    assert created_user.password != data['password']
+    assert created_user.check_password(data['password'])
 
 
 @pytest.mark.django_db
@@ -112,7 +152,7 @@ def test_get_user_detail(authenticated_client, user):
     assert response.data["email"] == user.email
     assert response.data['address'] == user.address
     assert response.data['phone'] == user.phone
-    assert response.data['password'] == user.password
+    assert 'password' not in response.data
 
 
 #ORDERS
@@ -124,6 +164,46 @@ def test_get_orders(authenticated_client):
     assert response.status_code == 200
 
 
+@pytest.mark.django_db
+def test_get_orders_totals(authenticated_client, user, order, django_assert_num_queries):
+    """Test that order totals are aggregated in the list query itself."""
+    CartItem.objects.create(order=order, product_name="A", quantity=2, price="10.50")
+    CartItem.objects.create(order=order, product_name="B", quantity=1, price="3.25")
+    empty_order = Order.objects.create(user=user, status="Processed")
+
+    url = reverse('order-list-create')
+    # One query for the ETag validator, one for the orders and their totals
+    with django_assert_num_queries(2):
+        response = authenticated_client.get(url)
+    assert response.status_code == 200
+
+    totals = {row['id']: (row['item_count'], row['total_amount']) for row in response.json()}
+    assert totals[str(order.id)] == (2, "24.25")
+    assert totals[str(empty_order.id)] == (0, "0.00")
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("order_count", [1, 10, 100])
+def test_get_orders_expand_cart_items(authenticated_client, user, order_count, django_assert_num_queries):
+    """Test that embedding cart items costs a constant number of queries."""
+    orders = Order.objects.bulk_create(
+        Order(user=user, status="Processed") for _ in range(order_count)
+    )
+    CartItem.objects.bulk_create(
+        CartItem(order=order, product_name=f"Product {i}", quantity=1, price="1.00")
+        for order in orders for i in range(2)
+    )
+
+    url = reverse('order-list-create')
+    with django_assert_num_queries(3):
+        response = authenticated_client.get(url, {'expand': 'cart_items'})
+    assert response.status_code == 200
+    assert len(response.data) == order_count
+    for row in response.data:
+        assert len(row['cart_items']) == 2
+        assert {str(item['order']) for item in row['cart_items']} == {row['id']}
+
+
 @pytest.mark.django_db
 def test_post_order(authenticated_client, user):
     """Test creating a new order."""
@@ -137,6 +217,15 @@ def test_post_order(authenticated_client, user):
     assert response.data["status"] == data["status"]
 
 
+@pytest.mark.django_db
+def test_post_second_pending_order(authenticated_client, user, order):
+    """Test that a second pending order is rejected with a 400."""
+    url = reverse('order-list-create')
+    response = authenticated_client.post(url, {"user": user.id, "status": "Pending"}, format='json')
+    assert response.status_code == 400
+    assert response.data["error"] == "A user can only have one pending order."
+
+
 @pytest.mark.django_db
 def test_delete_orders(authenticated_client):
     """Test deleting all orders (if supported)."""
@@ -152,6 +241,8 @@ def test_get_order_detail(authenticated_client, order):
     response = authenticated_client.get(url)
     assert response.status_code == 200
     assert response.data["id"] == str(order.id)
+    assert response.data["item_count"] == 0
+    assert response.data["total_amount"] == "0.00"
 
 
 @pytest.mark.django_db
@@ -192,6 +283,70 @@ def test_checkout_order(authenticated_client, user, order):
     assert response.data["message"] == "Order processed successfully."
 
 
+@pytest.mark.django_db
+def test_checkout_order_is_one_query(authenticated_client, order):
+    """Test that a successful checkout is a single UPDATE."""
+    url = reverse('checkout', kwargs={"order_id": order.id})
+    with CaptureQueriesContext(connection) as captured:
+        response = authenticated_client.put(url)
+    assert response.status_code == 200
+    assert [q['sql'].split()[0] for q in captured if 'store_order' in q['sql']] == ['UPDATE']
+
+
+@pytest.mark.django_db
+def test_checkout_order_twice(authenticated_client, order):
+    """Test that checking out a processed order is a conflict."""
+    url = reverse('checkout', kwargs={"order_id": order.id})
+    assert authenticated_client.put(url).status_code == 200
+    response = authenticated_client.put(url)
+    assert response.status_code == 409
+    order.refresh_from_db()
+    assert order.status == "Processed"
+
+
+@pytest.mark.django_db
+def test_checkout_cancelled_order(authenticated_client, user):
+    """Test that a cancelled order cannot be checked out."""
+    cancelled = Order.objects.create(user=user, status="Cancelled")
+    url = reverse('checkout', kwargs={"order_id": cancelled.id})
+    assert authenticated_client.put(url).status_code == 409
+
+
+@pytest.mark.django_db
+def test_checkout_missing_order(authenticated_client):
+    """Test checking out an order that does not exist."""
+    url = reverse('checkout', kwargs={"order_id": "00000000-0000-0000-0000-000000000000"})
+    assert authenticated_client.put(url).status_code == 404
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_checkouts_have_one_winner(user, order):
+    """Test that of many simultaneous checkouts of one order exactly one succeeds."""
+    url = reverse('checkout', kwargs={"order_id": order.id})
+    workers = 8
+    barrier = threading.Barrier(workers)
+    status_codes = []
+
+    def checkout():
+        client = APIClient()
+        client.force_authenticate(user=user)
+        try:
+            barrier.wait()
+            status_codes.append(client.put(url).status_code)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=checkout) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(status_codes) == [200] + [409] * (workers - 1)
+    order.refresh_from_db()
+    assert order.status == "Processed"
+
+
 
 #CART ITEMS
 @pytest.mark.django_db
@@ -210,6 +365,48 @@ def test_create_cart_item(authenticated_client, cart_item_data):
     assert response.status_code == 201
     assert CartItem.objects.filter(product_name=cart_item_data["product_name"]).exists()
 
+@pytest.mark.django_db
+def test_create_cart_item_uses_pending_order(authenticated_client, user, cart_item_data):
+    """Test that new cart items land in the user's pending order."""
+    url = reverse('cart-item-list')
+    response = authenticated_client.post(url, data=cart_item_data, format='json')
+    assert response.status_code == 201
+    assert CartItem.objects.get(id=response.data['id']).order.status == "Pending"
+    assert Order.objects.filter(user=user).count() == 1
+
+
+@pytest.mark.django_db
+def test_bulk_create_cart_items(authenticated_client, user, order, django_assert_max_num_queries):
+    """Test creating many cart items in one request with a fixed number of queries."""
+    url = reverse('cart-item-list')
+    items = [
+        {"product_name": f"Product {i}", "quantity": i + 1, "price": "4.50"}
+        for i in range(40)
+    ]
+    with django_assert_max_num_queries(4):
+        response = authenticated_client.post(url, data=items, format='json')
+    assert response.status_code == 201
+    assert len(response.data) == 40
+    assert CartItem.objects.filter(order=order).count() == 40
+
+
+@pytest.mark.django_db
+def test_bulk_create_cart_items_reports_every_error(authenticated_client, order):
+    """Test that one invalid item rejects the batch and errors line up with the input."""
+    url = reverse('cart-item-list')
+    items = [
+        {"product_name": "Valid", "quantity": 1, "price": "1.00"},
+        {"product_name": "No price", "quantity": 1},
+        {"product_name": "Bad quantity", "quantity": -1, "price": "1.00"},
+    ]
+    response = authenticated_client.post(url, data=items, format='json')
+    assert response.status_code == 400
+    assert response.data[0] == {}
+    assert 'price' in response.data[1]
+    assert 'quantity' in response.data[2]
+    assert not CartItem.objects.exists()
+
+
 @pytest.mark.django_db
 def test_delete_cart_items(authenticated_client):
     """Test deleting all cart items."""
@@ -0,0 +1,31 @@
+import io
+import uuid
+import pytest
+from django.core.management import call_command
+from store.management.commands.explain_queries import full_scans, view_querysets
+from store.models import User
+
+
+@pytest.mark.django_db
+def test_every_view_query_uses_an_index():
+    """Fails with CommandError if any view query falls back to a full scan."""
+    call_command('explain_queries', stdout=io.StringIO())
+
+
+@pytest.mark.django_db
+def test_order_list_is_sorted_by_its_index():
+    plan = view_querysets(uuid.uuid4(), uuid.uuid4())['order-list-create GET'].explain()
+    assert 'order_user_created_idx' in plan
+    assert 'TEMP B-TREE' not in plan
+
+
+@pytest.mark.django_db
+def test_full_scan_is_detected():
+    plan = User.objects.filter(name="Nobody").explain()
+    assert full_scans(plan) == ['store_user']
+
+
+def test_full_scan_patterns():
+    assert full_scans("SCAN store_user USING INDEX sqlite_autoindex_store_user_1", 'sqlite') == []
+    assert full_scans("Seq Scan on store_order  (cost=0.00..1.01 rows=1 width=72)", 'postgresql') == ['store_order']
+    assert full_scans("Index Scan using order_user_status_idx on store_order", 'postgresql') == []
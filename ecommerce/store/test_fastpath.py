@@ -0,0 +1,64 @@
+import pytest
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from store.fastpath import CompiledSerializer, FastJSONRenderer
+from store.models import User, Order, CartItem
+from store.serializers import UserSerializer, OrderSerializer, OrderWithItemsSerializer, CartItemSerializer
+
+
+@pytest.fixture
+def catalog(db):
+    """Users, orders and cart items covering nulls, unicode and awkward decimals."""
+    alice = User.objects.create(name="Alice   Ünïcode", email="alice@example.com", password="pw")
+    User.objects.create(name="Bob", email="bob@example.com", address=None, phone=None)
+    pending = Order.objects.create(user=alice, status="Pending")
+    Order.objects.create(user=alice, status="Cancelled")
+    CartItem.objects.create(order=pending, product_name="Widget", quantity=3, price="10.99")
+    CartItem.objects.create(order=pending, product_name="Gadget", quantity=7, price="0.10")
+    CartItem.objects.create(order=None, product_name="Orphan", quantity=1, price="1000.00")
+
+
+def assert_same_json(serializer_class, queryset):
+    expected = JSONRenderer().render(serializer_class(queryset, many=True).data)
+    actual = FastJSONRenderer().render(CompiledSerializer(serializer_class).rows(queryset))
+    assert actual == expected
+
+
+@pytest.mark.django_db
+def test_user_rows_match_serializer(catalog):
+    assert_same_json(UserSerializer, User.objects.order_by('id'))
+
+
+@pytest.mark.django_db
+def test_order_rows_match_serializer(catalog):
+    assert_same_json(OrderSerializer, Order.objects.order_by('-created_at').with_totals())
+
+
+@pytest.mark.django_db
+def test_cart_item_rows_match_serializer(catalog):
+    assert_same_json(CartItemSerializer, CartItem.objects.order_by('product_name'))
+
+
+@pytest.mark.django_db
+def test_list_endpoints_match_serializer(client, catalog):
+    alice = User.objects.get(email="alice@example.com")
+    response = client.get('/api/cart-items/', HTTP_X_USER_ID=str(alice.id))
+    expected = JSONRenderer().render(
+        CartItemSerializer(CartItem.objects.filter(order__user=alice), many=True).data
+    )
+    assert response.content == expected
+
+
+def test_nested_serializers_are_rejected():
+    with pytest.raises(ValueError):
+        CompiledSerializer(OrderWithItemsSerializer)
+
+
+def test_write_only_fields_are_skipped():
+    class SecretSerializer(serializers.ModelSerializer):
+        class Meta:
+            model = User
+            fields = ['id', 'password']
+            extra_kwargs = {'password': {'write_only': True}}
+
+    assert CompiledSerializer(SecretSerializer).sources == ['id']
@@ -0,0 +1,163 @@
+import threading
+import time
+from datetime import timedelta
+import pytest
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from store.models import User, Order, CartItem, IdempotencyRecord
+
+
+@pytest.fixture
+def user(db):
+    """Fixture for creating a test user."""
+    return User.objects.create(name="Retry User", email="retry@example.com")
+
+
+@pytest.fixture
+def client(user):
+    """Returns an API client authenticated as the test user."""
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def post_item(client, key, name="Retried Item"):
+    return client.post(
+        reverse('cart-item-list'),
+        {"product_name": name, "quantity": 1, "price": "2.00"},
+        format='json',
+        HTTP_IDEMPOTENCY_KEY=key,
+    )
+
+
+@pytest.mark.django_db
+def test_retry_replays_first_response_without_business_queries(client):
+    first = post_item(client, 'key-1')
+    assert first.status_code == 201
+
+    with CaptureQueriesContext(connection) as captured:
+        retry = post_item(client, 'key-1')
+    assert retry.status_code == 201
+    assert retry.json() == first.json()
+    assert retry['Idempotent-Replayed'] == 'true'
+    assert CartItem.objects.count() == 1
+    assert not any('store_cartitem' in q['sql'] or 'store_order' in q['sql'] for q in captured)
+
+
+@pytest.mark.django_db
+def test_key_reused_with_different_body_is_rejected(client):
+    post_item(client, 'key-1')
+    assert post_item(client, 'key-1', name="Something Else").status_code == 422
+
+
+@pytest.mark.django_db
+def test_keys_are_scoped_per_user(client, user):
+    post_item(client, 'shared-key')
+    other = User.objects.create(name="Other", email="other-retry@example.com")
+    other_client = APIClient()
+    other_client.force_authenticate(user=other)
+    assert post_item(other_client, 'shared-key').status_code == 201
+    assert CartItem.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_checkout_retry_replays_success(client, user):
+    order = Order.objects.create(user=user, status="Pending")
+    url = reverse('checkout', args=[order.id])
+    assert client.put(url, HTTP_IDEMPOTENCY_KEY='pay-1').status_code == 200
+    assert client.put(url, HTTP_IDEMPOTENCY_KEY='pay-1').status_code == 200
+    assert client.put(url).status_code == 409
+
+
+@pytest.mark.django_db
+def test_order_post_retry_creates_one_order(client, user):
+    url = reverse('order-list-create')
+    data = {"user": str(user.id), "status": "Processed"}
+    first = client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='order-1')
+    retry = client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='order-1')
+    assert first.status_code == retry.status_code == 201
+    assert retry.json()['id'] == first.json()['id']
+    assert Order.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_expired_record_is_replaced(client):
+    post_item(client, 'key-1')
+    IdempotencyRecord.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+    assert 'Idempotent-Replayed' not in post_item(client, 'key-1')
+    assert CartItem.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_purge_command_deletes_expired_records(client, capsys):
+    post_item(client, 'old')
+    post_item(client, 'new')
+    IdempotencyRecord.objects.filter(created_at=IdempotencyRecord.objects.earliest('created_at').created_at).update(
+        expires_at=timezone.now() - timedelta(seconds=1)
+    )
+    call_command('purge_idempotency_keys')
+    assert 'Deleted 1 expired' in capsys.readouterr().out
+    assert IdempotencyRecord.objects.count() == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_duplicates_collapse(user, monkeypatch):
+    """Test that simultaneous requests with one key write once and all get its response."""
+    from store.serializers import CartItemSerializer
+    create = CartItemSerializer.create
+
+    def slow_create(self, validated_data):
+        time.sleep(0.2)
+        return create(self, validated_data)
+
+    monkeypatch.setattr(CartItemSerializer, 'create', slow_create)
+    workers = 4
+    barrier = threading.Barrier(workers)
+    responses = []
+
+    def send():
+        client = APIClient()
+        client.force_authenticate(user=user)
+        try:
+            barrier.wait()
+            responses.append(post_item(client, 'burst'))
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=send) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [response.status_code for response in responses] == [201] * workers
+    assert len({response.json()['id'] for response in responses}) == 1
+    assert CartItem.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_key_released_during_claim_is_never_run_unowned(client, monkeypatch):
+    create = IdempotencyRecord.objects.create
+    losses = []
+
+    def lose_the_race(times):
+        # Another request held the key and released it before it was read
+        def claim(**kwargs):
+            if len(losses) < times:
+                losses.append(1)
+                raise IntegrityError("UNIQUE constraint failed")
+            return create(**kwargs)
+        return claim
+
+    monkeypatch.setattr(IdempotencyRecord.objects, 'create', lose_the_race(1))
+    assert post_item(client, 'key-race').status_code == 201
+    assert IdempotencyRecord.objects.get().status_code == 201
+
+    losses.clear()
+    monkeypatch.setattr(IdempotencyRecord.objects, 'create', lose_the_race(10))
+    assert post_item(client, 'key-race-2').status_code == 409
+    assert CartItem.objects.count() == 1
@@ -0,0 +1,164 @@
+from datetime import timedelta
+import pytest
+from django.core.management import call_command
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from store.jobs import Worker, backoff, enqueue, register
+from store.models import User, Order, CartItem, Job
+
+calls = []
+
+
+@register('test.record')
+def record(payload):
+    calls.append(payload)
+
+
+@register('test.fail')
+def fail(payload):
+    raise RuntimeError("boom")
+
+
+@pytest.fixture(autouse=True)
+def clear_calls():
+    calls.clear()
+
+
+@pytest.fixture
+def user(db):
+    """Fixture for creating a test user."""
+    return User.objects.create(name="Job User", email="jobs@example.com")
+
+
+@pytest.fixture
+def pending_order(user):
+    """Fixture for a pending order with one cart item."""
+    order = Order.objects.create(user=user, status="Pending")
+    CartItem.objects.create(order=order, product_name="Receipt Product", quantity=2, price="4.00")
+    return order
+
+
+@pytest.mark.django_db
+def test_checkout_queues_follow_up_jobs_once(user, pending_order):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    url = reverse('checkout', args=[pending_order.id])
+
+    assert client.put(url).status_code == 200
+    assert client.put(url).status_code == 409
+    jobs = Job.objects.order_by('name')
+    assert [job.name for job in jobs] == ['checkout.receipt', 'checkout.sales_rollup']
+    for job in jobs:
+        assert job.payload == {'order_id': str(pending_order.id), 'user_id': str(user.id)}
+        assert job.idempotency_key == f'{job.name}:{pending_order.id}'
+
+
+@pytest.mark.django_db
+def test_enqueue_is_rolled_back_with_its_transaction():
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            enqueue('test.record', {'n': 1})
+            raise RuntimeError
+    assert not Job.objects.exists()
+
+
+@pytest.mark.django_db
+def test_idempotency_key_queues_once():
+    enqueue('test.record', {'n': 1}, key='same')
+    enqueue('test.record', {'n': 2}, key='same')
+    assert list(Job.objects.values_list('payload', flat=True)) == [{'n': 1}]
+
+
+@pytest.mark.django_db
+def test_unknown_job_is_rejected():
+    with pytest.raises(ValueError):
+        enqueue('test.missing')
+
+
+@pytest.mark.django_db
+def test_worker_runs_due_jobs_only():
+    enqueue('test.record', {'n': 1})
+    enqueue('test.record', {'n': 2}, delay=timedelta(hours=1))
+    assert Worker().run_once() == 1
+    assert calls == [{'n': 1}]
+    assert list(Job.objects.order_by('id').values_list('status', 'attempts')) == [('done', 1), ('queued', 0)]
+
+
+@pytest.mark.django_db
+def test_failed_job_is_retried_with_backoff_then_fails():
+    enqueue('test.fail', max_attempts=2)
+    worker = Worker(retry_base=60)
+    before = timezone.now()
+
+    worker.run_once()
+    job = Job.objects.get()
+    assert (job.status, job.attempts) == ('queued', 1)
+    assert job.run_at >= before + timedelta(seconds=30)
+    assert 'boom' in job.last_error
+    assert worker.run_once() == 0
+
+    Job.objects.update(run_at=timezone.now())
+    worker.run_once()
+    job.refresh_from_db()
+    assert (job.status, job.attempts) == ('failed', 2)
+
+
+def test_backoff_grows_and_is_capped():
+    assert 2.5 <= backoff(1, 5, 3600) <= 5
+    assert 20 <= backoff(4, 5, 3600) <= 40
+    assert 1800 <= backoff(30, 5, 3600) <= 3600
+
+
+@pytest.mark.django_db
+def test_claim_is_exclusive_and_stale_jobs_are_reclaimed():
+    enqueue('test.record')
+    job = Job.objects.get()
+    now = timezone.now()
+    first, second = Worker(worker_id='a', lease=60), Worker(worker_id='b', lease=60)
+    assert first.claim(job.pk, now) == 1
+    assert second.claim(job.pk, now) == 0
+
+    # Worker 'a' died; after the lease the job is due again
+    assert second.run_once() == 0
+    Job.objects.update(locked_at=now - timedelta(minutes=5))
+    assert second.run_once() == 1
+    assert Job.objects.get().status == 'done'
+
+
+@pytest.mark.django_db
+def test_attempt_is_counted_when_claimed():
+    enqueue('test.record', max_attempts=2)
+    job = Job.objects.get()
+    worker = Worker(lease=60)
+    stale = timezone.now() - timedelta(minutes=5)
+
+    # Two claims whose worker died before finishing
+    for attempts in (1, 2):
+        assert worker.claim(job.pk, timezone.now()) == 1
+        assert Job.objects.get().attempts == attempts
+        Job.objects.update(locked_at=stale)
+
+    assert worker.run_once() == 1
+    job.refresh_from_db()
+    assert job.status == 'failed'
+    assert calls == []
+
+
+@pytest.mark.django_db
+def test_stop_is_checked_between_jobs():
+    for n in range(3):
+        enqueue('test.record', {'n': n})
+    assert Worker().run_once(stop=lambda: len(calls) >= 1) == 1
+    assert Job.objects.filter(status='queued').count() == 2
+
+
+@pytest.mark.django_db
+def test_run_jobs_once_drains_queue(user, pending_order, capsys):
+    from store.tasks import enqueue_checkout_jobs
+    enqueue_checkout_jobs(pending_order.id, user.id)
+    enqueue('test.record', {'n': 1})
+    call_command('run_jobs', '--once')
+    assert 'Ran 3 job(s).' in capsys.readouterr().out
+    assert set(Job.objects.values_list('status', flat=True)) == {'done'}
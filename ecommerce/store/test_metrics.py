@@ -0,0 +1,86 @@
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory
+from django.urls import resolve, reverse
+from rest_framework.test import APIClient
+from store.middleware import PerformanceMiddleware
+from store.metrics import Histogram, MetricsRegistry, registry, REQUEST_DURATION, SERIALIZE_DURATION, SQL_QUERIES
+from store.models import User, Order
+
+
+@pytest.fixture
+def user(db):
+    """Fixture for creating a test user."""
+    return User.objects.create(name="Metrics User", email="metrics@example.com")
+
+
+@pytest.fixture
+def client(user):
+    """Returns an API client authenticated as the test user."""
+    registry.clear()
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def test_histogram_buckets():
+    histogram = Histogram((1, 5))
+    for value in (0.5, 1, 3, 9):
+        histogram.observe(value)
+    assert histogram.snapshot() == ([2, 1, 1], 13.5, 4)
+
+
+def test_registry_renders_prometheus_text():
+    metrics = MetricsRegistry()
+    name = metrics.histogram('demo_seconds', (0.1, 1), 'A demo.')
+    metrics.observe(name, (('view', 'V'), ('method', 'GET')), 0.5)
+    text = metrics.render()
+    assert '# HELP demo_seconds A demo.' in text
+    assert 'demo_seconds_bucket{view="V",method="GET",le="0.1"} 0' in text
+    assert 'demo_seconds_bucket{view="V",method="GET",le="1"} 1' in text
+    assert 'demo_seconds_bucket{view="V",method="GET",le="+Inf"} 1' in text
+    assert 'demo_seconds_count{view="V",method="GET"} 1' in text
+
+
+@pytest.mark.django_db
+def test_middleware_records_view_metrics(client, user):
+    Order.objects.create(user=user, status="Processed")
+    response = client.get(reverse('order-list-create'))
+    assert response.status_code == 200
+
+    server_timing = response['Server-Timing']
+    assert server_timing.startswith('app;dur=')
+    assert 'db;dur=' in server_timing and 'desc="2 queries"' in server_timing
+    assert 'serialize;dur=' in server_timing
+
+    labels = (('view', 'OrderListCreateView'), ('method', 'GET'))
+    assert registry.get(REQUEST_DURATION, labels).count == 1
+    assert registry.get(SQL_QUERIES, labels).sum == 2
+    assert registry.get(SERIALIZE_DURATION, labels).sum > 0
+
+
+@pytest.mark.django_db
+def test_middleware_stays_async_for_async_handlers(user):
+    async def get_response(request):
+        request.resolver_match = resolve(reverse('order-list-create'))
+        await User.objects.filter(pk=user.pk).aexists()
+        return HttpResponse()
+
+    registry.clear()
+    middleware = PerformanceMiddleware(get_response)
+    assert iscoroutinefunction(middleware)
+    response = async_to_sync(middleware)(AsyncRequestFactory().get('/'))
+    assert 'desc="1 queries"' in response['Server-Timing']
+    assert registry.get(REQUEST_DURATION, (('view', 'OrderListCreateView'), ('method', 'GET'))).count == 1
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint(client):
+    client.get(reverse('order-list-create'))
+    response = client.get(reverse('metrics'))
+    assert response.status_code == 200
+    body = response.content.decode()
+    assert 'store_request_duration_seconds_count{view="OrderListCreateView",method="GET"} 1' in body
+    assert 'store_user_cache_misses_total' in body
+    assert 'store_cart_cache_hits_total' in body
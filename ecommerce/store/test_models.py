@@ -1,7 +1,9 @@
 import os
 import pytest
 import django
+from django.db import connection
 from django.db.utils import IntegrityError
+from django.test.utils import CaptureQueriesContext
 from store.models import User, Order, CartItem
 
 
@@ -45,6 +47,9 @@ def test_unique_pending_order_per_user():
         Order.objects.create(user=user, status="Pending")
 
 @pytest.mark.django_db
+# The racing threads cannot write past the test's open transaction and fail
+# on the busy timeout, which is the outcome this test relies on
+@pytest.mark.filterwarnings('ignore::pytest.PytestUnhandledThreadExceptionWarning')
 def test_unique_pending_order_per_user_edge_case():
     user = User.objects.create(name="Test User", email="testuser@example.com")
     
@@ -75,6 +80,60 @@ def test_unique_pending_order_per_user_edge_case():
 
     assert Order.objects.filter(user=user, status="Pending").count() == 1
 
+TRANSACTION_CONTROL = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE SAVEPOINT')
+
+
+def statements(captured):
+    """SQL statements in a capture, leaving out transaction control."""
+    return [q['sql'] for q in captured if not q['sql'].startswith(TRANSACTION_CONTROL)]
+
+
+@pytest.mark.django_db
+def test_pending_order_create_is_one_query():
+    user = User.objects.create(name="Test User", email="testuser@example.com")
+    with CaptureQueriesContext(connection) as captured:
+        Order.objects.create(user=user, status="Pending")
+    assert len(statements(captured)) == 1
+
+
+@pytest.mark.django_db
+def test_pending_order_update_is_one_query():
+    user = User.objects.create(name="Test User", email="testuser@example.com")
+    order = Order.objects.create(user=user, status="Pending")
+    with CaptureQueriesContext(connection) as captured:
+        order.save()
+    assert len(statements(captured)) == 1
+
+
+@pytest.mark.django_db
+def test_order_update_is_one_query(django_assert_num_queries):
+    user = User.objects.create(name="Test User", email="testuser@example.com")
+    order = Order.objects.create(user=user, status="Processed")
+    order.status = "Cancelled"
+    with django_assert_num_queries(1):
+        order.save()
+
+
+@pytest.mark.django_db
+def test_pending_order_can_be_resaved():
+    user = User.objects.create(name="Test User", email="testuser@example.com")
+    order = Order.objects.create(user=user, status="Pending")
+    order.save()
+    assert Order.objects.filter(user=user, status="Pending").count() == 1
+
+
+@pytest.mark.django_db
+def test_reopening_order_with_pending_sibling_is_rejected():
+    user = User.objects.create(name="Test User", email="testuser@example.com")
+    Order.objects.create(user=user, status="Pending")
+    processed = Order.objects.create(user=user, status="Processed")
+    processed.status = "Pending"
+    with pytest.raises(ValueError):
+        processed.save()
+    # The savepoint leaves the surrounding transaction usable
+    assert Order.objects.filter(user=user).count() == 2
+
+
 @pytest.mark.django_db
 def test_cart_item_creation():
     user = User.objects.create(name="Test User", email="testuser@example.com")
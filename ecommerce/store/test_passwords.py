@@ -0,0 +1,132 @@
+import importlib
+import io
+import time
+import pytest
+from django.apps import apps
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+from store.models import User
+from store.passwords import authenticate, hash_passwords
+
+hash_migration = importlib.import_module('store.migrations.0016_hash_plaintext_passwords')
+
+
+@pytest.fixture(autouse=True)
+def cheap_hashing(settings):
+    """Fixture keeping the PBKDF2 work factor low so the tests stay fast."""
+    settings.STORE_PASSWORDS = {'ITERATIONS': 1000, 'WORKERS': 2}
+
+
+@pytest.fixture
+def user(db):
+    """Fixture for a user with a hashed password."""
+    user = User(name="Login User", email="login@example.com")
+    user.set_password("correct horse")
+    user.save()
+    return user
+
+
+def login(email, password):
+    return APIClient().post(reverse('login'), {"email": email, "password": password}, format='json')
+
+
+@pytest.mark.django_db
+def test_signup_hashes_with_the_configured_work_factor():
+    response = APIClient().post(
+        reverse('user-list-create'), {"name": "New", "email": "new@example.com", "password": "s3cret"}, format='json',
+    )
+
+    assert response.status_code == 201
+    assert 'password' not in response.data
+    stored = User.objects.get(email="new@example.com").password
+    assert stored.startswith('pbkdf2_sha256$1000$')
+
+
+@pytest.mark.django_db
+def test_signup_without_a_password_stores_none():
+    APIClient().post(reverse('user-list-create'), {"name": "New", "email": "new@example.com"}, format='json')
+    user = User.objects.get(email="new@example.com")
+    assert user.password is None
+    assert not user.check_password("")
+
+
+def test_login_returns_the_user(user):
+    response = login("login@example.com", "correct horse")
+
+    assert response.status_code == 200
+    assert response.data['token']
+    assert response.data['user']['id'] == str(user.id)
+    assert 'password' not in response.data['user']
+
+
+@pytest.mark.parametrize("email, password", [
+    ("login@example.com", "wrong horse"),
+    ("nobody@example.com", "correct horse"),
+])
+def test_login_rejects_bad_credentials(user, email, password):
+    response = login(email, password)
+    assert response.status_code == 401
+    assert response.data == {"error": "Invalid email or password"}
+
+
+def test_login_validates_input(user):
+    assert APIClient().post(reverse('login'), {"email": "login@example.com"}, format='json').status_code == 400
+
+
+def test_login_with_current_hash_does_not_rehash(user):
+    stored = user.password
+    assert authenticate("login@example.com", "correct horse") == user
+    time.sleep(0.1)
+    user.refresh_from_db()
+    assert user.password == stored
+
+
+@pytest.mark.django_db(transaction=True)
+def test_login_upgrades_outdated_hash_in_the_background(user, settings):
+    settings.STORE_PASSWORDS = {'ITERATIONS': 2000, 'WORKERS': 2}
+
+    assert login("login@example.com", "correct horse").status_code == 200
+
+    deadline = time.monotonic() + 5
+    while not user.password.startswith('pbkdf2_sha256$2000$') and time.monotonic() < deadline:
+        time.sleep(0.02)
+        user.refresh_from_db()
+    assert user.password.startswith('pbkdf2_sha256$2000$')
+    assert user.check_password("correct horse")
+
+
+def test_hash_passwords_keeps_order_and_skips_blanks(db):
+    hashes = hash_passwords(["one", "", "three", None])
+
+    assert hashes[1] is None and hashes[3] is None
+    assert User(password=hashes[0]).check_password("one")
+    assert User(password=hashes[2]).check_password("three")
+
+
+def test_import_hashes_passwords_and_update_keeps_unset_ones(user, tmp_path):
+    path = tmp_path / "users.csv"
+    path.write_text("name,email,password\nNew,new@example.com,imported pw\nRenamed,login@example.com,\n")
+
+    call_command('import_users', str(path), '--on-conflict', 'update', stdout=io.StringIO())
+
+    assert User.objects.get(email="new@example.com").check_password("imported pw")
+    user.refresh_from_db()
+    assert user.name == "Renamed"
+    assert user.check_password("correct horse")
+
+
+def test_migration_hashes_plaintext_passwords(db):
+    plain = User.objects.create(name="Plain", email="plain@example.com", password="legacy")
+    empty = User.objects.create(name="Empty", email="empty@example.com", password="")
+    hashed = User.objects.create(name="Hashed", email="hashed@example.com", password=make_password("kept"))
+    before = hashed.password
+
+    hash_migration.hash_plaintext_passwords(apps, None)
+
+    for user in (plain, empty, hashed):
+        user.refresh_from_db()
+    assert plain.password != "legacy" and plain.check_password("legacy")
+    assert empty.password is None
+    assert hashed.password == before
@@ -0,0 +1,132 @@
+import importlib
+from decimal import Decimal
+import pytest
+from django.apps import apps
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from store.models import User, Order, CartItem, Product
+from store.search import SQLiteFTSBackend, get_backend, search_products
+
+backfill = importlib.import_module('store.migrations.0014_backfill_products')
+
+
+@pytest.fixture
+def products(db):
+    """Fixture for a small catalog."""
+    return Product.objects.bulk_create([
+        Product(sku="MUG-001", name="Blue Coffee Mug", price="12.00", stock=5),
+        Product(sku="MUG-002", name="Red Coffee Mug", price="12.50", stock=0),
+        Product(sku="TEE-001", name="Café T-Shirt", price="20.00", stock=3),
+    ])
+
+
+@pytest.mark.django_db
+def test_fts_backend_is_used_on_sqlite():
+    assert isinstance(get_backend(), SQLiteFTSBackend)
+
+
+@pytest.mark.django_db
+def test_search_matches_word_prefixes(products):
+    names = lambda query: {Product.objects.get(pk=pk).name for pk in search_products(query, 10)}
+    assert names("coff mug") == {"Blue Coffee Mug", "Red Coffee Mug"}
+    assert names("red") == {"Red Coffee Mug"}
+    assert names("cafe") == {"Café T-Shirt"}
+    assert names("TEE") == {"Café T-Shirt"}
+    assert names("mug shirt") == set()
+
+
+@pytest.mark.django_db
+def test_search_input_is_not_fts_syntax(products):
+    for query in ['"', 'name:Mug OR', 'NEAR(mug', '*', '']:
+        search_products(query, 10)
+
+
+@pytest.mark.django_db
+def test_index_follows_updates_and_deletes(products):
+    Product.objects.filter(sku="MUG-001").update(name="Green Tea Cup")
+    assert search_products("blue", 10) == []
+    assert len(search_products("green cup", 10)) == 1
+    Product.objects.filter(sku="MUG-001").delete()
+    assert search_products("green", 10) == []
+
+
+@pytest.mark.django_db
+@override_settings(STORE_SEARCH_BACKEND='store.search.LikeSearchBackend')
+def test_backend_is_pluggable(products):
+    assert [Product.objects.get(pk=pk).sku for pk in search_products("coffee", 10)] == ["MUG-001", "MUG-002"]
+    assert len(search_products("tee-001", 10)) == 1
+
+
+@pytest.mark.django_db
+def test_product_list_pages_by_sku(products):
+    response = APIClient().get(reverse('product-list'), {'page_size': 2})
+    assert response.status_code == 200
+    body = response.json()
+    assert [row['sku'] for row in body['results']] == ["MUG-001", "MUG-002"]
+    assert body['results'][0]['price'] == "12.00"
+    assert APIClient().get(body['next']).json()['results'][0]['sku'] == "TEE-001"
+
+
+@pytest.mark.django_db
+def test_product_search_endpoint(products):
+    response = APIClient().get(reverse('product-list'), {'q': 'red mug'})
+    assert response.status_code == 200
+    assert [row['sku'] for row in response.json()['results']] == ["MUG-002"]
+
+
+@pytest.mark.django_db
+def test_cart_item_takes_name_and_price_from_product(products):
+    user = User.objects.create(name="Shopper", email="shopper@example.com")
+    client = APIClient()
+    client.force_authenticate(user=user)
+    url = reverse('cart-item-list')
+
+    response = client.post(url, {"product": str(products[0].id), "quantity": 2}, format='json')
+    assert response.status_code == 201
+    item = CartItem.objects.get()
+    assert (item.product_name, item.price) == ("Blue Coffee Mug", Decimal("12.00"))
+
+    response = client.post(url, {"product_name": "Loose Item", "quantity": 1}, format='json')
+    assert response.status_code == 400
+    assert response.json() == {"price": ["This field is required."]}
+
+
+@pytest.mark.django_db
+def test_cart_item_price_cannot_undercut_catalog(products):
+    user = User.objects.create(name="Bargain Hunter", email="bargain@example.com")
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    response = client.post(reverse('cart-item-list'), {
+        "product": str(products[2].id), "product_name": "Anything", "quantity": 1, "price": "0.01",
+    }, format='json')
+    assert response.status_code == 201
+    item = CartItem.objects.get()
+    assert (item.product_name, item.price) == ("Café T-Shirt", Decimal("20.00"))
+
+    url = reverse('cart-item-detail', args=[item.pk])
+    assert client.put(url, {"price": "0.01", "quantity": 2}, format='json').status_code == 200
+    item.refresh_from_db()
+    assert (item.price, item.quantity) == (Decimal("20.00"), 2)
+
+
+@pytest.mark.django_db
+def test_backfill_links_items_in_batches(monkeypatch):
+    monkeypatch.setattr(backfill, 'BATCH_SIZE', 2)
+    user = User.objects.create(name="Legacy", email="legacy@example.com")
+    order = Order.objects.create(user=user, status="Processed")
+    CartItem.objects.bulk_create(
+        CartItem(order=order, product_name=name, quantity=1, price=price)
+        for name, price in [("Lamp", "5.00"), ("Lamp", "7.00"), ("Desk", "80.00"), ("Chair", "40.00"), ("Rug", "30.00")]
+    )
+
+    backfill.backfill_products(apps, None)
+
+    assert Product.objects.count() == 4
+    lamp = Product.objects.get(name="Lamp")
+    assert lamp.price == Decimal("7.00")
+    assert lamp.sku == backfill.legacy_sku("Lamp")
+    assert not CartItem.objects.filter(product__isnull=True).exists()
+    assert set(CartItem.objects.filter(product_name="Lamp").values_list('product', flat=True)) == {lamp.pk}
+    assert len(search_products("lamp", 10)) == 1
@@ -0,0 +1,98 @@
+import pytest
+from django.db import connection
+from django.db.models.signals import post_delete, pre_delete
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from store.cart_cache import cart_cache
+from store.models import User, Order, CartItem
+from store.purge import delete_rows, purge_orders, purge_cart_items
+
+
+def seed(email, orders, items_per_order):
+    user = User.objects.create(name="Purge User", email=email)
+    created = Order.objects.bulk_create(Order(user=user, status='Processed') for _ in range(orders))
+    CartItem.objects.bulk_create(
+        CartItem(order=order, product_name=f"Product {i}", quantity=1, price='1.00')
+        for order in created for i in range(items_per_order)
+    )
+    return user
+
+
+@pytest.mark.django_db
+def test_purge_orders_matches_queryset_delete():
+    expected = Order.objects.filter(user=seed("a@example.com", 7, 3)).delete()
+    assert purge_orders(seed("b@example.com", 7, 3), chunk_size=2) == expected == (28, {
+        'store.CartItem': 21, 'store.Order': 7,
+    })
+
+
+@pytest.mark.django_db
+def test_purge_cart_items_keeps_orders():
+    user = seed("a@example.com", 5, 4)
+    assert purge_cart_items(user, chunk_size=2) == (20, {'store.CartItem': 20})
+    assert Order.objects.filter(user=user).count() == 5
+    assert not CartItem.objects.filter(order__user=user).exists()
+
+
+@pytest.mark.django_db
+def test_purge_leaves_other_users_alone():
+    user = seed("a@example.com", 3, 2)
+    other = seed("b@example.com", 3, 2)
+    purge_orders(user)
+    assert Order.objects.filter(user=other).count() == 3
+    assert CartItem.objects.filter(order__user=other).count() == 6
+
+
+@pytest.mark.django_db
+def test_purge_runs_a_fixed_number_of_statements_per_chunk():
+    user = seed("a@example.com", 10, 50)
+    with CaptureQueriesContext(connection) as captured:
+        purge_orders(user, chunk_size=4)
+    statements = [q['sql'] for q in captured if q['sql'].startswith(('SELECT', 'DELETE'))]
+    # Three chunks of (select ids, delete items, delete orders), then an empty select
+    assert len(statements) == 3 * 3 + 1
+    assert not any(sql.startswith('SELECT') and 'store_cartitem' in sql for sql in statements)
+
+
+@pytest.mark.django_db
+def test_purging_recorded_orders_does_not_cost_statements_per_order():
+    def statements(email, orders):
+        user = seed(email, orders, 2)
+        Order.objects.filter(user=user).update(sales_recorded=True, processed_at=timezone.now())
+        with CaptureQueriesContext(connection) as captured:
+            purge_orders(user, chunk_size=100)
+        return len(captured)
+
+    assert statements("a@example.com", 5) == statements("b@example.com", 50)
+
+
+@pytest.mark.django_db
+def test_purge_invalidates_cart_cache():
+    user = seed("a@example.com", 1, 1)
+    cart_cache.get(user.pk, lambda: {'rows': ['cached']})
+    purge_cart_items(user)
+    assert cart_cache.get(user.pk, lambda: {'rows': []}) == {'rows': []}
+    cart_cache.clear()
+
+
+@pytest.mark.django_db
+def test_delete_rows_sends_no_signals():
+    user = seed("a@example.com", 3, 2)
+    order_ids = list(Order.objects.filter(user=user).values_list('pk', flat=True))
+    sent = []
+
+    def receiver(sender, **kwargs):
+        sent.append(sender)
+
+    pre_delete.connect(receiver)
+    post_delete.connect(receiver)
+    try:
+        assert delete_rows(CartItem, 'order', order_ids[:2]) == 4
+        assert delete_rows(Order, 'id', order_ids[:2]) == 2
+        assert delete_rows(Order, 'id', []) == 0
+    finally:
+        pre_delete.disconnect(receiver)
+        post_delete.disconnect(receiver)
+    assert sent == []
+    assert set(Order.objects.filter(user=user).values_list('pk', flat=True)) == set(order_ids[2:])
+    assert CartItem.objects.filter(order__user=user).count() == 2
@@ -0,0 +1,110 @@
+import functools
+import pytest
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from store.cache import user_cache
+from store.cart_cache import cart_cache
+from store.models import User, Order, CartItem, Product
+from store.query_budgets import QUERY_BUDGETS
+from store.urls import urlpatterns
+
+# Orders per user in each dataset; every order holds ITEMS_PER_ORDER items
+DATASET_SIZES = (1, 5, 25)
+ITEMS_PER_ORDER = 3
+HTTP_METHODS = ('get', 'post', 'put', 'patch', 'delete')
+TRANSACTION_CONTROL = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE SAVEPOINT')
+PASSWORD = "budget-password"
+
+
+def routes():
+    """Every (URL name, HTTP method) pair the store URLconf serves."""
+    found = []
+    for pattern in urlpatterns:
+        view_class = pattern.callback.view_class
+        found.extend((pattern.name, method.upper()) for method in HTTP_METHODS if hasattr(view_class, method))
+    return found
+
+
+@functools.cache
+def password_hash():
+    return make_password(PASSWORD)
+
+
+def seed(size):
+    """A user with ``size`` processed orders, a pending order, and items in each."""
+    user = User.objects.create(
+        name=f"Budget User {size}", email=f"budget{size}@example.com", password=password_hash(), is_staff=True,
+    )
+    User.objects.bulk_create(
+        User(name=f"Other {size}-{i}", email=f"other{size}-{i}@example.com") for i in range(size)
+    )
+    orders = Order.objects.bulk_create(Order(user=user, status='Processed') for _ in range(size))
+    pending = Order.objects.create(user=user, status='Pending')
+    orders.append(pending)
+    products = Product.objects.bulk_create(
+        Product(sku=f"SKU-{size}-{i}", name=f"Product {i}", price='2.50', stock=10) for i in range(size)
+    )
+    items = CartItem.objects.bulk_create(
+        CartItem(order=order, product=products[i % size], product_name=f"Product {i}", quantity=1, price='2.50')
+        for order in orders for i in range(ITEMS_PER_ORDER)
+    )
+    return {'user': user, 'order': orders[0], 'pending': pending, 'item': items[-1]}
+
+
+def build_request(name, method, data):
+    """The path and JSON body used to exercise ``method`` on route ``name``."""
+    user, order, pending, item = data['user'], data['order'], data['pending'], data['item']
+    if name == 'user-list-create':
+        body = {"name": "Budget New", "email": f"new-{user.pk}@example.com"} if method == 'POST' else None
+        return reverse(name), body
+    if name == 'user-detail':
+        return reverse(name, args=[user.pk]), None
+    if name == 'login':
+        return reverse(name), {"email": user.email, "password": PASSWORD}
+    if name == 'logout':
+        return reverse(name), None
+    if name == 'order-list-create':
+        # The user already has a pending order, so this posts a processed one
+        return reverse(name), {"user": str(user.pk), "status": "Processed"} if method == 'POST' else None
+    if name == 'order-detail':
+        return reverse(name, args=[order.pk]), {"status": "Processed"} if method == 'PUT' else None
+    if name == 'checkout':
+        return reverse(name, args=[pending.pk]), None
+    if name == 'cart-item-list':
+        body = [{"product_name": "Budget Item", "quantity": 1, "price": "1.00"}] * 3 if method == 'POST' else None
+        return reverse(name), body
+    if name == 'cart-item-detail':
+        return reverse(name, args=[item.pk]), {"quantity": 7} if method == 'PUT' else None
+    if name in ('product-list', 'sales-analytics'):
+        return reverse(name), None
+    raise AssertionError(f"No request defined for {method} {name}")
+
+
+def count_statements(client, method, path, user, body):
+    user_cache.clear()
+    cart_cache.clear()
+    with CaptureQueriesContext(connection) as captured:
+        response = getattr(client, method.lower())(path, body, format='json', HTTP_X_USER_ID=str(user.pk))
+    assert response.status_code < 400, (method, path, response.status_code, response.content)
+    return len([q for q in captured if not q['sql'].startswith(TRANSACTION_CONTROL)])
+
+
+def test_every_route_has_a_budget():
+    assert set(routes()) == set(QUERY_BUDGETS)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("name, method", routes())
+def test_query_count_is_flat_and_within_budget(name, method):
+    client = APIClient()
+    counts = {}
+    for size in DATASET_SIZES:
+        data = seed(size)
+        path, body = build_request(name, method, data)
+        counts[size] = count_statements(client, method, path, data['user'], body)
+
+    assert len(set(counts.values())) == 1, f"{method} {name} query count grows with data: {counts}"
+    assert counts[DATASET_SIZES[0]] <= QUERY_BUDGETS[(name, method)], counts
@@ -0,0 +1,143 @@
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.test import AsyncClient
+from django.urls import reverse
+from rest_framework.test import APIClient
+from store.middleware import RateLimitMiddleware
+from store.models import User
+from store.throttling import CacheBucketBackend, LocalBucketBackend, parse_rate, take
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def rates(settings):
+    """Fixture with tight limits on cart-item creation and login."""
+    settings.STORE_THROTTLE = {
+        'ENABLED': True,
+        'BACKEND': 'store.throttling.LocalBucketBackend',
+        'RATES': {'cart-item-list:POST': '2/min', 'login:POST': '1/hour'},
+    }
+
+
+@pytest.fixture
+def user(db):
+    """Fixture for creating a test user."""
+    return User.objects.create(name="Throttled", email="throttled@example.com")
+
+
+def add_item(user):
+    return APIClient().post(
+        reverse('cart-item-list'), {"product_name": "Item", "quantity": 1, "price": "1.00"},
+        format='json', HTTP_X_USER_ID=str(user.id),
+    )
+
+
+def test_parse_rate():
+    assert parse_rate('120/min') == (120, 60)
+    assert parse_rate('5/s') == (5, 1)
+    with pytest.raises(ValueError):
+        parse_rate('lots')
+
+
+def test_take_refills_at_the_configured_rate():
+    tokens, decision = take(None, 0, 2, 60, now=0)
+    assert (tokens, decision.allowed, decision.remaining, decision.reset_after) == (1, True, 1, 30)
+
+    tokens, decision = take(0.0, 0, 2, 60, now=15)
+    assert (decision.allowed, decision.retry_after) == (False, 15)
+
+    tokens, decision = take(0.0, 0, 2, 60, now=600)
+    assert (tokens, decision.allowed) == (1, True)
+
+
+def test_local_backend_limits_each_key_separately():
+    clock = FakeClock()
+    backend = LocalBucketBackend(clock=clock)
+
+    assert [backend.consume('a', 2, 60).allowed for _ in range(3)] == [True, True, False]
+    assert backend.consume('b', 2, 60).allowed
+    clock.now += 30
+    assert backend.consume('a', 2, 60).allowed
+    assert not backend.consume('a', 2, 60).allowed
+
+
+def test_local_backend_evicts_least_recently_used_buckets():
+    backend = LocalBucketBackend(max_buckets=2, stripes=1, clock=FakeClock())
+    for key in ('a', 'b', 'a', 'c'):
+        backend.consume(key, 1, 60)
+
+    assert list(backend._buckets[0]) == ['a', 'c']
+
+
+def test_cache_backend_shares_buckets_between_instances():
+    clock = FakeClock()
+    first, second = CacheBucketBackend(clock=clock), CacheBucketBackend(clock=clock)
+
+    assert first.consume('shared-test', 1, 60).allowed
+    assert not second.consume('shared-test', 1, 60).allowed
+
+
+def test_throttled_route_sends_rate_limit_headers(rates, user):
+    response = add_item(user)
+    assert response.status_code == 201
+    assert response['RateLimit-Limit'] == '2'
+    assert response['RateLimit-Remaining'] == '1'
+    assert response['RateLimit-Policy'] == '2;w=60'
+    assert 'Retry-After' not in response
+
+    assert add_item(user).status_code == 201
+    response = add_item(user)
+    assert response.status_code == 429
+    assert response['RateLimit-Remaining'] == '0'
+    assert response['Retry-After'] == '30'
+
+    other = User.objects.create(name="Other", email="other@example.com")
+    assert add_item(other).status_code == 201
+
+
+def test_rate_limit_headers_under_asgi(rates, user):
+    async def get_response(request):
+        pass
+
+    assert iscoroutinefunction(RateLimitMiddleware(get_response))
+    response = async_to_sync(AsyncClient().post)(
+        reverse('cart-item-list'), {"product_name": "Item", "quantity": 1, "price": "1.00"},
+        content_type='application/json', headers={'X-User-ID': str(user.id)},
+    )
+    assert response.status_code == 201
+    assert response['RateLimit-Remaining'] == '1'
+    assert response['Server-Timing'].startswith('app;dur=')
+
+
+def test_anonymous_routes_are_limited_per_client_address(rates, user):
+    body = {"email": "throttled@example.com", "password": "nope"}
+    client = APIClient(REMOTE_ADDR='203.0.113.7')
+    assert client.post(reverse('login'), body, format='json').status_code == 401
+    assert client.post(reverse('login'), body, format='json').status_code == 429
+    assert APIClient(REMOTE_ADDR='203.0.113.8').post(reverse('login'), body, format='json').status_code == 401
+
+
+def test_forwarded_for_does_not_pick_the_bucket(rates, user):
+    body = {"email": user.email, "password": "wrong"}
+    client = APIClient()
+    assert client.post(reverse('login'), body, format='json', HTTP_X_FORWARDED_FOR='198.51.100.1').status_code == 401
+    response = client.post(reverse('login'), body, format='json', HTTP_X_FORWARDED_FOR='198.51.100.2')
+    assert response.status_code == 429
+
+
+def test_routes_without_a_rate_are_not_throttled(rates, user):
+    response = APIClient().get(reverse('order-list-create'), HTTP_X_USER_ID=str(user.id))
+    assert response.status_code == 200
+    assert 'RateLimit-Limit' not in response
+
+
+def test_throttling_can_be_disabled(rates, settings, user):
+    settings.STORE_THROTTLE = {**settings.STORE_THROTTLE, 'ENABLED': False}
+    assert [add_item(user).status_code for _ in range(3)] == [201, 201, 201]
@@ -0,0 +1,181 @@
+import io
+import json
+import pytest
+from asgiref.sync import async_to_sync
+from django.core import signing
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncRequestFactory
+from django.urls import reverse
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from store.async_views import AsyncOrderListView
+from store.authentication import CustomUserIDAuthentication
+from store.models import User, Order
+from store.serializers import UserSerializer
+from store.tokens import TokenVersionCache, issue_token, read_token, revoke_tokens, token_versions
+
+
+@pytest.fixture
+def user(db):
+    """Fixture for creating a test user with an order."""
+    token_versions.clear()
+    user = User.objects.create(name="Token User", email="token@example.com")
+    Order.objects.create(user=user, status="Pending")
+    return user
+
+
+def bearer(token):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+    return client
+
+
+def authenticate(**headers):
+    request = Request(APIRequestFactory().get('/', **headers))
+    return CustomUserIDAuthentication().authenticate(request)
+
+
+def test_token_carries_user_id_and_version(user):
+    assert read_token(issue_token(user)) == (user.id, 0)
+
+
+def test_tampered_or_expired_tokens_are_rejected(user, settings):
+    token = issue_token(user)
+    with pytest.raises(signing.BadSignature):
+        read_token(token[:-1] + ('A' if token[-1] != 'A' else 'B'))
+
+    settings.STORE_TOKENS = {'MAX_AGE': -1}
+    with pytest.raises(signing.SignatureExpired):
+        read_token(token)
+
+
+def test_bearer_token_authenticates_api_requests(user):
+    response = bearer(issue_token(user)).get(reverse('order-list-create'))
+
+    assert response.status_code == 200
+    assert [order['user'] for order in response.data] == [user.id]
+
+
+def test_bearer_auth_skips_the_user_lookup(user, django_assert_num_queries):
+    token = issue_token(user)
+    with django_assert_num_queries(1):
+        authenticate(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    with django_assert_num_queries(0):
+        authenticated, _ = authenticate(HTTP_AUTHORIZATION=f"Bearer {token}")
+    assert authenticated.pk == user.pk
+
+    # Other fields are loaded only when read
+    with django_assert_num_queries(1):
+        assert authenticated.name == "Token User"
+
+
+def test_login_token_works_until_logout(user):
+    user.set_password("pw")
+    user.save()
+    token = APIClient().post(
+        reverse('login'), {"email": "token@example.com", "password": "pw"}, format='json',
+    ).data['token']
+    client = bearer(token)
+
+    assert client.get(reverse('order-list-create')).status_code == 200
+    assert client.post(reverse('logout')).status_code == 204
+    response = client.get(reverse('order-list-create'))
+    assert response.status_code == 403
+    assert response.data == {"detail": "Invalid or expired token"}
+
+
+def test_password_change_and_deletion_revoke_tokens(user):
+    token = issue_token(user)
+    authenticate(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    serializer = UserSerializer(user, data={"password": "new"}, partial=True)
+    serializer.is_valid(raise_exception=True)
+    serializer.save()
+    assert bearer(token).get(reverse('order-list-create')).status_code == 403
+
+    token = issue_token(User.objects.get(pk=user.pk))
+    assert bearer(token).get(reverse('order-list-create')).status_code == 200
+    User.objects.filter(pk=user.pk).delete()
+    assert bearer(token).get(reverse('order-list-create')).status_code == 403
+
+
+def test_import_with_a_new_password_revokes_tokens(user, tmp_path, settings, django_capture_on_commit_callbacks):
+    settings.STORE_PASSWORDS = {'ITERATIONS': 1000}
+    token = issue_token(user)
+    path = tmp_path / "users.csv"
+    path.write_text("name,email,password\nToken User,token@example.com,imported\n")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        call_command('import_users', str(path), '--on-conflict', 'update', stdout=io.StringIO())
+
+    assert bearer(token).get(reverse('order-list-create')).status_code == 403
+
+
+def test_revoke_tokens_bumps_the_version(user):
+    token = issue_token(user)
+    revoke_tokens(user.pk)
+    user.refresh_from_db()
+    assert user.token_version == 1
+    assert bearer(token).get(reverse('order-list-create')).status_code == 403
+
+
+def test_version_read_across_an_invalidation_is_not_cached(user):
+    shared = caches['default']
+    shared.clear()
+    cache = TokenVersionCache(shared_cache=shared)
+
+    def revoke_meanwhile(execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        cache.invalidate(user.pk)
+        return result
+
+    with connection.execute_wrapper(revoke_meanwhile):
+        assert cache.get(user.pk) == 0
+    assert cache.stats()['size'] == 0
+    assert shared.get(TokenVersionCache.key_prefix + str(user.pk)) is None
+
+
+def test_stale_shared_entry_is_not_served_after_invalidation(user):
+    shared = caches['default']
+    shared.clear()
+    first = TokenVersionCache(shared_cache=shared)
+    second = TokenVersionCache(shared_cache=shared)
+    assert first.get(user.pk) == 0
+
+    # One process revokes while another, which read the old version before
+    # the revocation, writes it back to the shared tier afterwards
+    User.objects.filter(pk=user.pk).update(token_version=1)
+    key = TokenVersionCache.key_prefix + str(user.pk)
+    stale = shared.get(key)
+    second.invalidate(user.pk)
+    shared.set(key, stale)
+    assert TokenVersionCache(shared_cache=shared).get(user.pk) == 1
+
+
+def test_user_id_header_can_be_turned_off(user, settings):
+    assert APIClient().get(reverse('order-list-create'), HTTP_X_USER_ID=str(user.id)).status_code == 200
+
+    settings.STORE_TOKENS = {'ALLOW_USER_ID_HEADER': False}
+    response = APIClient().get(reverse('order-list-create'), HTTP_X_USER_ID=str(user.id))
+    assert response.status_code == 403
+    assert bearer(issue_token(user)).get(reverse('order-list-create')).status_code == 200
+
+
+def test_token_version_is_not_exposed_or_writable(user):
+    response = APIClient().post(
+        reverse('user-list-create'), {"name": "N", "email": "n@example.com", "token_version": 7}, format='json',
+    )
+    assert 'token_version' not in response.data
+    assert User.objects.get(email="n@example.com").token_version == 0
+
+
+@pytest.mark.django_db
+def test_async_views_accept_bearer_tokens(user):
+    request = AsyncRequestFactory().get('/api/orders/', headers={"Authorization": f"Bearer {issue_token(user)}"})
+    response = async_to_sync(AsyncOrderListView.as_view())(request)
+
+    assert response.status_code == 200
+    assert [order['user'] for order in json.loads(response.content)] == [str(user.id)]
@@ -0,0 +1,161 @@
+import io
+import json
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from store.cache import user_cache
+from store.models import User
+from store.user_io import export_users, import_users, read_rows
+
+
+@pytest.fixture
+def existing(db):
+    """Fixture for a user the import collides with."""
+    return User.objects.create(name="Old Name", email="taken@example.com", address="Old Street", password="secret")
+
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+def test_import_csv_creates_users_in_batches(db, tmp_path):
+    lines = ["name,email,phone"] + [f"User {i},user{i}@example.com,555-{i:04d}" for i in range(5)]
+    path = write(tmp_path, "users.csv", "\n".join(lines) + "\n")
+    stdout = io.StringIO()
+
+    call_command('import_users', path, '--batch-size', '2', stdout=stdout)
+
+    assert User.objects.count() == 5
+    assert User.objects.get(email="user3@example.com").phone == "555-0003"
+    assert User.objects.get(email="user3@example.com").address is None
+    assert "5 created" in stdout.getvalue()
+
+
+def test_import_ndjson_ignores_existing_emails_by_default(existing, tmp_path):
+    path = write(tmp_path, "users.ndjson", "\n".join([
+        json.dumps({"name": "New Name", "email": "taken@example.com"}),
+        json.dumps({"name": "Fresh", "email": "fresh@example.com"}),
+    ]))
+    stdout = io.StringIO()
+
+    call_command('import_users', path, stdout=stdout)
+
+    existing.refresh_from_db()
+    assert existing.name == "Old Name"
+    assert User.objects.filter(email="fresh@example.com").exists()
+    assert "1 created, 0 updated, 1 skipped" in stdout.getvalue()
+
+
+def test_import_update_overwrites_profile_but_not_password(existing, tmp_path, django_capture_on_commit_callbacks):
+    path = write(tmp_path, "users.csv", "name,email,address\nNew Name,taken@example.com,New Street\n")
+    user_cache.get_user(existing.id)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        call_command('import_users', path, '--on-conflict', 'update', stdout=io.StringIO())
+
+    existing.refresh_from_db()
+    assert (existing.name, existing.address, existing.password) == ("New Name", "New Street", "secret")
+    assert user_cache.get_user(existing.id).name == "New Name"
+
+
+def test_import_reports_invalid_rows_and_keeps_going(db, tmp_path):
+    path = write(tmp_path, "users.ndjson", "\n".join([
+        json.dumps({"name": "Good", "email": "good@example.com"}),
+        json.dumps({"name": "", "email": "noname@example.com"}),
+        json.dumps({"name": "Bad Email", "email": "not-an-email"}),
+        "{not json",
+        json.dumps({"name": "Also Good", "email": "also@example.com"}),
+    ]))
+    stdout, stderr = io.StringIO(), io.StringIO()
+
+    call_command('import_users', path, stdout=stdout, stderr=stderr)
+
+    assert set(User.objects.values_list('email', flat=True)) == {"good@example.com", "also@example.com"}
+    assert "3 invalid" in stdout.getvalue()
+    assert "Line 2: name:" in stderr.getvalue()
+    assert "Line 3: email:" in stderr.getvalue()
+    assert "Line 4:" in stderr.getvalue()
+
+
+def test_import_only_hashes_passwords_it_writes(existing, monkeypatch):
+    hashed = []
+
+    def hash_passwords(passwords):
+        hashed.extend(passwords)
+        return [f"hashed:{password}" for password in passwords]
+
+    monkeypatch.setattr('store.user_io.hash_passwords', hash_passwords)
+    rows = enumerate([
+        {"name": "Taken", "email": "taken@example.com", "password": "ignored"},
+        {"name": "Fresh", "email": "fresh@example.com", "password": "fresh-pass"},
+    ], 1)
+
+    counts, errors = import_users(rows)
+
+    assert hashed == ["fresh-pass"]
+    assert User.objects.get(email="fresh@example.com").password == "hashed:fresh-pass"
+    assert (counts['created'], counts['skipped'], errors) == (1, 1, [])
+
+
+def test_import_deduplicates_emails_within_a_batch(db):
+    rows = enumerate([
+        {"name": "First", "email": "dup@example.com"},
+        {"name": "Second", "email": "dup@example.com"},
+    ], 1)
+
+    counts, errors = import_users(rows, on_conflict='update')
+
+    assert User.objects.get(email="dup@example.com").name == "Second"
+    assert (counts['created'], counts['duplicate'], errors) == (1, 1, [])
+
+
+def test_import_needs_a_format_and_the_required_columns(db, tmp_path):
+    with pytest.raises(CommandError):
+        call_command('import_users', write(tmp_path, "users.txt", ""))
+    with pytest.raises(CommandError):
+        call_command('import_users', write(tmp_path, "users.csv", "name,phone\nA,1\n"))
+
+
+def test_read_rows_streams_csv_with_line_numbers():
+    rows = list(read_rows(io.StringIO("name,email\nA,a@example.com\nB,b@example.com\n"), 'csv'))
+    assert rows == [(2, {"name": "A", "email": "a@example.com"}), (3, {"name": "B", "email": "b@example.com"})]
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'ndjson'])
+def test_export_round_trips_through_import(existing, tmp_path, fmt):
+    User.objects.create(name="Second", email="second@example.com", phone="555-0001")
+    path = str(tmp_path / f"users.{fmt}")
+
+    call_command('export_users', path, '--chunk-size', '1', stderr=io.StringIO())
+    exported = open(path, encoding='utf-8').read()
+    assert "secret" not in exported and "password" not in exported
+
+    User.objects.all().delete()
+    call_command('import_users', path, stdout=io.StringIO())
+    assert sorted(User.objects.values_list('name', 'email', 'address', 'phone')) == [
+        ("Old Name", "taken@example.com", "Old Street", None),
+        ("Second", "second@example.com", None, "555-0001"),
+    ]
+
+
+def test_export_to_stdout_as_ndjson(existing):
+    stdout = io.StringIO()
+
+    call_command('export_users', '-', '--format', 'ndjson', stdout=stdout, stderr=io.StringIO())
+
+    assert json.loads(stdout.getvalue()) == {
+        "id": str(existing.id), "name": "Old Name", "email": "taken@example.com",
+        "address": "Old Street", "phone": None,
+    }
+
+
+def test_export_reports_progress(existing, django_assert_num_queries):
+    User.objects.create(name="Second", email="second@example.com")
+    seen = []
+
+    with django_assert_num_queries(1):
+        written = export_users(io.StringIO(), 'csv', chunk_size=1, progress=seen.append, progress_every=1)
+
+    assert written == 2 and seen == [1, 2]
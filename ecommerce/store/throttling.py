@@ -0,0 +1,224 @@
+import math
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework.throttling import BaseThrottle
+
+
+THROTTLE_DEFAULTS = {
+    'ENABLED': True,
+    'BACKEND': 'store.throttling.LocalBucketBackend',
+    'OPTIONS': {},
+    'RATES': {},
+}
+PERIODS = {'s': 1, 'sec': 1, 'second': 1, 'm': 60, 'min': 60, 'minute': 60,
+           'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+
+
+def throttle_settings():
+    return {**THROTTLE_DEFAULTS, **getattr(settings, 'STORE_THROTTLE', {})}
+
+
+def parse_rate(rate):
+    """``'120/min'`` -> ``(120, 60)``: bucket capacity and seconds to refill it."""
+    count, _, period = rate.partition('/')
+    try:
+        return int(count), PERIODS[period.strip()]
+    except (KeyError, ValueError):
+        raise ValueError(f"Invalid rate {rate!r}; expected e.g. '120/min'")
+
+
+class Decision(namedtuple('Decision', 'allowed limit remaining reset_after retry_after period')):
+    """The outcome of taking one token from a bucket."""
+
+    def headers(self):
+        # RateLimit-* as in the IETF httpapi rate limit headers draft
+        headers = {
+            'RateLimit-Limit': str(self.limit),
+            'RateLimit-Remaining': str(self.remaining),
+            'RateLimit-Reset': str(math.ceil(self.reset_after)),
+            'RateLimit-Policy': f'{self.limit};w={self.period}',
+        }
+        if not self.allowed:
+            headers['Retry-After'] = str(math.ceil(self.retry_after))
+        return headers
+
+
+def take(tokens, updated_at, capacity, period, now):
+    """
+    Refill a bucket last left with ``tokens`` at ``updated_at`` and take
+    one token from it. Returns the new token count and the decision.
+    """
+    rate = capacity / period
+    if tokens is None:
+        tokens = float(capacity)
+    else:
+        tokens = min(float(capacity), tokens + max(0.0, now - updated_at) * rate)
+    allowed = tokens >= 1
+    if allowed:
+        tokens -= 1
+    decision = Decision(
+        allowed=allowed,
+        limit=capacity,
+        remaining=int(tokens),
+        reset_after=(capacity - tokens) / rate,
+        retry_after=0.0 if allowed else (1 - tokens) / rate,
+        period=period,
+    )
+    return tokens, decision
+
+
+class BucketBackend:
+    """Stores token buckets. Subclasses say where."""
+
+    def consume(self, key, capacity, period):
+        """Take one token from bucket ``key``; returns a ``Decision``."""
+        raise NotImplementedError
+
+
+class LocalBucketBackend(BucketBackend):
+    """
+    Buckets in process memory. Keys are spread over ``stripes`` shards,
+    each with its own lock and LRU order, so concurrent requests for
+    different users rarely wait on each other and each call is O(1).
+    Each shard keeps at most its share of ``max_buckets``; the least
+    recently used bucket is dropped, which only ever makes it full again.
+    Limits are per process.
+    """
+
+    def __init__(self, max_buckets=100000, stripes=64, clock=time.monotonic):
+        self.stripes = stripes
+        self.per_stripe = max(1, max_buckets // stripes)
+        self.clock = clock
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self._buckets = [OrderedDict() for _ in range(stripes)]
+
+    def consume(self, key, capacity, period):
+        stripe = hash(key) % self.stripes
+        buckets = self._buckets[stripe]
+        with self._locks[stripe]:
+            now = self.clock()
+            tokens, updated_at = buckets.get(key, (None, now))
+            tokens, decision = take(tokens, updated_at, capacity, period, now)
+            buckets[key] = (tokens, now)
+            buckets.move_to_end(key)
+            if len(buckets) > self.per_stripe:
+                buckets.popitem(last=False)
+        return decision
+
+    def clear(self):
+        for lock, buckets in zip(self._locks, self._buckets):
+            with lock:
+                buckets.clear()
+
+
+class CacheBucketBackend(BucketBackend):
+    """
+    Buckets in one of Django's configured caches, so the limits hold across
+    processes. Each update is guarded by an ``add()`` lock key; a request
+    that cannot get the lock within ``lock_wait`` seconds is let through
+    rather than stalled. Costs three or four cache round trips per request.
+    """
+
+    key_prefix = 'store:bucket:'
+    poll_interval = 0.002
+
+    def __init__(self, cache='default', lock_timeout=1, lock_wait=0.05, clock=time.time):
+        self.cache_alias = cache
+        self.lock_timeout = lock_timeout
+        self.lock_wait = lock_wait
+        self.clock = clock
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def _lock(self, lock_key):
+        deadline = time.monotonic() + self.lock_wait
+        while not self.cache.add(lock_key, 1, self.lock_timeout):
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(self.poll_interval)
+        return True
+
+    def consume(self, key, capacity, period):
+        cache_key = self.key_prefix + key
+        lock_key = cache_key + ':lock'
+        if not self._lock(lock_key):
+            # The bucket's state is unknown; report it as spent but allow
+            return Decision(True, capacity, 0, period, 0.0, period)
+        try:
+            now = self.clock()
+            tokens, updated_at = self.cache.get(cache_key, (None, now))
+            tokens, decision = take(tokens, updated_at, capacity, period, now)
+            # Gone once it would have refilled anyway
+            self.cache.set(cache_key, (tokens, now), math.ceil(decision.reset_after) + 1)
+            return decision
+        finally:
+            self.cache.delete(lock_key)
+
+
+_backend = None
+_config = None
+
+
+def get_backend():
+    """The backend named by STORE_THROTTLE['BACKEND'], built with its OPTIONS."""
+    global _backend
+    if _backend is None:
+        options = throttle_settings()
+        _backend = import_string(options['BACKEND'])(**options['OPTIONS'])
+    return _backend
+
+
+def get_config():
+    """``(enabled, {'<url name>:<METHOD>': (capacity, period)})``, parsed once."""
+    global _config
+    if _config is None:
+        options = throttle_settings()
+        _config = options['ENABLED'], {route: parse_rate(rate) for route, rate in options['RATES'].items()}
+    return _config
+
+
+@receiver(setting_changed)
+def reset_throttle(setting, **kwargs):
+    global _backend, _config
+    if setting == 'STORE_THROTTLE':
+        _backend = _config = None
+
+
+class BucketThrottle(BaseThrottle):
+    """
+    Token-bucket throttle for the routes in STORE_THROTTLE['RATES'], keyed
+    by ``'<url name>:<METHOD>'``. Each user (or client address, when the
+    view is anonymous) has a bucket per route. Routes without a rate are
+    not throttled. The decision is left on the request for
+    store.middleware.RateLimitMiddleware to turn into headers.
+    """
+
+    decision = None
+
+    def allow_request(self, request, view):
+        enabled, rates = get_config()
+        match = request.resolver_match
+        if not enabled or match is None:
+            return True
+        route = f'{match.url_name}:{request.method}'
+        rate = rates.get(route)
+        if rate is None:
+            return True
+
+        user = request.user
+        ident = user.pk if user is not None and user.is_authenticated else self.get_ident(request)
+        self.decision = get_backend().consume(f'{route}:{ident}', *rate)
+        request._request.rate_limit = self.decision
+        return self.decision.allowed
+
+    def wait(self):
+        return self.decision.retry_after if self.decision is not None else None
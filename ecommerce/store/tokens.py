@@ -0,0 +1,177 @@
+import uuid
+
+from django.conf import settings
+from django.core import signing
+from django.db import router
+from django.db.models import F
+
+from .cache import TwoTierCache
+from .models import User
+
+
+TOKEN_DEFAULTS = {
+    'MAX_AGE': 86400,
+    'SALT': 'store.tokens',
+    'ALLOW_USER_ID_HEADER': True,
+    'VERSION_MAX_ENTRIES': 4096,
+    'VERSION_TTL': 30,
+    'SHARED_CACHE': None,
+    'SHARED_TTL': 300,
+}
+
+
+def token_settings():
+    return {**TOKEN_DEFAULTS, **getattr(settings, 'STORE_TOKENS', {})}
+
+
+def _signer():
+    return signing.TimestampSigner(salt=token_settings()['SALT'])
+
+
+def issue_token(user):
+    """
+    A bearer token for ``user``: their id and token version, timestamped
+    and signed with SECRET_KEY. It is good for STORE_TOKENS['MAX_AGE']
+    seconds, or until ``revoke_tokens()`` bumps the version.
+    """
+    return _signer().sign(f'{user.pk.hex}.{user.token_version}')
+
+
+def read_token(token):
+    """
+    The ``(user id, version)`` a token carries. Raises
+    ``signing.BadSignature`` (or its subclass ``SignatureExpired``) for a
+    token that was tampered with, is malformed or is too old.
+    """
+    value = _signer().unsign(token, max_age=token_settings()['MAX_AGE'])
+    user_id, _, version = value.partition('.')
+    try:
+        return uuid.UUID(user_id), int(version)
+    except ValueError:
+        raise signing.BadSignature('Malformed token payload')
+
+
+class TokenVersionCache(TwoTierCache):
+    """
+    Current token version per user id, through an in-process LRU tier and,
+    optionally, a shared tier backed by one of Django's configured caches.
+    A revoked token keeps working for at most the local TTL in processes
+    other than the one that revoked it. Shared entries carry the user's
+    generation token and are only served while it is current.
+    """
+
+    key_prefix = 'store:token-version:'
+
+    @classmethod
+    def options(cls):
+        options = token_settings()
+        return {
+            'MAX_ENTRIES': options['VERSION_MAX_ENTRIES'],
+            'TTL': options['VERSION_TTL'],
+            'SHARED_CACHE': options['SHARED_CACHE'],
+            'SHARED_TTL': options['SHARED_TTL'],
+        }
+
+    def _cached(self, user_id):
+        version = self.local.get(user_id)
+        if version is not None:
+            self._count('hits')
+        return version
+
+    def _shared_hit(self, user_id, values):
+        entry = values.get(self._cache_key(user_id))
+        if entry is not None and entry[0] == values.get(self._generation_key(user_id)):
+            self._count('shared_hits')
+            self.local.set(user_id, entry[1])
+            return entry[1]
+        return None
+
+    def get(self, user_id):
+        """The current token version of ``user_id``, or None if there is no such user."""
+        version = self._cached(user_id)
+        if version is not None:
+            return version
+
+        shared = self.shared
+        values = {}
+        if shared is not None:
+            values = shared.get_many([self._cache_key(user_id), self._generation_key(user_id)])
+            version = self._shared_hit(user_id, values)
+            if version is not None:
+                return version
+
+        self._count('misses')
+        with self._read_guard(user_id) as current:
+            version = User.objects.filter(pk=user_id).values_list('token_version', flat=True).first()
+            if version is not None and current():
+                self.local.set(user_id, version)
+                if shared is not None:
+                    entry = (values.get(self._generation_key(user_id)), version)
+                    shared.set(self._cache_key(user_id), entry, self.shared_ttl)
+        return version
+
+    async def aget(self, user_id):
+        """Async counterpart of ``get`` for ASGI views."""
+        version = self._cached(user_id)
+        if version is not None:
+            return version
+
+        shared = self.shared
+        values = {}
+        if shared is not None:
+            values = await shared.aget_many([self._cache_key(user_id), self._generation_key(user_id)])
+            version = self._shared_hit(user_id, values)
+            if version is not None:
+                return version
+
+        self._count('misses')
+        with self._read_guard(user_id) as current:
+            version = await User.objects.filter(pk=user_id).values_list('token_version', flat=True).afirst()
+            if version is not None and current():
+                self.local.set(user_id, version)
+                if shared is not None:
+                    entry = (values.get(self._generation_key(user_id)), version)
+                    await shared.aset(self._cache_key(user_id), entry, self.shared_ttl)
+        return version
+
+
+token_versions = TokenVersionCache.from_settings()
+
+
+def token_user(user_id, version):
+    """
+    A ``User`` with only ``id`` and ``token_version`` loaded. Filtering by
+    it needs nothing more; any other field is fetched on first access.
+    """
+    return User.from_db(router.db_for_read(User), ['id', 'token_version'], [user_id, version])
+
+
+def user_for_token(token):
+    """
+    The user a bearer token belongs to, or None if the token is invalid,
+    expired or revoked. Costs no query while the user's version is cached.
+    """
+    try:
+        user_id, version = read_token(token)
+    except signing.BadSignature:
+        return None
+    if token_versions.get(user_id) != version:
+        return None
+    return token_user(user_id, version)
+
+
+async def auser_for_token(token):
+    """Async counterpart of ``user_for_token``."""
+    try:
+        user_id, version = read_token(token)
+    except signing.BadSignature:
+        return None
+    if await token_versions.aget(user_id) != version:
+        return None
+    return token_user(user_id, version)
+
+
+def revoke_tokens(user_id):
+    """Invalidate every token issued to ``user_id`` so far. One UPDATE."""
+    User.objects.filter(pk=user_id).update(token_version=F('token_version') + 1)
+    token_versions.invalidate_on_commit(user_id)
@@ -1,12 +1,26 @@
+from django.conf import settings
 from django.urls import path, include
-from store.views import UserListCreateView, UserDetailView, OrderListCreateView, OrderDetailView, CartItemListView, CartItemDetailView, CheckoutView
+from store.views import UserListCreateView, UserDetailView, LoginView, LogoutView, OrderListCreateView, OrderDetailView, CartItemListView, CartItemDetailView, CheckoutView, ProductListView, SalesAnalyticsView
+from store.async_views import AsyncUserDetailView, AsyncOrderListView, AsyncOrderDetailView, AsyncCartItemListView, AsyncCartItemDetailView
+
+
+def route(name, view, async_view=None):
+    """Serve `name` with `async_view` when it is listed in STORE_ASYNC_ROUTES."""
+    if async_view is not None and name in settings.STORE_ASYNC_ROUTES:
+        return async_view.as_view()
+    return view.as_view()
+
 
 urlpatterns = [
     path('users/', UserListCreateView.as_view(), name='user-list-create'),
-    path('users/<uuid:user_id>/', UserDetailView.as_view(), name='user-detail'),
-    path('orders/', OrderListCreateView.as_view(), name='order-list-create'),
-    path('orders/<uuid:order_id>/', OrderDetailView.as_view(), name='order-detail'),
+    path('users/<uuid:user_id>/', route('user-detail', UserDetailView, AsyncUserDetailView), name='user-detail'),
+    path('login/', LoginView.as_view(), name='login'),
+    path('logout/', LogoutView.as_view(), name='logout'),
+    path('orders/', route('order-list-create', OrderListCreateView, AsyncOrderListView), name='order-list-create'),
+    path('orders/<uuid:order_id>/', route('order-detail', OrderDetailView, AsyncOrderDetailView), name='order-detail'),
     path('orders/<uuid:order_id>/checkout', CheckoutView.as_view(), name='checkout'),
-    path('cart-items/', CartItemListView.as_view(), name='cart-item-list'), 
-    path('cart-items/<uuid:cart_item_id>/', CartItemDetailView.as_view(), name='cart-item-detail'), 
+    path('cart-items/', route('cart-item-list', CartItemListView, AsyncCartItemListView), name='cart-item-list'), 
+    path('cart-items/<uuid:cart_item_id>/', route('cart-item-detail', CartItemDetailView, AsyncCartItemDetailView), name='cart-item-detail'), 
+    path('products/', ProductListView.as_view(), name='product-list'),
+    path('analytics/sales/', SalesAnalyticsView.as_view(), name='sales-analytics'),
 ]
@@ -0,0 +1,192 @@
+import csv
+import json
+from collections import Counter
+from functools import partial
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F
+
+from .cache import user_cache
+from .models import User
+from .passwords import hash_passwords
+from .tokens import token_versions
+
+
+IMPORT_FIELDS = ('name', 'email', 'address', 'phone', 'password')
+EXPORT_FIELDS = ('id', 'name', 'email', 'address', 'phone')
+REQUIRED_FIELDS = ('name', 'email')
+UPDATE_FIELDS = ['name', 'address', 'phone']
+FORMATS = ('csv', 'ndjson')
+EXTENSIONS = {'.csv': 'csv', '.ndjson': 'ndjson', '.jsonl': 'ndjson'}
+IMPORT_BATCH_SIZE = 1000
+EXPORT_CHUNK_SIZE = 2000
+MAX_REPORTED_ERRORS = 20
+
+
+def detect_format(path):
+    """The format implied by ``path``'s extension, or None."""
+    for extension, fmt in EXTENSIONS.items():
+        if path.lower().endswith(extension):
+            return fmt
+    return None
+
+
+def read_rows(stream, fmt):
+    """
+    ``(line number, row)`` pairs from a CSV (with a header) or NDJSON
+    stream, one line at a time. A line that is not valid JSON gives a
+    ``None`` row so the caller can report it and carry on.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        missing = set(REQUIRED_FIELDS) - set(reader.fieldnames or ())
+        if missing:
+            raise ValueError(f"CSV header is missing {', '.join(sorted(missing))}")
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError:
+            yield number, None
+
+
+def clean_row(row):
+    """The importable fields of ``row``, validated like the model's fields."""
+    if not isinstance(row, dict):
+        raise ValidationError("Expected a JSON object.")
+    values = {}
+    for name in IMPORT_FIELDS:
+        value = row.get(name)
+        value = str(value) if value is not None else ''
+        if name != 'password':
+            value = value.strip()
+        field = User._meta.get_field(name)
+        try:
+            values[name] = field.clean(value or None, None)
+        except ValidationError as exc:
+            raise ValidationError(f"{name}: {' '.join(exc.messages)}")
+    return values
+
+
+def _hash_passwords(users):
+    # Done before the write transaction opens, so no lock is held meanwhile
+    if any(user.password for user in users):
+        for user, hashed in zip(users, hash_passwords([user.password for user in users])):
+            user.password = hashed
+
+
+def _write_batch(batch, on_conflict, counts):
+    if on_conflict == 'update':
+        users = [User(**values) for values in batch.values()]
+        _hash_passwords(users)
+        with transaction.atomic():
+            existing = dict(User.objects.filter(email__in=list(batch)).values_list('email', 'pk'))
+            # Rows without a password keep the one already stored
+            with_password = [user for user in users if user.password]
+            without_password = [user for user in users if not user.password]
+            for group, fields in ((with_password, UPDATE_FIELDS + ['password']), (without_password, UPDATE_FIELDS)):
+                if group:
+                    User.objects.bulk_create(
+                        group, update_conflicts=True, unique_fields=['email'], update_fields=fields,
+                    )
+            # A new password revokes the user's tokens, as in UserSerializer.update()
+            changed = [existing[user.email] for user in with_password if user.email in existing]
+            if changed:
+                User.objects.filter(pk__in=changed).update(token_version=F('token_version') + 1)
+            counts['updated'] += len(existing)
+            # Bulk upserts send no post_save signals
+            for pk in existing.values():
+                transaction.on_commit(partial(user_cache.invalidate, pk))
+                transaction.on_commit(partial(token_versions.invalidate, pk))
+    else:
+        # Only rows that will be written are worth hashing. A row created
+        # elsewhere after this check is still skipped by the insert, though
+        # it is counted as created.
+        existing = dict(User.objects.filter(email__in=list(batch)).values_list('email', 'pk'))
+        users = [User(**values) for email, values in batch.items() if email not in existing]
+        _hash_passwords(users)
+        with transaction.atomic():
+            User.objects.bulk_create(users, ignore_conflicts=True)
+        counts['skipped'] += len(existing)
+    counts['created'] += len(batch) - len(existing)
+
+
+def import_users(rows, on_conflict='ignore', batch_size=IMPORT_BATCH_SIZE, progress=None):
+    """
+    Create users from ``(line number, row)`` pairs, ``batch_size`` at a time.
+
+    Each batch is one existence check and one ``bulk_create`` in its own
+    transaction, so a failure loses at most the batch in hand. Passwords
+    are hashed a batch at a time on the password thread pool. Users whose
+    email already exists are left alone (``on_conflict='ignore'``) or have
+    their name, address, phone and any given password overwritten
+    (``'update'``). Within a batch, a repeated email keeps the first row,
+    or the last when updating. Invalid rows are counted and skipped.
+    ``progress`` is called with the running counts after every batch.
+    Returns ``(counts, errors)``, where errors holds the first few
+    ``(line number, message)`` pairs.
+    """
+    if on_conflict not in ('ignore', 'update'):
+        raise ValueError(f"Unknown conflict mode {on_conflict!r}")
+    counts = Counter(rows=0, created=0, updated=0, skipped=0, duplicate=0, invalid=0)
+    errors = []
+    batch = {}
+    for number, row in rows:
+        counts['rows'] += 1
+        try:
+            values = clean_row(row)
+        except ValidationError as exc:
+            counts['invalid'] += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append((number, ' '.join(exc.messages)))
+            continue
+        email = values['email']
+        if email in batch:
+            counts['duplicate'] += 1
+            if on_conflict == 'ignore':
+                continue
+        batch[email] = values
+        if len(batch) >= batch_size:
+            _write_batch(batch, on_conflict, counts)
+            batch = {}
+            if progress:
+                progress(counts)
+    if batch:
+        _write_batch(batch, on_conflict, counts)
+        if progress:
+            progress(counts)
+    return counts, errors
+
+
+def export_users(stream, fmt, chunk_size=EXPORT_CHUNK_SIZE, progress=None, progress_every=None):
+    """
+    Write every user except their password to ``stream`` as CSV or NDJSON,
+    in primary key order. Rows are streamed from the database
+    ``chunk_size`` at a time and written as they arrive, so memory use does
+    not grow with the table. Returns the number of rows written.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}")
+    rows = User.objects.order_by('pk').values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+    if fmt == 'csv':
+        writer = csv.writer(stream)
+        writer.writerow(EXPORT_FIELDS)
+        write = writer.writerow
+    else:
+        encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+        def write(row):
+            stream.write(encoder.encode(dict(zip(EXPORT_FIELDS, row))) + '\n')
+
+    written = 0
+    for pk, *values in rows:
+        write((str(pk), *values))
+        written += 1
+        if progress and progress_every and written % progress_every == 0:
+            progress(written)
+    return written
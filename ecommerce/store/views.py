@@ -1,10 +1,15 @@
+from datetime import date
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils import timezone
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from store.models import User, Order, CartItem
-from store.serializers import UserSerializer, OrderSerializer, CartItemSerializer
+from store.models import User, Order, CartItem, Product
+from store.serializers import UserSerializer, LoginSerializer, OrderSerializer, OrderWithItemsSerializer, CartItemSerializer, ProductSerializer
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.permissions import AllowAny
+from rest_framework.renderers import BrowsableAPIRenderer
 from uuid import UUID
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
@@ -14,7 +19,22 @@ from rest_framework.response import Response
 from rest_framework import status
 from .models import User
 from .serializers import UserSerializer
+from .analytics import sales_report
 from .authentication import CustomUserIDAuthentication
+from .cache import user_cache
+from .cart_cache import cart_cache
+from .conditional import Validators, order_list_version, cart_item_list_version
+from .fastpath import CompiledSerializer, FastJSONRenderer
+from .idempotency import idempotent, idempotency_key_header
+from .metrics import registry
+from .pagination import UserCursorPagination, ProductCursorPagination
+from .permissions import IsStaff
+from .passwords import authenticate
+from .purge import purge_orders, purge_cart_items
+from .search import search_products
+from .streaming import stream_ndjson
+from .tasks import enqueue_checkout_jobs
+from .tokens import issue_token, revoke_tokens, token_settings, token_versions
 
 
 user_id_header = openapi.Parameter(
@@ -25,10 +45,77 @@ user_id_header = openapi.Parameter(
 
 )
 
+cursor_param = openapi.Parameter(
+        name="cursor",
+        in_=openapi.IN_QUERY,
+        description="Opaque cursor taken from the previous page's next/previous link",
+        type=openapi.TYPE_STRING
+)
+
+page_size_param = openapi.Parameter(
+        name="page_size",
+        in_=openapi.IN_QUERY,
+        description="Number of results per page (max 1000)",
+        type=openapi.TYPE_INTEGER
+)
+
+stream_param = openapi.Parameter(
+        name="stream",
+        in_=openapi.IN_QUERY,
+        description="Set to 'ndjson' to stream every row as newline-delimited JSON instead of paging",
+        type=openapi.TYPE_STRING
+)
+
+expand_param = openapi.Parameter(
+        name="expand",
+        in_=openapi.IN_QUERY,
+        description="Set to 'cart_items' to embed each order's cart items",
+        type=openapi.TYPE_STRING
+)
+
+search_param = openapi.Parameter(
+        name="q",
+        in_=openapi.IN_QUERY,
+        description="Search products by name or SKU; every word must match as a prefix",
+        type=openapi.TYPE_STRING
+)
+
+start_param = openapi.Parameter(
+        name="start",
+        in_=openapi.IN_QUERY,
+        description="First day to include, YYYY-MM-DD",
+        type=openapi.TYPE_STRING
+)
+
+end_param = openapi.Parameter(
+        name="end",
+        in_=openapi.IN_QUERY,
+        description="Last day to include, YYYY-MM-DD",
+        type=openapi.TYPE_STRING
+)
+
+group_param = openapi.Parameter(
+        name="group",
+        in_=openapi.IN_QUERY,
+        description="'day' (default), 'product' or 'day,product'",
+        type=openapi.TYPE_STRING
+)
+
+USER_STREAM_CHUNK_SIZE = 2000
+PRODUCT_SEARCH_LIMIT = 100
+CART_ITEM_BULK_LIMIT = 500
+
+# values()-based read paths producing the same JSON as the serializers
+USER_ROWS = CompiledSerializer(UserSerializer)
+ORDER_ROWS = CompiledSerializer(OrderSerializer)
+CART_ITEM_ROWS = CompiledSerializer(CartItemSerializer)
+PRODUCT_ROWS = CompiledSerializer(ProductSerializer)
+
 
 class UserListCreateView(APIView):
     permission_classes = [AllowAny]
     authentication_classes = []
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
 
     @swagger_auto_schema(
         operation_description="Create a new user",
@@ -43,13 +130,18 @@ class UserListCreateView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     @swagger_auto_schema(
-        operation_description="List all users",
-        responses={200: UserSerializer(many=True)}
+        operation_description="List users one page at a time, or stream all of them as NDJSON",
+        responses={200: UserSerializer(many=True)},
+        manual_parameters = [cursor_param, page_size_param, stream_param]
     )
     def get(self, request):
-        users = User.objects.all()
-        serializer = UserSerializer(users, many=True)
-        return Response(serializer.data)
+        users = User.objects.order_by('id')
+        if request.query_params.get('stream') == 'ndjson':
+            return stream_ndjson(users, UserSerializer, chunk_size=USER_STREAM_CHUNK_SIZE)
+
+        paginator = UserCursorPagination()
+        page = paginator.paginate_queryset(USER_ROWS.values(users), request, view=self)
+        return paginator.get_paginated_response(USER_ROWS.convert_rows(page))
 
 class UserDetailView(APIView):
     permission_classes = [AllowAny]
@@ -68,36 +160,87 @@ class UserDetailView(APIView):
         return Response(serializer.data)
 
 
-class OrderListCreateView(APIView):
+class LoginView(APIView):
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    @swagger_auto_schema(
+        operation_description="Exchange an email and password for a signed bearer token",
+        request_body=LoginSerializer,
+        responses={200: 'Token, its lifetime in seconds, and the user', 400: 'Invalid data', 401: 'Invalid email or password'}
+    )
+    def post(self, request):
+        serializer = LoginSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        user = authenticate(serializer.validated_data['email'], serializer.validated_data['password'])
+        if user is None:
+            return Response({"error": "Invalid email or password"}, status=status.HTTP_401_UNAUTHORIZED)
+        return Response({
+            "token": issue_token(user),
+            "expires_in": token_settings()['MAX_AGE'],
+            "user": UserSerializer(user).data,
+        })
+
+
+class LogoutView(APIView):
     permission_classes = [IsAuthenticated]
     authentication_classes = [CustomUserIDAuthentication]
 
     @swagger_auto_schema(
-        operation_description="List all orders",
-        responses={200: OrderSerializer(many=True), 401: 'Unauthorized'},
+        operation_description="Revoke every bearer token issued to the user",
+        responses={204: 'Tokens revoked', 401: 'Unauthorized'},
         manual_parameters = [user_id_header]
     )
+    def post(self, request):
+        revoke_tokens(request.user.pk)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class OrderListCreateView(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [CustomUserIDAuthentication]
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+
+    @swagger_auto_schema(
+        operation_description="List all orders. Supports If-None-Match.",
+        responses={200: OrderWithItemsSerializer(many=True), 304: 'Not modified', 401: 'Unauthorized'},
+        manual_parameters = [user_id_header, expand_param]
+    )
     def get(self, request):
         if not request.user.is_authenticated:
             return Response({"error": "Unauthorized"}, status=status.HTTP_401_UNAUTHORIZED)
         
-        orders = Order.objects.filter(user=request.user)
-        serializer = OrderSerializer(orders, many=True)
-        return Response(serializer.data)
+        validators = Validators(request, order_list_version(request.user))
+        not_modified = validators.not_modified(request)
+        if not_modified is not None:
+            return not_modified
+
+        orders = Order.objects.filter(user=request.user).order_by('-created_at').with_totals()
+        if 'cart_items' in request.query_params.get('expand', '').split(','):
+            # One extra query for all cart items, however many orders there are
+            orders = orders.prefetch_related('cart_items')
+            serializer = OrderWithItemsSerializer(orders, many=True)
+            return validators.apply(Response(serializer.data))
+        return validators.apply(Response(ORDER_ROWS.rows(orders)))
 
     @swagger_auto_schema(
         operation_description="Create a new order",
         request_body=OrderSerializer,
-        responses={201: OrderSerializer(), 400: "Invalid data", 401: 'Unauthorized'},
-        manual_parameters = [user_id_header]
+        responses={201: OrderSerializer(), 400: "Invalid data", 401: 'Unauthorized', 409: 'Duplicate request in progress', 422: 'Idempotency-Key reused'},
+        manual_parameters = [user_id_header, idempotency_key_header]
     )
+    @idempotent
     def post(self, request):
         if not request.user.is_authenticated:
             return Response({"error": "Unauthorized"}, status=status.HTTP_401_UNAUTHORIZED)
 
         serializer = OrderSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save(user=request.user)
+            try:
+                serializer.save(user=request.user)
+            except ValueError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -113,7 +256,7 @@ class OrderListCreateView(APIView):
         if not request.user.is_authenticated:
             return Response({"error": "Unauthorized"}, status=status.HTTP_401_UNAUTHORIZED)
 
-        deleted_count, _ = Order.objects.filter(user=request.user).delete()
+        deleted_count, _ = purge_orders(request.user)
         return Response(
             {"message": f"All orders ({deleted_count}) deleted successfully."},
             status=status.HTTP_200_OK, 
@@ -133,7 +276,7 @@ class OrderDetailView(APIView):
             return Response({"error": "Unauthorized"}, status=status.HTTP_401_UNAUTHORIZED)
 
         try:
-            order = Order.objects.get(id=order_id, user=request.user)
+            order = Order.objects.with_totals().get(id=order_id, user=request.user)
             serializer = OrderSerializer(order)
             return Response(serializer.data)
         except Order.DoesNotExist:
@@ -153,7 +296,10 @@ class OrderDetailView(APIView):
             order = Order.objects.get(id=order_id, user=request.user)
             serializer = OrderSerializer(order, data=request.data, partial=True)
             if serializer.is_valid():
-                serializer.save()
+                try:
+                    serializer.save()
+                except ValueError as e:
+                    return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
                 return Response(serializer.data)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         except Order.DoesNotExist:
@@ -182,36 +328,80 @@ class OrderDetailView(APIView):
         except Order.DoesNotExist:
             return Response({"error": "Order not found."}, status=status.HTTP_404_NOT_FOUND)
 
+class ProductListView(APIView):
+    permission_classes = [AllowAny]
+    authentication_classes = []
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+
+    @swagger_auto_schema(
+        operation_description=(
+            "List the catalog one page at a time, ordered by SKU. With ?q=, return up to "
+            f"{PRODUCT_SEARCH_LIMIT} best matches instead, best first."
+        ),
+        responses={200: ProductSerializer(many=True)},
+        manual_parameters = [search_param, cursor_param, page_size_param]
+    )
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if query:
+            ids = search_products(query, PRODUCT_SEARCH_LIMIT)
+            rows = {row['id']: row for row in PRODUCT_ROWS.rows(Product.objects.filter(pk__in=ids))}
+            return Response({"results": [rows[pk] for pk in ids if pk in rows]})
+
+        paginator = ProductCursorPagination()
+        page = paginator.paginate_queryset(PRODUCT_ROWS.values(Product.objects.all()), request, view=self)
+        return paginator.get_paginated_response(PRODUCT_ROWS.convert_rows(page))
+
+
+def cart_snapshot(user):
+    """The cached form of a user's cart: rendered rows and their version."""
+    version = cart_item_list_version(user)
+    rows = CART_ITEM_ROWS.rows(CartItem.objects.filter(order__user=user)) if version['count'] else []
+    for row in rows:
+        cart_cache.remember_owner(row['order'], user.pk)
+    return {'rows': rows, 'version': version}
+
+
 class CartItemListView(APIView):
     permission_classes = [IsAuthenticated]
     authentication_classes = [CustomUserIDAuthentication]
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
 
     @swagger_auto_schema(
-        operation_description="Get all cart items",
-        responses={200: CartItemSerializer(many=True), 404: 'No cart items found', 401: 'Unauthorized'},
+        operation_description="Get all cart items, served from a per-user snapshot cache. Supports If-None-Match.",
+        responses={200: CartItemSerializer(many=True), 304: 'Not modified', 404: 'No cart items found', 401: 'Unauthorized'},
         manual_parameters = [user_id_header]
     )
     def get(self, request):
         if not request.user.is_authenticated:
             return Response({"error": "Unauthorized"}, status=status.HTTP_401_UNAUTHORIZED)
 
-        cart_items = CartItem.objects.filter(order__user=request.user) 
-        if cart_items.exists():
-            serializer = CartItemSerializer(cart_items, many=True)
-            return Response(serializer.data)
-        return Response({"error": "No cart items found."}, status=status.HTTP_404_NOT_FOUND)
+        snapshot = cart_cache.get(request.user.pk, lambda: cart_snapshot(request.user))
+        if not snapshot['rows']:
+            return Response({"error": "No cart items found."}, status=status.HTTP_404_NOT_FOUND)
+        validators = Validators(request, snapshot['version'])
+        not_modified = validators.not_modified(request)
+        if not_modified is not None:
+            return not_modified
+        return validators.apply(Response(snapshot['rows']))
 
     @swagger_auto_schema(
-        operation_description="Create a new cart item",
+        operation_description="Create a cart item, or several at once by posting a JSON array of items",
         request_body=CartItemSerializer,
-        responses={201: CartItemSerializer(), 400: 'Invalid data', 401: 'Unauthorized'},
-        manual_parameters = [user_id_header]
+        responses={201: CartItemSerializer(), 400: 'Invalid data', 401: 'Unauthorized', 409: 'Duplicate request in progress', 422: 'Idempotency-Key reused'},
+        manual_parameters = [user_id_header, idempotency_key_header]
     )
+    @idempotent
     def post(self, request):
         if not request.user.is_authenticated:
             return Response({"error": "Unauthorized"}, status=status.HTTP_401_UNAUTHORIZED)
 
-        serializer = CartItemSerializer(data=request.data, context={'request': request})
+        if isinstance(request.data, list):
+            serializer = CartItemSerializer(
+                data=request.data, many=True, max_length=CART_ITEM_BULK_LIMIT, context={'request': request}
+            )
+        else:
+            serializer = CartItemSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -227,7 +417,7 @@ class CartItemListView(APIView):
         if not request.user.is_authenticated:
             return Response({"error": "Unauthorized"}, status=status.HTTP_401_UNAUTHORIZED)
 
-        deleted_count, _ = CartItem.objects.filter(order__user=request.user).delete()
+        deleted_count, _ = purge_cart_items(request.user)
         return Response(
             {"message": f"All cart items ({deleted_count}) deleted successfully."},
             status=status.HTTP_200_OK,
@@ -257,7 +447,7 @@ class CartItemDetailView(APIView):
 
     @swagger_auto_schema(
         operation_description="Update a specific cart item by ID",
-        responses={200: CartItemSerializer(), 400: "Invalid data", 404: "Cart item not found", 401: 'Unauthorized'},
+        responses={200: CartItemSerializer(), 400: "Invalid data", 404: "Cart item not found", 409: 'Order already processed', 401: 'Unauthorized'},
         request_body=CartItemSerializer,
         manual_parameters = [user_id_header]
     )
@@ -267,7 +457,9 @@ class CartItemDetailView(APIView):
 
         if cart_item_id:
             try:
-                cart_item = CartItem.objects.get(id=cart_item_id, order__user=request.user)  
+                cart_item = CartItem.objects.select_related('order').get(id=cart_item_id, order__user=request.user)
+                if cart_item.order.status == 'Processed':
+                    return Response({"error": "Items of a processed order cannot be changed."}, status=status.HTTP_409_CONFLICT)
                 serializer = CartItemSerializer(cart_item, data=request.data, partial=True)
                 if serializer.is_valid():
                     serializer.save()
@@ -279,7 +471,7 @@ class CartItemDetailView(APIView):
 
     @swagger_auto_schema(
         operation_description="Delete a specific cart item",
-        responses={204: 'Cart item deleted', 404: 'Cart item not found', 401: 'Unauthorized'},
+        responses={204: 'Cart item deleted', 404: 'Cart item not found', 409: 'Order already processed', 401: 'Unauthorized'},
         manual_parameters = [user_id_header]
     )
     def delete(self, request, cart_item_id=None):
@@ -287,7 +479,9 @@ class CartItemDetailView(APIView):
             return Response({"error": "Unauthorized"}, status=status.HTTP_401_UNAUTHORIZED)
 
         try:
-            cart_item = CartItem.objects.get(id=cart_item_id, order__user=request.user)
+            cart_item = CartItem.objects.select_related('order').get(id=cart_item_id, order__user=request.user)
+            if cart_item.order.status == 'Processed':
+                return Response({"error": "Items of a processed order cannot be changed."}, status=status.HTTP_409_CONFLICT)
             cart_item.delete()
             return Response({"message": f"Cart item with ID {cart_item_id} deleted successfully."})
         except CartItem.DoesNotExist:
@@ -300,23 +494,69 @@ class CheckoutView(APIView):
 
     @swagger_auto_schema(
         operation_description="Process an order by changing its status to 'Processed'",
-        responses={200: 'Order processed successfully', 400: 'Invalid order status', 404: 'Order not found', 401: 'Unauthorized'},
-        manual_parameters = [user_id_header]
+        responses={200: 'Order processed successfully', 404: 'Order not found', 409: 'Order is not pending', 401: 'Unauthorized', 422: 'Idempotency-Key reused'},
+        manual_parameters = [user_id_header, idempotency_key_header]
     )
+    @idempotent
     def put(self, request, order_id):
         if not request.user.is_authenticated:
             return Response({"error": "Unauthorized"}, status=status.HTTP_401_UNAUTHORIZED)
 
-        try:
-            order = Order.objects.get(id=order_id, user=request.user) 
-        except Order.DoesNotExist:
+        now = timezone.now()
+        with transaction.atomic():
+            # The status check and the transition are one conditional UPDATE,
+            # so of several concurrent checkouts exactly one sees a row change.
+            processed = Order.objects.filter(
+                id=order_id, user=request.user, status='Pending'
+            ).update(status='Processed', updated_at=now, processed_at=now)
+            if processed:
+                # Follow-up work is queued in this transaction and run by
+                # manage.py run_jobs, so it neither delays the response nor
+                # outlives a rolled-back checkout.
+                enqueue_checkout_jobs(order_id, request.user.pk)
+                return Response({"message": "Order processed successfully."}, status=status.HTTP_200_OK)
+
+        current_status = Order.objects.filter(id=order_id, user=request.user).values_list('status', flat=True).first()
+        if current_status is None:
             return Response({"error": "Order not found"}, status=status.HTTP_404_NOT_FOUND)
+        if current_status == 'Processed':
+            return Response({"error": "Order has already been processed."}, status=status.HTTP_409_CONFLICT)
+        return Response({"error": f"Order is {current_status} and cannot be processed."}, status=status.HTTP_409_CONFLICT)
 
-        if order.status == 'Pending':
-            order.status = 'Processed'
-            order.save()
-            return Response({"message": "Order processed successfully."}, status=status.HTTP_200_OK)
-        elif order.status == 'Processed':
-            return Response({"message": "Order has already been processed."}, status=status.HTTP_200_OK)
-        else:
-            return Response({"error": "Invalid order status."}, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+
+class SalesAnalyticsView(APIView):
+    permission_classes = [IsStaff]
+    authentication_classes = [CustomUserIDAuthentication]
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+
+    @swagger_auto_schema(
+        operation_description="Units sold and revenue from processed orders, read from the daily rollups. Staff only.",
+        responses={200: 'Sales totals', 400: 'Invalid date or grouping', 401: 'Unauthorized', 403: 'Not staff'},
+        manual_parameters = [user_id_header, start_param, end_param, group_param]
+    )
+    def get(self, request):
+        if not request.user.is_authenticated:
+            return Response({"error": "Unauthorized"}, status=status.HTTP_401_UNAUTHORIZED)
+
+        group = request.query_params.get('group', 'day')
+        try:
+            start, end = (
+                date.fromisoformat(value) if value else None
+                for value in (request.query_params.get('start'), request.query_params.get('end'))
+            )
+            results = sales_report(start, end, group)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"group": group, "start": start, "end": end, "results": results})
+
+
+def metrics(request):
+    """Prometheus text exposition of the request histograms and cache counters."""
+    lines = [registry.render()]
+    sources = (('store_user_cache', user_cache), ('store_cart_cache', cart_cache), ('store_token_versions', token_versions))
+    for prefix, cache in sources:
+        for name, value in cache.stats().items():
+            metric = f'{prefix}_{name}' if name == 'size' else f'{prefix}_{name}_total'
+            kind = 'gauge' if name == 'size' else 'counter'
+            lines.append(f'# TYPE {metric} {kind}\n{metric} {value}\n')
+    return HttpResponse(''.join(lines), content_type='text/plain; version=0.0.4')